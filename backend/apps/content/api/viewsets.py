@@ -11,20 +11,22 @@ from apps.content.api.serializers import (AboutSerializer,
                                           )
 from apps.content.models import (FAQ, About, Banner, Contact, DeliveryMethod,
                                  Documents, Header, ReturnConditions)
+from utils.abstractions.response_cache import ResponseCacheMixin
 from utils.abstractions.viewset import AbstractSingleView
 
 
-class DocumentsViewSet(AbstractSingleView):
+class DocumentsViewSet(ResponseCacheMixin, AbstractSingleView):
     queryset = Documents.objects.all()
     serializer_class = DocumentSerializer
 
 
-class AboutViewSet(AbstractSingleView):
+class AboutViewSet(ResponseCacheMixin, AbstractSingleView):
     queryset = About.objects.all()
     serializer_class = AboutSerializer
 
 
-class BannerViewSet(ListModelMixin,
+class BannerViewSet(ResponseCacheMixin,
+                    ListModelMixin,
                     RetrieveModelMixin,
                     GenericViewSet):
     queryset = Banner.objects.all()
@@ -33,21 +35,21 @@ class BannerViewSet(ListModelMixin,
     filterset_fields = ('name', 'is_active')
 
 
-class ContactViewSet(AbstractSingleView):
+class ContactViewSet(ResponseCacheMixin, AbstractSingleView):
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
 
 
-class DeliveryMethodViewSet(ReadOnlyModelViewSet):
+class DeliveryMethodViewSet(ResponseCacheMixin, ReadOnlyModelViewSet):
     queryset = DeliveryMethod.objects.all()
     serializer_class = DeliveryMethodSerializer
 
 
-class FAQViewSet(ReadOnlyModelViewSet):
+class FAQViewSet(ResponseCacheMixin, ReadOnlyModelViewSet):
     queryset = FAQ.objects.all()
     serializer_class = FAQSerializer
 
 
-class ReturnConditionsViewSet(AbstractSingleView):
+class ReturnConditionsViewSet(ResponseCacheMixin, AbstractSingleView):
     queryset = ReturnConditions.objects.all()
     serializer_class = ReturnConditionsSerializer
@@ -0,0 +1,5 @@
+from apps.content.models import (FAQ, About, Banner, Contact, DeliveryMethod,
+                                 Documents, ReturnConditions)
+from utils.abstractions.response_cache import response_cache__connect
+
+response_cache__connect(models=(About, Banner, Contact, DeliveryMethod, Documents, FAQ, ReturnConditions))
@@ -1,17 +1,11 @@
 from decimal import Decimal
 
 import django_filters.rest_framework as filters
-from celery.result import AsyncResult
-from django.db.models import Max, Min, Q, QuerySet
+from django.db.models import Q, QuerySet
 
-from apps.market.models import Category, Product
-from apps.market.tasks import (get_products__by__article,
-                               get_products__by__brand__name,
-                               get_products__by__characteristics_value,
-                               get_products__by__code,
-                               get_products__by__description,
-                               get_products__by__name,
-                               get_products__by__variants__code)
+from apps.market.logic.interactors.category_tree import category_tree__get
+from apps.market.logic.selectors.product_selectors import products__search
+from apps.market.models import Favorite, Product, TagProduct, Variant
 
 
 class ProductOrderingFilter(filters.FilterSet):
@@ -26,7 +20,8 @@ class ProductOrderingFilter(filters.FilterSet):
             'label',
             'tags',
             'id',
-            'user'
+            'user',
+            'search',
         )
 
     user = filters.CharFilter(
@@ -90,49 +85,32 @@ class ProductOrderingFilter(filters.FilterSet):
         label='Tags_filter',
         help_text='Filter products by tags'
     )
-    # search = filters.CharFilter(
-    #     method='search_filter',
-    #     label='search_filter',
-    #     help_text='Filter products by search.',
-    # )
-
-    # def search_filter(self, queryset: QuerySet[Product], name: str, value: str) -> QuerySet[Product]:
-    #
-    #     characteristics_records: AsyncResult = get_products__by__characteristics_value.apply_async((value, ))
-    #     article_records: AsyncResult = get_products__by__article.apply_async((value, ))
-    #     name_records: AsyncResult = get_products__by__name.apply_async((value, ))
-    #     code_records: AsyncResult = get_products__by__code.apply_async((value, ))
-    #     description_records: AsyncResult = get_products__by__description.apply_async((value, ))
-    #     brands_records: AsyncResult = get_products__by__brand__name.apply_async((value, ))
-    #     variants_records: AsyncResult = get_products__by__variants__code.apply_async((value, ))
-    #     article_results = article_records.get().get('data')
-    #     name_results = name_records.get().get('data')
-    #     code_results = code_records.get().get('data')
-    #     description_results = description_records.get().get('data')
-    #     brands_results = brands_records.get().get('data')
-    #     variants_results = variants_records.get().get('data')
-    #     characteristics_results = characteristics_records.get().get('data')
-    #     article_results.extend(name_results)
-    #     article_results.extend(code_results)
-    #     article_results.extend(description_results)
-    #     article_results.extend(brands_results)
-    #     article_results.extend(variants_results)
-    #     article_results.extend(characteristics_results)
-    #     product_ids = list(set(article_results))
-    #     combined_results = queryset.filter(id__in=product_ids)
-    #     return combined_results
+    search = filters.CharFilter(
+        method='search_filter',
+        label='search_filter',
+        help_text='Filter products by search. Sample of requests:'
+                  'api/products/?search=кроссовки'
+    )
+
+    def search_filter(self, queryset: QuerySet[Product], name: str, value: str) -> QuerySet[Product]:
+        """Полнотекстовый поиск. Без параметра ordering товары сортируются по релевантности."""
+        ordering = queryset.query.order_by
+        queryset = products__search(products=queryset, value=value)
+        if self.data.get('ordering'):
+            return queryset.order_by(*ordering)
+        return queryset
 
     def filter_by_ids(self, queryset: QuerySet[Product], name: str, value: str) -> QuerySet[Product]:
         return queryset.filter(id__in=value.split(','))
 
     def ordering_price(self, queryset: QuerySet[Product], name: str, value: str) -> QuerySet[Product]:
-        queryset = queryset.annotate(min_price=Min('variants__price'), max_price=Max('variants__price'))
+        """Сортировка по ценам, которые триггеры поддерживают в самом товаре."""
         if value.startswith('-'):
             return queryset.order_by('-min_price')
         return queryset.order_by('max_price')
 
     def tags_filter(self, queryset: QuerySet[Product], name: str, value: str) -> QuerySet[Product]:
-        return queryset.filter(tags__id__in=value.split(','))
+        return queryset.filter(id__in=TagProduct.objects.filter(tag_id__in=value.split(',')).values('product_id'))
 
     def label_filter(self, queryset: QuerySet[Product], name: str, value: str) -> QuerySet[Product]:
         return queryset.filter(label_id__in=value.split(','))
@@ -147,41 +125,52 @@ class ProductOrderingFilter(filters.FilterSet):
             self, queryset: QuerySet[Product], name: str, value: str
     ) -> QuerySet[Product]:
         values_to_list_decimal = list(map(lambda x: Decimal(x), value.split(',')))
-        return queryset.filter(price_for_filter__range=values_to_list_decimal)
+        return queryset.filter(effective_min_price__range=values_to_list_decimal)
 
     def characteristics_filter(
             self, queryset: QuerySet[Product], name: str, value: str
     ) -> QuerySet[Product]:
-        return queryset.filter(
-            Q(variants__characteristics__value__in=value.split(','))
-            & Q(Q(variants__stock__gt=0) | Q(variants__to_order=True))
-            & Q(Q(variants__is_active=True))
+        variants = Variant.objects.filter(
+            Q(characteristics__value__in=value.split(','))
+            & Q(Q(stock__gt=0) | Q(to_order=True))
+            & Q(is_active=True)
         )
+        return queryset.filter(id__in=variants.values('product_id'))
 
     def category_filter(
             self, queryset: QuerySet[Product], name: str, value: str
     ) -> QuerySet[Product]:
-        category = Category.objects.filter(id=value.split(',')[0], is_active=True).first()
+        """Товары категории и её потомков: диапазон lft/rght из дерева в памяти вместо выборки потомков."""
+        category = category_tree__get().active_node(category_id=value.split(',')[0])
         if category:
-            tree_categories_id = category.get_descendants(include_self=True).values_list('id', flat=True)
-            return queryset.filter(category__id__in=tree_categories_id)
+            product_ids = Product.category.through.objects.filter(
+                category__tree_id=category.tree_id,
+                category__lft__gte=category.lft,
+                category__rght__lte=category.rght,
+            ).values('product_id')
+            return queryset.filter(id__in=product_ids)
         return queryset.none()
 
     def filter_by_user_id(
             self, queryset: QuerySet[Product], name: str, value: str
     ) -> QuerySet[Product]:
-        return queryset.filter(user__id=value.split(',')[0])
+        return queryset.filter(
+            id__in=Favorite.objects.filter(user_id=value.split(',')[0]).values('product_id')
+        )
 
     def type_label_filter(
             self, queryset: QuerySet[Product], name: str, value: str
     ) -> QuerySet[Product]:
         if value == 'promotion':
-            return queryset.filter(variants__price__gt=0)
-        return queryset.filter(label__type_label=value.split(',')[0], variants__sale_price=0)
+            return queryset.filter(id__in=Variant.objects.filter(price__gt=0).values('product_id'))
+        return queryset.filter(
+            label__type_label=value.split(',')[0],
+            id__in=Variant.objects.filter(sale_price=0).values('product_id')
+        )
 
     def filter_products_with_discount(
             self, queryset: QuerySet[Product], name: str, value: str
     ) -> QuerySet[Product]:
         if value.split(',')[0] == "1":
-            return queryset.filter(variants__sale_price__gt=0)
+            return queryset.filter(id__in=Variant.objects.filter(sale_price__gt=0).values('product_id'))
         return queryset
@@ -1,18 +1,26 @@
 from decimal import Decimal
 
-from django.db.models import Avg, Case, Count, F, Max, Min, Q, Sum
+from django.conf import settings
+from django.db.models import (Avg, Case, Count, F, Manager, Max, Min, Q,
+                              QuerySet, Sum)
 from rest_framework import serializers
 from restdoctor.rest_framework.serializers import ModelSerializer
 
-from apps.market.enum import TypeLabel
+from apps.market.constants import ITEM_BASKET_MAX_QUANTITY
+from apps.market.enum import BasketMergePolicy, TypeLabel
 from apps.market.logic.interactors.basket_interactors import  check_another_variants
+from apps.market.logic.interactors.basket_totals import basket_totals__get
+from apps.market.logic.interactors.product_interactors import (
+    variant__is_available, variants__has_promotion, variants__price_label,
+    variants__price_variants)
+from apps.market.logic.selectors.product_selectors import (
+    get_promotion_label, products__prefetch_for_list)
 
 from apps.market.models import (Basket, Brand, Category, Characteristic,
                                 ItemBasket, Label, OrderState, Product,
                                 ProductCharacteristics, ProductImage, Tag,
                                 Variant, VariantCharacteristics)
 from apps.shipping_and_payment.models import PaymentVariant
-from config.settings import DOMAIN
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
@@ -48,6 +56,8 @@ class CategorySerializer(CategoryListSerializer):
     tree_cat = serializers.SerializerMethodField()
 
     def get_tree_cat(self, obj: Category) -> dict:
+        if hasattr(obj, "family_values"):
+            return obj.family_values
         return obj.get_family().values()
 
     def get_category_image(self, obj: Category) -> dict:
@@ -55,9 +65,31 @@ class CategorySerializer(CategoryListSerializer):
             return obj.category_image.url
 
     def get_children(self, obj: Category) -> dict:
+        if hasattr(obj, "children_values"):
+            return obj.children_values
         return obj.get_children().values()
 
 
+class CategoryTreeSerializer(serializers.ModelSerializer):
+    """
+    Вложенное дерево категорий. Дочерние категории берутся из кеша cache_tree_children, без запросов к базе.
+    """
+
+    class Meta:
+        model = Category
+        fields = ("id", "name", "level", "parent", "category_image", "children")
+
+    category_image = serializers.SerializerMethodField()
+    children = serializers.SerializerMethodField()
+
+    def get_category_image(self, obj: Category) -> str | None:
+        if obj.category_image:
+            return obj.category_image.url
+
+    def get_children(self, obj: Category) -> list[dict]:
+        return CategoryTreeSerializer(obj.get_children(), many=True).data
+
+
 class CharacteristicSerializer(serializers.ModelSerializer):
     class Meta:
         model = Characteristic
@@ -84,7 +116,9 @@ class VariantSerializer(serializers.ModelSerializer):
     def get_label(self, obj: Variant) -> dict:
         return LabelSerializer(obj.product.label).data
 
-    def get_preview(self, obj: Variant) -> str:
+    def get_preview(self, obj: Variant) -> dict | None:
+        if hasattr(obj.product, "preview_images"):
+            return next(({"miniature": image.miniature.name} for image in obj.product.preview_images), None)
         return obj.product.images.filter(priority=0).values("miniature").first()
 
 
@@ -97,6 +131,15 @@ class VariantRequestSerializer(serializers.ModelSerializer):
     quantity = serializers.IntegerField(allow_null=True)
 
 
+class VariantBulkItemSerializer(serializers.Serializer):
+    variant_id = serializers.CharField()
+    quantity = serializers.IntegerField(min_value=1, max_value=ITEM_BASKET_MAX_QUANTITY, default=1)
+
+
+class VariantBulkRequestSerializer(serializers.Serializer):
+    items = VariantBulkItemSerializer(many=True, allow_empty=False)
+
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
@@ -112,7 +155,7 @@ class LabelSerializer(serializers.ModelSerializer):
 class BrandSerializer(serializers.ModelSerializer):
     class Meta:
         model = Brand
-        fields = "__all__"
+        exclude = ("displayable_products_count",)
 
     image = serializers.SerializerMethodField()
 
@@ -134,6 +177,21 @@ class InternalCodeSerializer(serializers.Serializer):
     internal_id_list = serializers.ListField(child=serializers.IntegerField())
 
 
+class ProductListPrefetchSerializer(serializers.ListSerializer):
+    """
+    Перед сериализацией списка товаров подгружает связанные данные пачкой,
+    чтобы методы ProductListSerializer считали поля без запросов на каждый товар.
+    """
+
+    def to_representation(self, data: QuerySet[Product] | list[Product]) -> list[dict]:
+        products = list(data.all() if isinstance(data, (Manager, QuerySet)) else data)
+        products__prefetch_for_list(products=products)
+        promotion_label = get_promotion_label()
+        for product in products:
+            product.promotion_label = promotion_label
+        return super().to_representation(products)
+
+
 class ProductListSerializer(ModelSerializer):
     class Meta:
         model = Product
@@ -150,6 +208,7 @@ class ProductListSerializer(ModelSerializer):
             "updated_at",
             "variants"
         )
+        list_serializer_class = ProductListPrefetchSerializer
 
     price_variants = serializers.SerializerMethodField()
     image_preview = serializers.SerializerMethodField()
@@ -158,26 +217,46 @@ class ProductListSerializer(ModelSerializer):
     custom_item_title = serializers.SerializerMethodField()
     h1 = serializers.SerializerMethodField()
 
+    @staticmethod
+    def is_prefetched(obj: Product) -> bool:
+        return hasattr(obj, "title_characteristics")
+
     def get_custom_item_title(self, obj: Product) -> str | None:
+        if self.is_prefetched(obj):
+            return next(
+                (item.value for item in obj.title_characteristics if item.type.name.endswith("item_title")), None
+            )
         return obj.characteristics.filter(type__name__endswith='item_title').values_list('value', flat=True).first()
 
-    def get_h1(self, obj: Product) -> dict:
+    def get_h1(self, obj: Product) -> str | None:
+        if self.is_prefetched(obj):
+            return next((item.value for item in obj.title_characteristics if item.type.name == "h1"), None)
         return obj.characteristics.filter(type__name='h1').values_list('value', flat=True).first()
 
-    def get_label(self, obj: Product) -> dict:
+    def get_label(self, obj: Product) -> dict | None:
+        if self.is_prefetched(obj):
+            if variants__has_promotion(variants=obj.variants.all()):
+                return obj.promotion_label
+            return LabelSerializer(obj.label).data
         if obj.variants.filter(
                 Q(sale_price__isnull=True) | Q(sale_price__gt=0)
         ).exists():
             return Label.objects.filter(type_label=TypeLabel.PROMOTION).values().first()
         return LabelSerializer(obj.label).data
 
-    def get_price_variants(self, obj: Product) -> dict:
+    def get_price_variants(self, obj: Product) -> list[dict] | QuerySet:
+        if self.is_prefetched(obj):
+            return variants__price_variants(variants=obj.variants.all())
         return obj.variants.exclude(price=0).values("price", "sale_price")
 
-    def get_image_preview(self, obj: Product) -> dict:
+    def get_image_preview(self, obj: Product) -> dict | None:
+        if self.is_prefetched(obj):
+            return next(({"miniature": image.miniature.name} for image in obj.preview_images), None)
         return obj.images.filter(priority=0).filter().values("miniature").first()
 
-    def get_price_label(self, obj: Product) -> dict:
+    def get_price_label(self, obj: Product) -> dict | None:
+        if self.is_prefetched(obj):
+            return variants__price_label(variants=obj.variants.all())
         variants = obj.variants.filter(
             Q(is_active=True) & Q(price__gt=0) & Q(Q(quantity__gt=0) | Q(to_order=True))
         )
@@ -220,6 +299,24 @@ class ProductListSerializer(ModelSerializer):
                 }
 
 
+class ProductCardListSerializer(ModelSerializer):
+    """
+    Список товаров из предрасчитанных карточек ProductCard. Формат ответа совпадает с ProductListSerializer.
+    """
+
+    class Meta:
+        model = Product
+        fields = ProductListSerializer.Meta.fields
+
+    price_variants = serializers.ReadOnlyField(source="card.price_variants")
+    image_preview = serializers.ReadOnlyField(source="card.image_preview")
+    label = serializers.ReadOnlyField(source="card.label")
+    price_label = serializers.ReadOnlyField(source="card.price_label")
+    custom_item_title = serializers.ReadOnlyField(source="card.custom_item_title")
+    h1 = serializers.ReadOnlyField(source="card.h1")
+    variants = serializers.ReadOnlyField(source="card.variants")
+
+
 class RecommendetProductSerializer(ProductListSerializer):
     pass
 
@@ -265,6 +362,9 @@ class ProductSerializer(ProductListSerializer):
     crossale = serializers.SerializerMethodField()
 
     def get_crossale(self, obj: Product) -> list[dict]:
+        cross_sale = getattr(obj, "cross_sale", None)
+        if cross_sale is not None:
+            return cross_sale.items
         crossale = obj.crossale.annotate(
             price_variants=Sum("variants__price"),
             quantity_variants=Sum("variants__quantity"),
@@ -278,6 +378,9 @@ class ProductSerializer(ProductListSerializer):
         return RecommendetProductSerializer(crossale, many=True).data
 
     def get_variants(self, obj: Product) -> list:
+        if self.is_prefetched(obj):
+            variants = [variant for variant in obj.variants.all() if variant__is_available(variant=variant)]
+            return VariantSerializer(variants, many=True).data
         return VariantSerializer(
             obj.variants.filter(
                 Q(
@@ -324,15 +427,28 @@ class ItemBasketSerializer(serializers.ModelSerializer):
 
     def get_has_another_variant(self, obj: ItemBasket) -> bool:
         if (not obj.variant_product.quantity) and (not obj.variant_product.to_order):
+            another_variant_available = getattr(obj, "another_variant_available", None)
+            if another_variant_available is not None:
+                return another_variant_available
             return check_another_variants(item=obj)
         return True
 
 
-class UnloggedItemBasketRequestSerializer(serializers.Serializer):
-    class Meta:
-        fields = ("variant_basket",)
+class UnloggedBasketItemSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    quantity = serializers.IntegerField(min_value=1, max_value=ITEM_BASKET_MAX_QUANTITY)
 
-    variant_basket = serializers.JSONField()
+
+class UnloggedBasketRequestSerializer(serializers.Serializer):
+    variant_basket = UnloggedBasketItemSerializer(many=True)
+
+
+class UnloggedBasketMergeRequestSerializer(UnloggedBasketRequestSerializer):
+    merge_policy = serializers.ChoiceField(
+        choices=BasketMergePolicy.choices,
+        required=False,
+        help_text="Как сложить с количеством в корзине пользователя, по умолчанию BASKET_MERGE_POLICY",
+    )
 
 
 class UnloggedItemBasketResponseSerializer(serializers.ModelSerializer):
@@ -389,6 +505,15 @@ class BasketUpdateSerializer(serializers.ModelSerializer):
         )
 
 
+def basket__totals(*, basket: Basket) -> dict:
+    """
+    Итоги корзины считаются один раз на объект: их читают несколько полей сериализатора.
+    """
+    if not hasattr(basket, "_totals"):
+        basket._totals = basket_totals__get(basket=basket)
+    return basket._totals
+
+
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Basket
@@ -442,17 +567,11 @@ class OrderSerializer(serializers.ModelSerializer):
     count_variants = serializers.SerializerMethodField()
     item_baskets = ItemBasketSerializer(many=True)
 
-    def get_count_variants(self, obj: Basket) -> dict:
-        return obj.item_baskets.count()
+    def get_count_variants(self, obj: Basket) -> int:
+        return basket__totals(basket=obj)["count_variants"]
 
     def get_expenses(self, obj: Basket) -> dict:
-        data_cost = obj.item_baskets.get_cost_info()
-        return data_cost.aggregate(
-            basket_without_discount=Sum("without_discount"),
-            basket_discount=Sum("item_total_discount"),
-            basket_with_discount=F("basket_without_discount") - F("basket_discount"),
-            basket_final_cost=F("basket_with_discount")
-        )
+        return basket__totals(basket=obj)["expenses"]
 
 
 class BasketSerializer(serializers.ModelSerializer):
@@ -506,7 +625,7 @@ class BasketSerializer(serializers.ModelSerializer):
     available_payment_method = serializers.SerializerMethodField(read_only=True)
     expenses = serializers.SerializerMethodField()
     count_variants = serializers.SerializerMethodField()
-    settlement_data_cost = serializers
+    settlement_data_cost = serializers.SerializerMethodField()
     item_baskets = ItemBasketSerializer(many=True)
 
     def get_payment_method(self, obj: Basket) -> dict:
@@ -524,29 +643,18 @@ class BasketSerializer(serializers.ModelSerializer):
             return obj.order_date.strftime("%d.%m.%Y %H:%M:%S")
 
     def get_available_payment_method(self, obj: Basket) -> list:
-        return PaymentVariant.objects.values()
+        if "available_payment_method" not in self.context:
+            self.context["available_payment_method"] = list(PaymentVariant.objects.values())
+        return self.context["available_payment_method"]
 
-    def get_count_variants(self, obj: Basket) -> dict:
-        return obj.item_baskets.count()
+    def get_count_variants(self, obj: Basket) -> int:
+        return basket__totals(basket=obj)["count_variants"]
 
     def get_expenses(self, obj: Basket) -> dict:
-        data_cost = obj.item_baskets.get_cost_info()
-        return data_cost.aggregate(
-            basket_without_discount=Sum("without_discount"),
-            basket_discount=Sum("item_total_discount"),
-            basket_with_discount=F("basket_without_discount") - F("basket_discount"),
-            basket_final_cost=F("basket_with_discount")
-        )
+        return basket__totals(basket=obj)["expenses"]
 
     def get_settlement_data_cost(self, obj: Basket) -> dict:
-        data_cost = obj.item_baskets.get_settlement_cost_info()
-        data = data_cost.aggregate(
-            basket_full_cost=Sum("settlement_total_price"),
-            basket_discount=Sum("settlement_discount"),
-            basket_with_discount=F("basket_full_cost") - F("basket_discount"),
-            basket_final_cost=F("basket_with_discount")
-        )
-        return data
+        return basket__totals(basket=obj)["settlement_data_cost"]
 
 
 class SuccessfulPaymentSerializer(serializers.Serializer):
@@ -623,7 +731,7 @@ class YandexOfferSerializer(serializers.ModelSerializer):
         return obj.article
 
     def get_url(self, obj: Product) -> str:
-        return f'{DOMAIN}/product/{obj.id}'
+        return f'{settings.DOMAIN}/product/{obj.id}'
 
     def get_price(self, obj: Product) -> str:
         if obj.variants.all():
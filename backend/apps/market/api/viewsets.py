@@ -4,10 +4,12 @@ import uuid
 from typing import Union
 
 import pytz
-from django.db.models import (DecimalField, ExpressionWrapper, F, Min, Q,
-                              QuerySet, Sum, When)
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Q, QuerySet, When
 from django.db.models.functions import Least
 from django.http import HttpResponse
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
@@ -32,51 +34,69 @@ from apps.market.api.serializers import (BasketSerializer,
                                          InternalCodeSerializer,
                                          ItemBasketSerializer, OrderSerializer,
                                          PaymentUrlsSerializer,
+                                         ProductCardListSerializer,
                                          ProductListSerializer,
                                          ProductSerializer,
                                          SuccessfulPaymentSerializer,
                                          TagSerializer,
                                          TokenInStringSerializer,
-                                         UnloggedItemBasketRequestSerializer,
+                                         UnloggedBasketMergeRequestSerializer,
+                                         UnloggedBasketRequestSerializer,
                                          UnloggedItemBasketResponseSerializer,
+                                         VariantBulkRequestSerializer,
                                          VariantRequestSerializer,
                                          VariantSerializer)
-from apps.market.constants import TINKOFF_CONFIRM_PAYMENT_RESPONSE
+from apps.market.constants import (BASKET_PREFETCH_ACTIONS,
+                                   SUGGEST_QUERY_MAX_LENGTH,
+                                   TINKOFF_CONFIRM_PAYMENT_RESPONSE)
 from apps.market.enum import BasketStatus, PaymentMethod
 from apps.market.logic.facades.basket_facades import  check_order_parameters
+from apps.market.logic.facades.category_facades import category_tree__payload
+from apps.market.logic.facades.product_facades import (
+    product_detail__get, product_facet_counts__get, product_filter_params__get)
 from apps.market.logic.facades.tinkoff import basket_payment_url
-from apps.market.logic.interactors.basket_interactors import checking__products__to_order, \
-    fixed__item_basket__when_accept
+from apps.market.logic.interactors.basket_interactors import basket__finalize_order, \
+    checking__products__to_order, item_baskets__upsert
 from apps.market.logic.interactors.cdek import create_cdek_order, get_cdek_info
+from apps.market.logic.interactors.stock_reservation import basket__reserve_stock
+from apps.market.logic.interactors.suggest_index import suggestion_index
 from apps.market.logic.interactors.tinkoff import basket_payment_status__change_to_paid
-
-from apps.market.logic.selectors.product_selectors import (
-    get_brants__from_products, get_characteristics__from_variants,
-    get_price_ranges__from_variants, get_variants__from_products)
-from apps.market.models import (Basket, Brand, Category, ItemBasket, Product,
-                                Tag, Variant)
+from apps.market.logic.interactors.variant_price_snapshot import variant_price_snapshot__get
+from apps.market.logic.selectors.basket_viewset_selectors import baskets__prefetch_items
+from apps.market.models import (Basket, Brand, Category, Characteristic,
+                                CrossSaleProduct, Favorite, ItemBasket, Label,
+                                Product, ProductCharacteristics, ProductImage,
+                                Tag, TagProduct, Variant,
+                                VariantCharacteristics)
 from apps.market.tasks import payment_reaction
 
 from apps.user.models import User
+from utils.abstractions.pagination import KeysetPageNumberPagination
+from utils.abstractions.response_cache import (ConditionalGetMixin,
+                                               ResponseCacheMixin)
 from utils.exeption import BusinessLogicException
 
 logger = get_logger(__name__)
 cdek_logger = logging.getLogger("cdek")
 
 
-class BrandViewSet(ReadOnlyModelViewSet):
+class BrandViewSet(ConditionalGetMixin, ResponseCacheMixin, ReadOnlyModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
 
     def get_queryset(self):
-        product_ids = Product.objects.get_products_on_display().values_list("id", flat=True)
+        """
+        Бренды с изображением и товарами на витрине. Число товаров поддерживается при пересчёте карточек:
+        после деплоя его заполняет миграция 0012_productcard_backfill, дальше - сигналы
+        и почасовой rebuild__product_cards.
+        """
         queryset = super().get_queryset().filter(
-            image__isnull=False, products__id__in=product_ids
-        ).distinct('id').order_by("id")
+            image__isnull=False, displayable_products_count__gt=0
+        ).order_by("id")
         return queryset
 
 
-class CategoryViewSet(ReadOnlyModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, ResponseCacheMixin, ReadOnlyModelViewSet):
     """
     Вьюсет отдаёт сплошной список активных категорий. При вызове определённой категории появляется
     дополнительное поле children, которое содержит список дочерних категорий.
@@ -92,6 +112,8 @@ class CategoryViewSet(ReadOnlyModelViewSet):
     }
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ("level", )
+    response_cache_actions = ("list", "retrieve", "get_top_level")
+    conditional_get_actions = ("list", "retrieve", "get_top_level")
 
     @action(methods=["get"], detail=False)
     def get_top_level(self, request: Request) -> Response:
@@ -102,8 +124,20 @@ class CategoryViewSet(ReadOnlyModelViewSet):
         serializer = self.get_response_serializer_class()(queryset, many=True)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
+    @action(methods=["get"], detail=False)
+    def tree(self, request: Request) -> Response:
+        """
+        Метод возвращает вложенное дерево активных категорий для меню. Ответ отдаётся с ETag,
+        при совпадении If-None-Match возвращается 304 без тела.
+        """
+        data, etag = category_tree__payload()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data=data, status=status.HTTP_200_OK, headers=headers)
+
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(ResponseCacheMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
@@ -114,9 +148,10 @@ class FavoriteProductsViewSet(ReadOnlyModelViewSet):
     filterset_class = ProductOrderingFilter
     serializer_class = ProductListSerializer
     permission_classes = (AllowAny,)
+    pagination_class = KeysetPageNumberPagination
 
 
-class ProductViewSet(ReadOnlyModelViewSet):
+class ProductViewSet(ConditionalGetMixin, ReadOnlyModelViewSet):
     """
     Вьюсет имеет следующие фильтры: tags, label, category, brand.
     Пример фильтра - /api/products/?label=4. В качестве значения подставляем id объекта, по которому фильтруем.
@@ -127,10 +162,11 @@ class ProductViewSet(ReadOnlyModelViewSet):
     queryset = Product.objects.get_products_on_display()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = ProductOrderingFilter
+    pagination_class = KeysetPageNumberPagination
     serializer_class_map = {
         "default": ProductSerializer,
         "list": {
-            "response": ProductListSerializer,
+            "response": ProductCardListSerializer,
         },
         "get_products__with__discount": {
             "response": ProductListSerializer
@@ -144,6 +180,24 @@ class ProductViewSet(ReadOnlyModelViewSet):
         }
     }
     filterset_fields = ("tags",)
+    conditional_get_actions = ("list", "retrieve", "get_filter_params", "get_facet_counts")
+    # Favorite - фильтр user списка и параметров фильтров.
+    response_cache_models = (
+        Variant, VariantCharacteristics, ProductImage, ProductCharacteristics, Characteristic, Product.category.through,
+        Category, Brand, Label, Tag, TagProduct, CrossSaleProduct, Favorite,
+    )
+
+    def get_queryset(self) -> QuerySet[Product]:
+        if self.action in ("list", "get_filter_params", "get_facet_counts"):
+            return Product.objects.get_product_cards()
+        return super().get_queryset()
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Карточка товара собирается фиксированным числом запросов и кешируется до изменения товара.
+        """
+        data = product_detail__get(product_id=kwargs[self.lookup_field], get_product=self.get_object)
+        return Response(data=data, status=status.HTTP_200_OK)
 
     @action(methods=('get',), detail=True)
     def favorites(self, request: Request, pk: str = None) -> Response:
@@ -153,16 +207,30 @@ class ProductViewSet(ReadOnlyModelViewSet):
 
     @action(methods=["get"], detail=False)
     def get_filter_params(self, request: Request) -> Response:
-        products = self.filter_queryset(self.get_queryset())
-        queryset_variants = get_variants__from_products(products=products)
-        brands = get_brants__from_products(products=products)
-        price_range = get_price_ranges__from_variants(variants=queryset_variants)
-        variant_characteristics = get_characteristics__from_variants(variants=queryset_variants)
-        data = {
-            "characteristics": variant_characteristics,
-            "price_range": price_range,
-            "brands": brands,
-        }
+        data = product_filter_params__get(
+            products=self.filter_queryset(self.get_queryset()),
+            query_params=request.query_params,
+        )
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    @action(methods=["get"], detail=False)
+    def suggest(self, request: Request) -> Response:
+        """
+        Подсказки для поисковой строки: /api/products/suggest/?q=кросс. Ответ строится по индексу в памяти процесса.
+        """
+        query = request.query_params.get("q", "")[:SUGGEST_QUERY_MAX_LENGTH]
+        return Response(data=suggestion_index.suggest(query=query), status=status.HTTP_200_OK)
+
+    @action(methods=["get"], detail=False)
+    def get_facet_counts(self, request: Request) -> Response:
+        """
+        Количество товаров по брендам, размерам и ценовым диапазонам с учётом выбранных фильтров.
+        Для каждого фасета не учитывается его собственный фильтр.
+        """
+        data = product_facet_counts__get(
+            products=self.filter_queryset(self.get_queryset()),
+            query_params=request.query_params,
+        )
         return Response(data=data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["get"])
@@ -232,6 +300,7 @@ class VariantViewSet(RetrieveModelMixin, UpdateModelMixin, GenericViewSet):
             "response": VariantSerializer,
         },
         "add_to_basket": {"request": VariantRequestSerializer},
+        "add_many_to_basket": {"request": VariantBulkRequestSerializer},
     }
 
     @action(methods=["patch"], detail=False, permission_classes=[IsAuthenticated])
@@ -260,6 +329,26 @@ class VariantViewSet(RetrieveModelMixin, UpdateModelMixin, GenericViewSet):
             data={"message": "Товар добавлен в корзину"}, status=status.HTTP_200_OK
         )
 
+    @action(methods=["post"], detail=False, permission_classes=[IsAuthenticated])
+    def add_many_to_basket(self, request: Request) -> Response:
+        """
+        Для добавления нескольких товаров: ключ "items" - список {"variant_id": "id варианта", "quantity": 1}.
+        Количество ограничивается остатком, варианты без остатка возвращаются в "skipped".
+        """
+        serializer = self.get_request_serializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        basket, _ = request.user.baskets.get_or_create(status=BasketStatus.IS_ACTIVE)
+        quantities = {item["variant_id"]: item["quantity"] for item in serializer.validated_data["items"]}
+        added = item_baskets__upsert(basket=basket, quantities=quantities)
+        return Response(
+            data={
+                "message": "Товары добавлены в корзину",
+                "items": [{"variant_id": variant_id, "quantity": quantity} for variant_id, quantity in added.items()],
+                "skipped": [variant_id for variant_id in quantities if variant_id not in added],
+            },
+            status=status.HTTP_200_OK,
+        )
+
 
 class ItemBasketViewSet(ModelViewSet):
     queryset = ItemBasket.objects.all()
@@ -267,11 +356,8 @@ class ItemBasketViewSet(ModelViewSet):
     serializer_class_map = {
         "default": ItemBasketSerializer,
         "update": UnloggedItemBasketResponseSerializer,
-        "get_unlogged_basket_items": {
-            "request": UnloggedItemBasketRequestSerializer,
-            "response": UnloggedItemBasketResponseSerializer,
-        },
-        "adds_from_unlogged_basket": {"request": UnloggedItemBasketRequestSerializer},
+        "get_unlogged_basket_items": {"request": UnloggedBasketRequestSerializer},
+        "adds_from_unlogged_basket": {"request": UnloggedBasketMergeRequestSerializer},
     }
 
     def perform_update(self, serializer: ItemBasketSerializer) -> None:
@@ -290,97 +376,36 @@ class ItemBasketViewSet(ModelViewSet):
         """
         Метод по ключу 'variant_basket' принимает json вида [{'id': <id_варианта>, 'quantity': <количество варианта>},].
         Возвращает данные по выбранным вариантам, их количеству, итоговой стоимости корзины, скидке.
+        Считается по снимку цен и остатков в памяти процесса, без запросов к базе.
         """
         serializer = self.get_request_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-
-        variants_data = sorted(
-            serializer.validated_data.get("variant_basket"), key=lambda x: x["id"]
-        )
-        variant_ids = [variant["id"] for variant in variants_data]
-        variant_quantity = [variant["quantity"] for variant in variants_data]
-        variants: QuerySet[Variant] = (
-            Variant.objects.get_variant_discount()
-            .filter(id__in=variant_ids)
-            .order_by("id")
-        )
-        variants_expenses = [
-            {
-                "item_cost": variant.price * quantity,
-                "item_discount": variant.variant_discount * quantity,
-            }
-            for variant, quantity in list(zip(variants, variant_quantity))
-        ]
-        basket_total_cost = sum(map(lambda x: x["item_cost"], variants_expenses))
-        basket_discount = sum(map(lambda x: x["item_discount"], variants_expenses))
-        basket_with_discount = basket_total_cost - basket_discount
-        cost_info = {
-            "basket_total_cost": basket_total_cost,
-            "basket_discount": basket_discount,
-            "basket_with_discount": basket_with_discount,
-        }
-        items_data = [
-            {"variant_product": variant, "quantity": quantity}
-            for variant, quantity in zip(variants, variant_quantity)
-        ]
-        for item in items_data:
-            if (
-                    item["variant_product"].quantity < item["quantity"]
-                    and not item["variant_product"].to_order
-            ):
-                item["quantity"] = item["variant_product"]
-        serializer = self.get_response_serializer(items_data, many=True)
-        unlogged_basket_items_data = serializer.data
-        data = {"cost_info": cost_info, "basket_elements": unlogged_basket_items_data}
+        data = variant_price_snapshot__get().price_basket(items=serializer.validated_data["variant_basket"])
         return Response(data=data, status=status.HTTP_200_OK)
 
     @action(methods=("post",), detail=False, permission_classes=[IsAuthenticated])
     def adds_from_unlogged_basket(self, request: Request) -> Response:
-        serializer = self.get_request_serializer(data=request.data, many=False)
-        serializer.is_valid()
-
-        input_data = serializer.validated_data.get("variant_basket")
-        variant_ids = list(map(lambda item: item["id"], input_data))
-
+        """
+        Переносит гостевую корзину в корзину пользователя одним запросом.
+        Ключ 'variant_basket' - [{'id': <id_варианта>, 'quantity': <количество варианта>},],
+        необязательный 'merge_policy' - sum, max или replace.
+        """
+        serializer = self.get_request_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         basket, _ = Basket.objects.get_or_create(
             user=self.request.user, status=BasketStatus.IS_ACTIVE
         )
-        objs_matching_with_input_data = basket.item_baskets.filter(
-            variant_product__id__in=variant_ids
-        ).order_by("variant_product__id")
-        matching_input_data: list[dict] = list(
-            filter(
-                lambda item: item["id"] in objs_matching_with_input_data.values_list(
-                    "variant_product__id", flat=True
-                ),
-                input_data,
-            )
-        )
-        sorted_matched_input_data = list(
-            sorted(matching_input_data, key=lambda item: item["id"])
+        quantities = {item["id"]: item["quantity"] for item in serializer.validated_data["variant_basket"]}
+        added = item_baskets__upsert(
+            basket=basket,
+            quantities=quantities,
+            policy=serializer.validated_data.get("merge_policy", settings.BASKET_MERGE_POLICY),
         )
-        objs = [
-            ItemBasket(id=item.id, quantity=sorted_matched_input_data[num]["quantity"])
-            for num, item in enumerate(objs_matching_with_input_data)
-        ]
-        objs_matching_with_input_data.bulk_update(objs=objs, fields=("quantity",))
-        mismatched_input_data = [
-            elem for elem in input_data if elem not in matching_input_data
-        ]
-        try:
-            created_objs = [
-                ItemBasket(
-                    quantity=elem["quantity"],
-                    variant_product_id=elem["id"],
-                    basket=basket,
-                )
-                for elem in mismatched_input_data
-            ]
-            ItemBasket.objects.bulk_create(objs=created_objs, unique_fields=("id",))
-        except KeyError:
-            raise BusinessLogicException("В теле запроса переданы неверные ключи ")
         return Response(
-            data={"message": "Товары добавлены в корзину пользователя"},
+            data={
+                "message": "Товары добавлены в корзину пользователя",
+                "skipped": [variant_id for variant_id in quantities if variant_id not in added],
+            },
             status=status.HTTP_201_CREATED,
         )
 
@@ -405,6 +430,12 @@ class BasketViewSet(ModelViewSet):
         },
     }
 
+    def get_queryset(self) -> QuerySet[Basket]:
+        # accept меняет позиции до ответа, prefetch для него отдал бы устаревшие данные.
+        if self.action in BASKET_PREFETCH_ACTIONS:
+            return baskets__prefetch_items(qs=super().get_queryset())
+        return super().get_queryset()
+
     def get_collection(
             self, request_serializer: BaseSerializer
     ) -> Union[list, QuerySet]:
@@ -455,25 +486,12 @@ class BasketViewSet(ModelViewSet):
     @action(methods=["post"], detail=True)
     def accept(self, request: Request, pk: int = None) -> Response:
         basket: Basket = self.get_object()
-        item_baskets = basket.item_baskets.select_related()
-        enough_products_after_revise = checking__products__to_order(basket=basket)
-        fixed__item_basket__when_accept(basket=basket, item_baskets=item_baskets)
-
-        basket_cost_data = basket.item_baskets.aggregate(
-            without_discount=Sum("item_total_cost"),
-            discount=Sum("item_discount"),
-            total_cost=ExpressionWrapper(
-                F("without_discount") - F("discount"),
-                output_field=DecimalField(),
-            ),
-        )
-        basket.total_cost = basket_cost_data["total_cost"]
-        basket.discount = basket_cost_data["discount"]
-        basket.order_date = datetime.datetime.now(pytz.timezone("Europe/Moscow"))
-
         check_order_parameters(basket=basket)
-        basket.status = BasketStatus.COMPLETED
-        basket.save()
+        with transaction.atomic():
+            basket__reserve_stock(basket=basket)
+            basket__finalize_order(
+                basket=basket, order_date=datetime.datetime.now(pytz.timezone("Europe/Moscow"))
+            )
         logger.info(f"total_cost - {basket.total_cost}")
         serializer = self.get_response_serializer(instance=basket)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
@@ -504,14 +522,18 @@ class OrderViewSet(ModelViewSet):
     queryset = Basket.objects.exclude(status=BasketStatus.IS_ACTIVE)
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPageNumberPagination
 
     def get_queryset(self) -> QuerySet[Basket]:
-        return (
+        queryset = (
             super()
             .get_queryset()
             .filter(user=self.request.user)
             .order_by("-order_date")
         )
+        if self.action in BASKET_PREFETCH_ACTIONS:
+            return baskets__prefetch_items(qs=queryset)
+        return queryset
 
     @action(methods=("get",), detail=True)
     def get_cdek_order_info(self, request: Request, pk: int = None) -> Response:
@@ -5,3 +5,6 @@ class MarketConfig(AppConfig):
 	default_auto_field = 'django.db.models.BigAutoField'
 	name = 'apps.market'
 	verbose_name = 'Магазин'
+
+	def ready(self) -> None:
+		from apps.market import signals  # noqa: F401
@@ -0,0 +1,144 @@
+import random
+from decimal import Decimal
+
+from apps.market.dto.benchmark import CatalogSizeDto, SyntheticCatalogDto
+from apps.market.logic.facades.product_facades import filter_params__invalidate
+from apps.market.logic.interactors.category_tree import \
+    category_tree__invalidate
+from apps.market.logic.interactors.product_card import product_cards__rebuild
+from apps.market.logic.interactors.product_search import \
+    product_search_vectors__refresh
+from apps.market.logic.interactors.product_visibility import \
+    products__refresh_visibility
+from apps.market.models import (Basket, Brand, Category, Characteristic,
+                                Product, ProductCharacteristics, ProductImage,
+                                Variant, VariantCharacteristics)
+from apps.user.models import User
+
+BENCHMARK_BRANDS_COUNT = 10
+BENCHMARK_SIZES = ("XS", "S", "M", "L", "XL", "XXL")
+
+
+def catalog__create_categories(*, rng: random.Random, prefix: str, count: int) -> list[Category]:
+    """
+    Дерево категорий: треть корней, остальные вешаются на случайную из уже созданных.
+    Категории создаются по одной, чтобы MPTT расставил lft и rght.
+    """
+    categories: list[Category] = []
+    for index in range(count):
+        parent = rng.choice(categories) if categories and index >= max(1, count // 3) else None
+        categories.append(Category.objects.create(name=f"{prefix}category-{index}", is_active=True, parent=parent))
+    return categories
+
+
+def catalog__generate(*, size: CatalogSizeDto, seed: int) -> SyntheticCatalogDto:
+    """
+    Синтетический каталог заданного размера. Одинаковый seed даёт одинаковые данные.
+    Строки создаются bulk_create без сигналов, производные данные (флаг витрины, карточки, поисковые векторы)
+    пересчитываются явно.
+    """
+    rng = random.Random(seed)
+    prefix = f"bench-{seed}-"
+    categories = catalog__create_categories(rng=rng, prefix=prefix, count=size.categories)
+    brands = Brand.objects.bulk_create(
+        Brand(id=f"{prefix}brand-{index}", name=f"Brand {index}", image="market/brands/benchmark.png")
+        for index in range(BENCHMARK_BRANDS_COUNT)
+    )
+    types = Characteristic.objects.bulk_create(
+        [Characteristic(id=f"{prefix}h1", name="h1")] + [
+            Characteristic(id=f"{prefix}characteristic-{index}", name=f"characteristic {index}")
+            for index in range(size.characteristics)
+        ]
+    )
+    products = Product.objects.bulk_create(
+        Product(
+            id=f"{prefix}product-{index}",
+            name=f"Product {index} {rng.choice(BENCHMARK_SIZES)}",
+            code=f"{prefix}code-{index}",
+            article=f"ART-{seed}-{index}",
+            description=f"Synthetic product {index}",
+            weight=Decimal("0.50"),
+            brand=rng.choice(brands),
+        )
+        for index in range(size.products)
+    )
+    Product.category.through.objects.bulk_create(
+        Product.category.through(product_id=product.id, category_id=category.id)
+        for product in products
+        for category in rng.sample(categories, k=min(2, len(categories)))
+    )
+    variants = Variant.objects.bulk_create(
+        Variant(
+            id=f"{product.id}-variant-{index}",
+            product=product,
+            name=f"{product.name} {BENCHMARK_SIZES[index % len(BENCHMARK_SIZES)]}",
+            code=f"{product.code}-{index}",
+            price=Decimal(rng.randrange(500, 20000)),
+            sale_price=Decimal(rng.randrange(100, 500)) if rng.random() < 0.25 else None,
+            quantity=Decimal(rng.randrange(0, 20)),
+            to_order=rng.random() < 0.1,
+            is_active=True,
+            archived=False,
+        )
+        for product in products
+        for index in range(size.variants)
+    )
+    ProductCharacteristics.objects.bulk_create(
+        ProductCharacteristics(product=product, type=characteristic_type, value=f"{characteristic_type.name} value")
+        for product in products
+        for characteristic_type in types
+    )
+    VariantCharacteristics.objects.bulk_create(
+        VariantCharacteristics(
+            variant=variant, type=characteristic_type, value=BENCHMARK_SIZES[index % len(BENCHMARK_SIZES)]
+        )
+        for index, variant in enumerate(variants)
+        for characteristic_type in types[1:]
+    )
+    ProductImage.objects.bulk_create(
+        ProductImage(
+            product=product,
+            image=f"market/products/{product.id}-{index}.jpg",
+            miniature=f"market/products/{product.id}-{index}-mini.jpg",
+            priority=index,
+        )
+        for product in products
+        for index in range(size.images)
+    )
+    user = User.objects.create(username=f"7900{rng.randrange(1000000, 9999999)}")
+
+    product_ids = [product.id for product in products]
+    products__refresh_visibility(product_ids=product_ids)
+    product_search_vectors__refresh(product_ids=product_ids)
+    product_cards__rebuild()
+    category_tree__invalidate()
+    filter_params__invalidate()
+    return SyntheticCatalogDto(
+        id_prefix=prefix,
+        product_ids=product_ids,
+        variant_ids=[variant.id for variant in variants],
+        category_ids=[category.id for category in categories],
+        user_id=user.id,
+    )
+
+
+def catalog__cleanup(*, catalog: SyntheticCatalogDto) -> None:
+    """
+    Удаляет синтетический каталог и покупателей, чьи корзины ссылаются на его варианты.
+    Корзины удаляются первыми: позиции корзин ссылаются на варианты без каскада.
+    """
+    user_ids = {catalog.user_id} | set(
+        Basket.objects.filter(item_baskets__variant_product_id__in=catalog.variant_ids).values_list(
+            "user_id", flat=True
+        )
+    )
+    Basket.objects.filter(user_id__in=user_ids).delete()
+    User.objects.filter(id__in=user_ids).delete()
+    Product.objects.filter(id__in=catalog.product_ids).delete()
+    # Родитель категории защищён от удаления, поэтому сначала удаляются самые глубокие категории.
+    for category in Category.objects.filter(id__in=catalog.category_ids).order_by("-level"):
+        category.delete()
+    Brand.objects.filter(id__startswith=catalog.id_prefix).delete()
+    Characteristic.objects.filter(id__startswith=catalog.id_prefix).delete()
+    category_tree__invalidate()
+    filter_params__invalidate()
@@ -0,0 +1,237 @@
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+import requests
+from django.db import connection
+from django.db.models import Q
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.market.benchmark.runner import percentile
+from apps.market.dto.benchmark import (FunnelSetupDto, LockWaitsDto,
+                                       StepResultDto)
+from apps.market.enum import PaymentMethod
+from apps.market.models import Category, Variant
+from apps.user.models import User
+from utils.query_budget import QUERY_FINGERPRINT_MAX_LENGTH, query__fingerprint
+
+FUNNEL_STEPS = (
+    "browse",
+    "filter",
+    "product_detail",
+    "add_to_basket",
+    "basket",
+    "basket_update",
+    "accept",
+    "send_payment_url",
+)
+FUNNEL_USERNAME_PREFIX = "7999"
+FUNNEL_CUSTOMER = {
+    "customer_name": "Нагрузка",
+    "customer_surname": "Тестовая",
+    "customer_email": "load@example.com",
+    "customer_phone": "79990000000",
+    "country": "Россия",
+    "city": "Москва",
+    "payment_method": PaymentMethod.ONLINE,
+}
+FUNNEL_LOCK_QUERIES_LIMIT = 10
+LOCK_WAITS_SQL = (
+    "SELECT query FROM pg_stat_activity "
+    "WHERE datname = current_database() AND wait_event_type = 'Lock' AND pid <> pg_backend_pid()"
+)
+DEADLOCKS_SQL = "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+
+
+def checkout_funnel__prepare(*, users: int, hot_variants: int | None, seed: int) -> FunnelSetupDto:
+    """
+    Пользователи сценария и пул вариантов для покупки. Пользователи переиспользуются между прогонами,
+    токены выпускаются напрямую, чтобы сценарий не упирался в SMS-авторизацию.
+    hot_variants сужает пул до нескольких вариантов, чтобы все покупатели конкурировали за одни остатки.
+    """
+    rng = random.Random(seed)
+    tokens = []
+    for index in range(users):
+        user, _ = User.objects.get_or_create(username=f"{FUNNEL_USERNAME_PREFIX}{index:07d}")
+        tokens.append(str(RefreshToken.for_user(user).access_token))
+    items = list(
+        Variant.objects.filter(product__is_displayable=True, is_active=True, archived=False, price__gt=0)
+        .filter(Q(quantity__gt=0) | Q(to_order=True))
+        .order_by("id")
+        .values_list("product_id", "id")
+    )
+    rng.shuffle(items)
+    return FunnelSetupDto(
+        tokens=tokens,
+        items=items[:hot_variants] if hot_variants else items,
+        category_ids=list(Category.objects.filter(is_active=True).values_list("id", flat=True)),
+    )
+
+
+def basket__id_from_payload(*, payload: Any) -> int | None:
+    if isinstance(payload, dict):
+        payload = payload.get("data", payload.get("results", []))
+    return payload[0]["id"] if payload else None
+
+
+class FunnelUser:
+    """
+    Виртуальный покупатель: в цикле проходит воронку от каталога до ссылки на оплату.
+    Шаги корзины зависят друг от друга, поэтому ошибка на них прерывает текущий проход.
+    """
+
+    def __init__(
+            self, *, base_url: str, token: str, setup: FunnelSetupDto, seed: int, think_ms: int, timeout: float
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.setup = setup
+        self.rng = random.Random(seed)
+        self.think_ms = think_ms
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+        self.records: list[tuple[str, float, int]] = []
+
+    def call(self, step: str, method: str, path: str, **kwargs: Any) -> requests.Response | None:
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.records.append((step, (time.perf_counter() - started) * 1000, 0))
+            return None
+        self.records.append((step, (time.perf_counter() - started) * 1000, response.status_code))
+        if self.think_ms:
+            time.sleep(self.rng.uniform(0, self.think_ms) / 1000)
+        return response if response.status_code < 400 else None
+
+    def iterate(self) -> None:
+        product_id, variant_id = self.rng.choice(self.setup.items)
+        self.call("browse", "GET", "/api/products/", params={"per_page": 20})
+        if self.setup.category_ids:
+            params = {"per_page": 20, "category": self.rng.choice(self.setup.category_ids)}
+            self.call("filter", "GET", "/api/products/", params=params)
+        self.call("product_detail", "GET", f"/api/products/{product_id}/")
+        data = {"variant_id": variant_id, "quantity": self.rng.randint(1, 2)}
+        if self.call("add_to_basket", "PATCH", "/api/variants/add_to_basket/", json=data) is None:
+            return
+        response = self.call("basket", "GET", "/api/basket/")
+        basket_id = basket__id_from_payload(payload=response.json()) if response is not None else None
+        if basket_id is None:
+            return
+        if self.call("basket_update", "PATCH", f"/api/basket/{basket_id}/", json=FUNNEL_CUSTOMER) is None:
+            return
+        if self.call("accept", "POST", f"/api/basket/{basket_id}/accept/") is None:
+            return
+        self.call("send_payment_url", "POST", f"/api/basket/{basket_id}/send_payment_url/", json={})
+
+    def run(self, *, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            self.iterate()
+
+
+class LockWaitMonitor(threading.Thread):
+    """
+    Раз в interval секунд считает сессии базы, которые ждут блокировку, и запоминает их запросы.
+    """
+
+    def __init__(self, *, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.samples: list[int] = []
+        self.queries: Counter = Counter()
+
+    def run(self) -> None:
+        try:
+            while not self.stopped.wait(self.interval):
+                with connection.cursor() as cursor:
+                    cursor.execute(LOCK_WAITS_SQL)
+                    rows = cursor.fetchall()
+                self.samples.append(len(rows))
+                self.queries.update(query__fingerprint(sql=row[0])[:QUERY_FINGERPRINT_MAX_LENGTH] for row in rows)
+        finally:
+            connection.close()
+
+    def result(self, *, deadlocks: int) -> LockWaitsDto:
+        return LockWaitsDto(
+            samples=len(self.samples),
+            max_waiting=max(self.samples, default=0),
+            avg_waiting=round(sum(self.samples) / len(self.samples), 2) if self.samples else 0,
+            wait_seconds=round(sum(self.samples) * self.interval, 2),
+            deadlocks=deadlocks,
+            queries=dict(self.queries.most_common(FUNNEL_LOCK_QUERIES_LIMIT)),
+        )
+
+
+def database__deadlocks() -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(DEADLOCKS_SQL)
+        return cursor.fetchone()[0]
+
+
+def funnel_steps__summarize(*, records: list[tuple[str, float, int]], duration: float) -> dict[str, dict]:
+    """
+    Пропускная способность, доля ошибок и задержки по шагам воронки. Код 0 - ошибка соединения или таймаут.
+    """
+    by_step: dict[str, list[tuple[float, int]]] = {}
+    for step, elapsed, status_code in records:
+        by_step.setdefault(step, []).append((elapsed, status_code))
+    summary = {}
+    for step in FUNNEL_STEPS:
+        calls = by_step.get(step)
+        if not calls:
+            continue
+        latencies = [elapsed for elapsed, _ in calls]
+        errors = sum(1 for _, status_code in calls if not status_code or status_code >= 400)
+        summary[step] = StepResultDto(
+            requests=len(calls),
+            errors=errors,
+            error_rate=round(errors / len(calls), 4),
+            throughput_rps=round(len(calls) / duration, 2),
+            p50_ms=round(percentile(values=latencies, percent=50), 2),
+            p95_ms=round(percentile(values=latencies, percent=95), 2),
+            statuses={
+                str(status_code or "error"): count
+                for status_code, count in sorted(Counter(status_code for _, status_code in calls).items())
+            },
+        ).dict()
+    return summary
+
+
+def checkout_funnel__run(
+        *,
+        base_url: str,
+        setup: FunnelSetupDto,
+        duration: float,
+        seed: int,
+        think_ms: int,
+        timeout: float,
+        lock_interval: float,
+) -> dict[str, dict]:
+    """
+    Гоняет по одному виртуальному покупателю на токен в отдельных потоках duration секунд.
+    """
+    funnel_users = [
+        FunnelUser(base_url=base_url, token=token, setup=setup, seed=seed + index, think_ms=think_ms, timeout=timeout)
+        for index, token in enumerate(setup.tokens)
+    ]
+    monitor = LockWaitMonitor(interval=lock_interval)
+    deadlocks = database__deadlocks()
+    started = time.monotonic()
+    deadline = started + duration
+    threads = [threading.Thread(target=funnel_user.run, kwargs={"deadline": deadline}) for funnel_user in funnel_users]
+    monitor.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    monitor.stopped.set()
+    monitor.join()
+    records = [record for funnel_user in funnel_users for record in funnel_user.records]
+    return {
+        "steps": funnel_steps__summarize(records=records, duration=elapsed),
+        "lock_waits": monitor.result(deadlocks=database__deadlocks() - deadlocks).dict(),
+    }
@@ -0,0 +1,172 @@
+import math
+import random
+import subprocess
+import time
+import tracemalloc
+from typing import Callable
+
+from django.db.models import Q
+from lxml.etree import tostring
+from rest_framework.test import APIClient
+
+from apps.market.api.serializers import YandexOfferSerializer
+from apps.market.dto.benchmark import EndpointResultDto, SyntheticCatalogDto
+from apps.market.enum import PaymentMethod
+from apps.market.models import Basket, ItemBasket, Product, Variant
+from apps.market.utils import dict_to_xml
+from apps.user.models import User
+from utils.query_budget import queries__record
+
+BENCHMARK_UNLOGGED_BASKET_SIZE = 5
+BENCHMARK_ACCEPT_BASKET_SIZE = 20
+
+
+def git__commit() -> str | None:
+    try:
+        return subprocess.check_output(("git", "rev-parse", "HEAD"), text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(*, values: list[float], percent: float) -> float:
+    """
+    Процентиль по ближайшему рангу: значение из выборки, без интерполяции.
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def endpoint__measure(*, call: Callable[[], object], iterations: int, warmup: int) -> EndpointResultDto:
+    """
+    Задержка считается по iterations вызовам после warmup прогревочных. Запросы к базе - по последнему вызову,
+    пиковая память - отдельным вызовом под tracemalloc, чтобы трассировка не искажала задержку.
+    """
+    for _ in range(warmup):
+        call()
+    latencies = []
+    for _ in range(iterations):
+        with queries__record() as recorder:
+            started = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        call()
+        _, memory_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return EndpointResultDto(
+        iterations=iterations,
+        p50_ms=round(percentile(values=latencies, percent=50), 2),
+        p95_ms=round(percentile(values=latencies, percent=95), 2),
+        max_ms=round(max(latencies), 2),
+        queries=recorder.count,
+        queries_time_ms=recorder.duration_ms,
+        memory_peak_kb=round(memory_peak / 1024, 1),
+    )
+
+
+def yandex_feed__build() -> bytes:
+    offers = YandexOfferSerializer(Product.objects.get_products_on_display(), many=True).data
+    return tostring(dict_to_xml({"shop": {"offers": [{"offer": dict(offer)} for offer in offers]}}))
+
+
+def benchmark__endpoints(*, catalog: SyntheticCatalogDto, seed: int) -> dict[str, Callable[[], object]]:
+    """
+    Горячие пути витрины. Каждый вызов проверяет код ответа, чтобы ошибка не выглядела как быстрый эндпоинт.
+    """
+    rng = random.Random(seed)
+    anonymous = APIClient()
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(id=catalog.user_id))
+
+    def request(method: Callable, *args: object, **kwargs: object) -> Callable[[], object]:
+        def call() -> object:
+            response = method(*args, **kwargs)
+            assert response.status_code < 400, f"{args[0]}: {response.status_code}"
+            return response
+        return call
+
+    def product_detail() -> object:
+        return request(anonymous.get, f"/api/products/{rng.choice(catalog.product_ids)}/")()
+
+    def add_to_basket() -> object:
+        data = {"variant_id": rng.choice(catalog.variant_ids), "quantity": 1}
+        return request(client.patch, "/api/variants/add_to_basket/", data, format="json")()
+
+    def add_many_to_basket() -> object:
+        variant_ids = rng.sample(catalog.variant_ids, k=min(BENCHMARK_UNLOGGED_BASKET_SIZE, len(catalog.variant_ids)))
+        data = {"items": [{"variant_id": variant_id, "quantity": 1} for variant_id in variant_ids]}
+        return request(client.post, "/api/variants/add_many_to_basket/", data, format="json")()
+
+    def accept_basket() -> Callable[[], object]:
+        # Отдельный покупатель, чтобы оформление не трогало активную корзину остальных эндпоинтов.
+        # Повторное оформление той же корзины ничего не дорезервирует и заново фиксирует цены.
+        user = User.objects.create(username=f"7901{rng.randrange(1000000, 9999999)}")
+        basket = Basket.objects.create(
+            user=user, customer_name="Benchmark", customer_surname="Benchmark", payment_method=PaymentMethod.ONLINE
+        )
+        variant_ids = (
+            Variant.objects.filter(id__in=catalog.variant_ids)
+            .filter(Q(quantity__gte=1) | Q(to_order=True))
+            .order_by("id")
+            .values_list("id", flat=True)[:BENCHMARK_ACCEPT_BASKET_SIZE]
+        )
+        ItemBasket.objects.bulk_create(
+            ItemBasket(basket=basket, variant_product_id=variant_id, quantity=1) for variant_id in variant_ids
+        )
+        accept_client = APIClient()
+        accept_client.force_authenticate(user=user)
+        return request(accept_client.post, f"/api/basket/{basket.id}/accept/")
+
+    def unlogged_basket() -> object:
+        variant_ids = rng.sample(catalog.variant_ids, k=min(BENCHMARK_UNLOGGED_BASKET_SIZE, len(catalog.variant_ids)))
+        data = {"variant_basket": [{"id": variant_id, "quantity": 1} for variant_id in variant_ids]}
+        return request(anonymous.post, "/api/item_basket/get_unlogged_basket_items/", data, format="json")()
+
+    return {
+        "products.list": request(anonymous.get, "/api/products/", {"per_page": 20}),
+        "products.list_cursor": request(anonymous.get, "/api/products/", {"per_page": 20, "cursor": ""}),
+        "products.list_category": request(
+            anonymous.get, "/api/products/", {"per_page": 20, "category": catalog.category_ids[0]}
+        ),
+        "products.retrieve": product_detail,
+        "products.get_filter_params": request(
+            anonymous.get, "/api/products/get_filter_params/", {"category": catalog.category_ids[0]}
+        ),
+        "basket.add_to_basket": add_to_basket,
+        "basket.add_many_to_basket": add_many_to_basket,
+        "basket.list": request(client.get, "/api/basket/"),
+        "basket.unlogged_items": unlogged_basket,
+        "basket.accept": accept_basket(),
+        "yandex_feed.build": yandex_feed__build,
+    }
+
+
+def benchmark__run(
+        *, catalog: SyntheticCatalogDto, seed: int, iterations: int, warmup: int, only: list[str] | None = None
+) -> dict[str, dict]:
+    endpoints = benchmark__endpoints(catalog=catalog, seed=seed)
+    return {
+        name: endpoint__measure(call=call, iterations=iterations, warmup=warmup).dict()
+        for name, call in endpoints.items()
+        if not only or name in only
+    }
+
+
+def benchmark__compare(*, current: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """
+    Регрессии относительно сохранённого прогона: p95 выросла больше чем на threshold процентов
+    или выросло число запросов к базе.
+    """
+    regressions = []
+    for name, result in current.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if previous["p95_ms"] and (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100 > threshold:
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {result['p95_ms']} мс")
+        if result["queries"] > previous["queries"]:
+            regressions.append(f"{name}: запросов {previous['queries']} -> {result['queries']}")
+    return regressions
@@ -0,0 +1,178 @@
+import random
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+from functools import partial
+
+from django.db import connection
+from django.db.models import Sum
+
+from apps.market.benchmark.checkout_funnel import database__deadlocks
+from apps.market.benchmark.runner import percentile
+from apps.market.dto.benchmark import ReservationResultDto, ReservationSetupDto
+from apps.market.enum import PaymentMethod
+from apps.market.logic.interactors.stock_reservation import \
+    basket__reserve_stock
+from apps.market.models import Basket, ItemBasket, Product, Variant
+from apps.user.models import User
+from utils.exeption import BusinessLogicException
+
+RESERVATION_USERNAME_PREFIX = "7998"
+RESERVATION_MAX_ITEMS = 3
+RESERVATION_MAX_QUANTITY = 3
+
+
+def stock_reservation__prepare(*, baskets: int, variants: int, stock: int, seed: int) -> ReservationSetupDto:
+    """
+    Один товар с несколькими вариантами и корзины, которые спорят за их остатки.
+    Спрос в корзинах заведомо больше остатка, поэтому часть оформлений должна получить нехватку.
+    """
+    rng = random.Random(seed)
+    product = Product.objects.create(
+        id=f"reserve-bench-{seed}-product",
+        name="Reservation benchmark",
+        code=f"reserve-bench-{seed}",
+        article=f"RES-{seed}",
+        description="Synthetic product",
+        weight=Decimal("0.50"),
+    )
+    variant_objects = Variant.objects.bulk_create(
+        Variant(
+            id=f"{product.id}-variant-{index}",
+            product=product,
+            name=f"{product.name} {index}",
+            price=Decimal(1000),
+            stock=Decimal(stock),
+            reserve=Decimal(0),
+            quantity=Decimal(stock),
+            to_order=False,
+            is_active=True,
+            archived=False,
+        )
+        for index in range(variants)
+    )
+    basket_ids, items = [], []
+    for index in range(baskets):
+        user, _ = User.objects.get_or_create(username=f"{RESERVATION_USERNAME_PREFIX}{index:07d}")
+        basket = Basket.objects.create(user=user, payment_method=PaymentMethod.ONLINE)
+        basket_ids.append(basket.id)
+        for variant in rng.sample(variant_objects, k=min(len(variant_objects), rng.randint(1, RESERVATION_MAX_ITEMS))):
+            items.append(
+                ItemBasket(basket=basket, variant_product=variant, quantity=rng.randint(1, RESERVATION_MAX_QUANTITY))
+            )
+    ItemBasket.objects.bulk_create(items)
+    return ReservationSetupDto(
+        product_id=product.id,
+        variant_ids=[variant.id for variant in variant_objects],
+        basket_ids=basket_ids,
+        stock=stock,
+    )
+
+
+def stock_reservation__cleanup(*, setup: ReservationSetupDto) -> None:
+    Basket.objects.filter(id__in=setup.basket_ids).delete()
+    Product.objects.filter(id=setup.product_id).delete()
+
+
+def stock_reservation__violations(
+        *, stock: Decimal, variants: dict[str, tuple[Decimal, Decimal]], reserved: dict[str, Decimal]
+) -> list[str]:
+    """
+    Нарушения инвариантов остатков после прогона.
+    variants: доступный остаток и резерв по id варианта, reserved: сумма резервов позиций корзин по id варианта.
+    Без перепродажи доступный остаток не уходит в минус, резерв варианта равен сумме резервов позиций,
+    а доступное с резервом в сумме дают исходный остаток.
+    """
+    violations = []
+    for variant_id, (quantity, reserve) in sorted(variants.items()):
+        items_reserved = reserved.get(variant_id, Decimal(0))
+        if quantity < 0:
+            violations.append(f"{variant_id}: доступно {quantity}")
+        if reserve != items_reserved:
+            violations.append(f"{variant_id}: резерв {reserve}, в позициях {items_reserved}")
+        if quantity + reserve != stock:
+            violations.append(f"{variant_id}: доступно {quantity} и резерв {reserve} при остатке {stock}")
+    return violations
+
+
+def stock_reservation__reserve_pending(
+        *, pending: list[int], pending_lock: threading.Lock, records: list[tuple[float, str]]
+) -> None:
+    """
+    Поток сценария: забирает корзины из общей очереди, пока она не опустеет, и записывает время и исход оформления.
+    """
+    try:
+        while True:
+            with pending_lock:
+                if not pending:
+                    return
+                basket_id = pending.pop()
+            started = time.perf_counter()
+            try:
+                basket__reserve_stock(basket=Basket.objects.only("id", "payment_method").get(pk=basket_id))
+                outcome = "reserved"
+            except BusinessLogicException:
+                outcome = "shortage"
+            except Exception:
+                outcome = "error"
+            records.append(((time.perf_counter() - started) * 1000, outcome))
+    finally:
+        connection.close()
+
+
+def stock_reservation__state(
+        *, setup: ReservationSetupDto
+) -> tuple[dict[str, tuple[Decimal, Decimal]], dict[str, Decimal]]:
+    """
+    return: доступный остаток и резерв по id варианта, сумма резервов позиций корзин по id варианта
+    """
+    variants = {
+        variant_id: (quantity, reserve)
+        for variant_id, quantity, reserve in Variant.objects.filter(id__in=setup.variant_ids).values_list(
+            "id", "quantity", "reserve"
+        )
+    }
+    reserved = dict(
+        ItemBasket.objects.filter(basket_id__in=setup.basket_ids)
+        .values("variant_product_id")
+        .annotate(total=Sum("reserved_quantity"))
+        .values_list("variant_product_id", "total")
+    )
+    return variants, reserved
+
+
+def stock_reservation__run(*, setup: ReservationSetupDto, concurrency: int) -> ReservationResultDto:
+    """
+    Оформляет все корзины сценария в concurrency потоков и проверяет, что остатки не перепроданы.
+    """
+    records: list[tuple[float, str]] = []
+    worker = partial(
+        stock_reservation__reserve_pending,
+        pending=list(reversed(setup.basket_ids)),
+        pending_lock=threading.Lock(),
+        records=records,
+    )
+    deadlocks = database__deadlocks()
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    variants, reserved = stock_reservation__state(setup=setup)
+    outcomes = Counter(outcome for _, outcome in records)
+    latencies = [elapsed_ms for elapsed_ms, _ in records]
+    return ReservationResultDto(
+        baskets=len(records),
+        reserved=outcomes["reserved"],
+        shortages=outcomes["shortage"],
+        errors=outcomes["error"],
+        throughput_rps=round(len(records) / elapsed, 2),
+        p50_ms=round(percentile(values=latencies, percent=50), 2),
+        p95_ms=round(percentile(values=latencies, percent=95), 2),
+        deadlocks=database__deadlocks() - deadlocks,
+        violations=stock_reservation__violations(stock=Decimal(setup.stock), variants=variants, reserved=reserved),
+    )
@@ -0,0 +1,137 @@
+import itertools
+import json
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from structlog import get_logger
+
+logger = get_logger(__name__)
+
+STUB_PAYMENT_IDS = itertools.count(1)
+
+
+StubResponse = tuple[int, dict]
+
+
+def tinkoff_stub__response(*, method: str, endpoint: str, body: dict, base_url: str) -> StubResponse:
+    """
+    API платежей Tinkoff: Init, GetState и Cancel.
+    """
+    payment_id = str(body.get("PaymentId") or next(STUB_PAYMENT_IDS))
+    state = {"Init": "NEW", "GetState": "NEW", "Cancel": "CANCELED"}.get(endpoint)
+    if state is None:
+        return HTTPStatus.NOT_FOUND, {"Success": False, "ErrorCode": "404"}
+    return HTTPStatus.OK, {
+        "Success": True,
+        "ErrorCode": "0",
+        "TerminalKey": body.get("TerminalKey"),
+        "Status": state,
+        "PaymentId": payment_id,
+        "OrderId": body.get("OrderId"),
+        "Amount": body.get("Amount"),
+        "PaymentURL": f"{base_url}/tinkoff/pay/{payment_id}",
+    }
+
+
+def cdek_stub__response(*, method: str, endpoint: str, body: dict, base_url: str) -> StubResponse:
+    """
+    API СДЭК v2: токен, расчёт тарифов, создание и получение заказа.
+    """
+    if endpoint == "v2/oauth/token":
+        return HTTPStatus.OK, {"access_token": "stub", "token_type": "bearer", "expires_in": 3600}
+    if endpoint == "v2/calculator/tarifflist":
+        return HTTPStatus.OK, {
+            "tariff_codes": [
+                {"tariff_code": code, "delivery_sum": 300.0, "period_min": 2, "period_max": 4}
+                for code in (136, 137, 233, 234, 482)
+            ]
+        }
+    if endpoint.startswith("v2/orders"):
+        order_uuid = endpoint.rpartition("/")[2] if method == "GET" else str(uuid.uuid4())
+        return HTTPStatus.ACCEPTED, {
+            "entity": {"uuid": order_uuid, "statuses": [{"code": "CREATED"}]},
+            "requests": [{"type": "CREATE", "state": "ACCEPTED"}],
+        }
+    return HTTPStatus.NOT_FOUND, {"errors": [{"code": "not_found"}]}
+
+
+def smsru_stub__response(*, method: str, endpoint: str, body: dict, base_url: str) -> StubResponse:
+    """
+    SMS.ru: отправка сообщения и проверка авторизации.
+    """
+    if endpoint == "sms/send":
+        phone = str(body.get("to", "79000000000"))
+        return HTTPStatus.OK, {
+            "status": "OK",
+            "status_code": 100,
+            "sms": {phone: {"status": "OK", "status_code": 100, "sms_id": str(uuid.uuid4())}},
+            "balance": 100.0,
+        }
+    if endpoint == "auth/check":
+        return HTTPStatus.OK, {"status": "OK", "status_code": 100}
+    return HTTPStatus.NOT_FOUND, {"status": "ERROR", "status_code": 404}
+
+
+INTEGRATION_STUBS: dict[str, Callable[..., StubResponse]] = {
+    "tinkoff": tinkoff_stub__response,
+    "cdek": cdek_stub__response,
+    "smsru": smsru_stub__response,
+}
+
+
+def integration_stub__response(*, method: str, path: str, body: dict, base_url: str) -> StubResponse:
+    """
+    Ответы заглушек внешних сервисов по первому сегменту пути: /tinkoff/..., /cdek/..., /smsru/...
+    Отвечают успехом с минимальным набором полей, которые читает бекенд.
+    """
+    service, _, endpoint = path.strip("/").partition("/")
+    stub = INTEGRATION_STUBS.get(service)
+    if stub is None:
+        return HTTPStatus.NOT_FOUND, {}
+    return stub(method=method, endpoint=endpoint.split("?")[0], body=body, base_url=base_url)
+
+
+class IntegrationStubHandler(BaseHTTPRequestHandler):
+    latency_ms: int = 0
+    base_url: str = ""
+
+    def respond(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        code, payload = integration_stub__response(
+            method=self.command, path=self.path, body=body, base_url=self.base_url
+        )
+        content = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = respond
+    do_POST = respond
+
+    def log_message(self, format: str, *args: object) -> None:
+        logger.debug("integration_stub", request=format % args)
+
+
+def integration_stubs__serve(*, host: str, port: int, latency_ms: int) -> None:
+    """
+    Запускает заглушки в потоках, latency_ms имитирует время ответа внешнего сервиса.
+    """
+    handler = type(
+        "IntegrationStubHandler",
+        (IntegrationStubHandler,),
+        {"latency_ms": latency_ms, "base_url": f"http://{host}:{port}"},
+    )
+    with ThreadingHTTPServer((host, port), handler) as server:
+        server.serve_forever()
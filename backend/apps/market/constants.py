@@ -8,10 +8,12 @@ TINKOFF_EAN13_MAX_LENGTH = 20
 TINKOFF_PAYMENT_OSN_TAXATION = "osn"
 TINKOFF_CONFIRM_PAYMENT_RESPONSE = "OK"
 KOPECKS_IN_RUB = 100
+ITEM_BASKET_MAX_QUANTITY = 32767
 INKOFF_PAYMENT_STATUS_CONFIRMED = "CONFIRMED"
 TINKOFF_PAYMENT_CANT_BE_PROVIDE = "Для данной корзины невозможно сформировать выплату"
 TINKOFF_PAYMENT_CANT_BE_CANCELED = "Для данной корзины невозможно отменить выплату"
 NOT_ENOUGH_STOCK = "На складе недостаточно товара для оформления заказа"
+TINKOFF_PAYMENT_FAILED_STATUSES = ("REJECTED", "AUTH_FAIL", "CANCELED", "DEADLINE_EXPIRED", "REVERSED", "REFUNDED")
 TINKOFF_PAYMENT_NOT_EXISTS = "У данной корзины не существует выплаты!"
 TINKOFF_PAYMENT_HAS_NOT_EMAIL = (
     "у данного платежа не указана почта для уведомления пользователя"
@@ -19,4 +21,44 @@ TINKOFF_PAYMENT_HAS_NOT_EMAIL = (
 TINKOFF_PAYMENT_INCORRECT_TOKEN = "Не корректный токен платежа"
 
 BASKET_WRONG_PK = "Не существует корзины с таким ID!"
-NOT_ANY_SENT_MESSAGES = "На указанную почту не отправлено ни одного письма."
\ No newline at end of file
+NOT_ANY_SENT_MESSAGES = "На указанную почту не отправлено ни одного письма."
+
+FILTER_PARAMS_CACHE_TIMEOUT = 60 * 10
+FILTER_PARAMS_IGNORED_QUERY_PARAMS = ("ordering", "page", "per_page", "limit", "offset", "format")
+# Фильтры по множеству значений: порядок значений через запятую не влияет на результат.
+FILTER_PARAMS_SET_QUERY_PARAMS = ("id", "brand", "tags", "label", "characteristics_value")
+# Результат зависит от избранного пользователя, которое меняется без сброса версии фильтров.
+FILTER_PARAMS_UNCACHED_QUERY_PARAMS = ("user",)
+# Поля, от которых зависят параметры фильтров: правило витрины, фильтры списка, поиск и данные ответа.
+FILTER_PARAMS_PRODUCT_FIELDS = (
+    "name", "code", "article", "description", "weight", "is_active", "archived", "is_displayable", "brand", "label",
+)
+FILTER_PARAMS_VARIANT_FIELDS = (
+    "product", "code", "price", "sale_price", "quantity", "stock", "to_order", "is_active", "archived",
+)
+FILTER_PARAMS_BRAND_FIELDS = ("name",)
+# Для остатков параметры фильтров зависят только от наличия.
+FILTER_PARAMS_STOCK_FIELDS = ("quantity", "stock")
+
+FACET_FILTERS = ("brand", "tags", "label", "characteristics_value", "category", "price_range")
+FACET_PRICE_BUCKETS = (0, 1000, 3000, 5000, 10000, 20000, 50000)
+FACET_INDEX_MIN_REBUILD_INTERVAL = 30
+FACET_INDEX_SNAPSHOT_TIMEOUT = 60 * 10
+
+SEARCH_CONFIG = "russian"
+SEARCH_TRIGRAM_MIN_LENGTH = 3
+
+SUGGEST_LIMIT = 10
+SUGGEST_QUERY_MAX_LENGTH = 100
+SUGGEST_TRIGRAM_THRESHOLD = 0.5
+SUGGEST_FEED_TIMEOUT = 60 * 60 * 24
+SUGGEST_FEED_POLL_INTERVAL = 1
+SUGGEST_FEED_STALL_TIMEOUT = 60
+
+PRODUCT_DETAIL_CACHE_TIMEOUT = 60 * 10
+
+VARIANT_PRICE_SNAPSHOT_POLL_INTERVAL = 1
+VARIANT_PRICE_SNAPSHOT_LOCK_TIMEOUT = 60
+BASKET_TOTALS_CACHE_TIMEOUT = 60 * 10
+# Действия корзины и заказов, ответ которых сериализует позиции: для них позиции подгружаются заранее.
+BASKET_PREFETCH_ACTIONS = ("list", "retrieve", "update", "partial_update")
@@ -0,0 +1,12 @@
+from decimal import Decimal
+
+from utils.dto import BaseDto
+
+
+class VariantPriceDto(BaseDto):
+    product_id: str
+    price: Decimal
+    discount: Decimal
+    quantity: Decimal | None
+    to_order: bool
+    payload: dict
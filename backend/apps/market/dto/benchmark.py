@@ -0,0 +1,71 @@
+from utils.dto import BaseDto
+
+
+class CatalogSizeDto(BaseDto):
+    products: int
+    variants: int
+    characteristics: int
+    images: int
+    categories: int
+
+
+class SyntheticCatalogDto(BaseDto):
+    id_prefix: str
+    product_ids: list[str]
+    variant_ids: list[str]
+    category_ids: list[int]
+    user_id: int
+
+
+class EndpointResultDto(BaseDto):
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    queries: int
+    queries_time_ms: float
+    memory_peak_kb: float
+
+
+class FunnelSetupDto(BaseDto):
+    tokens: list[str]
+    items: list[tuple[str, str]]
+    category_ids: list[int]
+
+
+class StepResultDto(BaseDto):
+    requests: int
+    errors: int
+    error_rate: float
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    statuses: dict[str, int]
+
+
+class LockWaitsDto(BaseDto):
+    samples: int
+    max_waiting: int
+    avg_waiting: float
+    wait_seconds: float
+    deadlocks: int
+    queries: dict[str, int]
+
+
+class ReservationSetupDto(BaseDto):
+    product_id: str
+    variant_ids: list[str]
+    basket_ids: list[int]
+    stock: int
+
+
+class ReservationResultDto(BaseDto):
+    baskets: int
+    reserved: int
+    shortages: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    deadlocks: int
+    violations: list[str]
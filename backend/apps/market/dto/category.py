@@ -0,0 +1,11 @@
+from utils.dto import BaseDto
+
+
+class CategoryNodeDto(BaseDto):
+    id: int
+    parent_id: int | None
+    tree_id: int
+    lft: int
+    rght: int
+    level: int
+    is_active: bool
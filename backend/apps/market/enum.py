@@ -7,6 +7,12 @@ class BasketStatus(TextChoices):
     COMPLETED = 'complete', 'оформлен'
 
 
+class BasketMergePolicy(TextChoices):
+    SUM = 'sum', 'сложить количества'
+    MAX = 'max', 'большее из количеств'
+    REPLACE = 'replace', 'количество из гостевой корзины'
+
+
 class PaymentStatus(TextChoices):
     PAID = 'paid', 'оплачен' #check_payment
     UNPAID = 'UNPAID', 'не оплачен' #accept
@@ -0,0 +1,43 @@
+import hashlib
+import json
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+from mptt.utils import get_cached_trees
+
+from apps.market.api.serializers import CategoryTreeSerializer
+from apps.market.logic.interactors.category_tree import (CategoryTree,
+                                                         category_tree__get)
+from apps.market.models import Category
+
+_category_tree_payload: dict = {}
+_category_tree_payload_lock = threading.Lock()
+
+
+def category_tree__visible_ids(*, tree: CategoryTree) -> list[int]:
+    """
+    Активные категории, у которых активны все предки. Порядок (tree_id, lft) сохраняется.
+    """
+    visible: set[int] = set()
+    for node in tree.ordered:
+        if node.is_active and (node.parent_id is None or node.parent_id in visible):
+            visible.add(node.id)
+    return [node.id for node in tree.ordered if node.id in visible]
+
+
+def category_tree__payload() -> tuple[list[dict], str]:
+    """
+    Дерево активных категорий и его ETag. Собирается одним запросом и хранится в памяти процесса
+    до изменения версии дерева категорий.
+    """
+    tree = category_tree__get()
+    with _category_tree_payload_lock:
+        if _category_tree_payload.get("version") != tree.version:
+            visible_ids = category_tree__visible_ids(tree=tree)
+            categories = Category.objects.filter(id__in=visible_ids).order_by("tree_id", "lft")
+            data = CategoryTreeSerializer(get_cached_trees(categories), many=True).data
+            content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode("utf-8")
+            _category_tree_payload.update(
+                version=tree.version, data=data, etag=f'"{hashlib.md5(content).hexdigest()}"'
+            )
+        return _category_tree_payload["data"], _category_tree_payload["etag"]
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import time
+from typing import Any, Callable, Iterable
+
+from django.core.cache import cache
+from django.db.models import Model, QuerySet
+from django.http import QueryDict
+from rest_framework.renderers import JSONRenderer
+
+from apps.market.api.serializers import ProductSerializer
+from apps.market.constants import (FACET_FILTERS, FILTER_PARAMS_CACHE_TIMEOUT,
+                                   FILTER_PARAMS_IGNORED_QUERY_PARAMS,
+                                   FILTER_PARAMS_SET_QUERY_PARAMS,
+                                   FILTER_PARAMS_STOCK_FIELDS,
+                                   FILTER_PARAMS_UNCACHED_QUERY_PARAMS,
+                                   PRODUCT_DETAIL_CACHE_TIMEOUT)
+from apps.market.logic.interactors.category_tree import category_tree__version
+from apps.market.logic.interactors.facet_index import (
+    facet_filters__from_query, facet_index__get)
+from apps.market.logic.selectors.product_selectors import (
+    get_filter_params__from_products, get_stored_values,
+    product__prefetch_for_detail, product_cross_sale__get_items)
+from apps.market.models import Product
+
+FILTER_PARAMS_VERSION_KEY = "filter_params:version"
+PRODUCT_DETAIL_CACHE_KEY = "product_detail:{product_id}"
+
+
+def filter_params__normalize_query(*, query_params: QueryDict) -> str:
+    """
+    Приводит фильтры к каноническому виду: порядок параметров не важен, как и у фильтров, берётся последнее значение.
+    Значения через запятую сортируются только у фильтров по множеству: category, user и type_label читают
+    первое значение, price_range - минимум и максимум по порядку.
+    """
+    normalized = []
+    for key in sorted(query_params.keys()):
+        if key in FILTER_PARAMS_IGNORED_QUERY_PARAMS:
+            continue
+        value = query_params.get(key) or ""
+        if key in FILTER_PARAMS_SET_QUERY_PARAMS:
+            value = ",".join(sorted({item for item in value.split(",") if item}))
+        if value:
+            normalized.append(f"{key}={value}")
+    return "&".join(normalized)
+
+
+def filter_params__version() -> int:
+    return cache.get_or_set(FILTER_PARAMS_VERSION_KEY, lambda: time.time_ns(), timeout=None)
+
+
+def filter_params__cache_key(*, query_params: QueryDict) -> str:
+    version = filter_params__version()
+    query = filter_params__normalize_query(query_params=query_params)
+    return f"filter_params:{version}:{hashlib.md5(query.encode('utf-8')).hexdigest()}"
+
+
+def filter_params__invalidate() -> None:
+    try:
+        cache.incr(FILTER_PARAMS_VERSION_KEY)
+    except ValueError:
+        filter_params__version()
+
+
+def filter_params__value(*, field: str, value: Any) -> Any:
+    if field in FILTER_PARAMS_STOCK_FIELDS:
+        return (value or 0) > 0
+    return value
+
+
+def filter_params__is_changed(
+        *, instance: Model, fields: Iterable[str], update_fields: Iterable[str] | None = None
+) -> bool:
+    """
+    Меняет ли сохранение объекта поля, от которых зависят параметры фильтров. Вызывается до сохранения:
+    прежние значения читаются одним запросом по первичному ключу, остатки сравниваются только по наличию.
+    """
+    attnames = {instance._meta.get_field(field).attname: field for field in fields}
+    if update_fields is not None:
+        attnames = {
+            attname: field for attname, field in attnames.items()
+            if attname in update_fields or field in update_fields
+        }
+    if not attnames:
+        return False
+    if instance._state.adding:
+        return True
+    stored = get_stored_values(instance=instance, fields=attnames)
+    if stored is None:
+        return True
+    return any(
+        filter_params__value(field=field, value=stored[attname])
+        != filter_params__value(field=field, value=getattr(instance, attname))
+        for attname, field in attnames.items()
+    )
+
+
+def product_filter_params__get(*, products: QuerySet[Product], query_params: QueryDict) -> dict:
+    """
+    Параметры фильтров по отфильтрованным товарам. Запросы с фильтрами по избранному не кешируются.
+    """
+    if any(key in query_params for key in FILTER_PARAMS_UNCACHED_QUERY_PARAMS):
+        return get_filter_params__from_products(products=products)
+    cache_key = filter_params__cache_key(query_params=query_params)
+    data = cache.get(cache_key)
+    if data is None:
+        data = get_filter_params__from_products(products=products)
+        cache.set(cache_key, data, timeout=FILTER_PARAMS_CACHE_TIMEOUT)
+    return data
+
+
+def product_facet_counts__get(*, products: QuerySet[Product], query_params: QueryDict) -> dict:
+    """
+    Счётчики фасетов для боковой панели каталога по индексу текущего процесса.
+    Фильтры, которых нет в индексе (id, user, type_label, with_discount), применяются через отфильтрованный queryset.
+    """
+    index = facet_index__get(version=filter_params__version())
+    filters = facet_filters__from_query(query_params=query_params)
+    restrict_to = None
+    if any(
+            key not in FACET_FILTERS and key not in FILTER_PARAMS_IGNORED_QUERY_PARAMS
+            for key in query_params.keys()
+    ):
+        restrict_to = set(products.values_list("id", flat=True))
+    return index.counts(filters=filters, restrict_to=restrict_to)
+
+
+def product_detail__build(*, product: Product) -> dict:
+    product__prefetch_for_detail(product=product)
+    return json.loads(JSONRenderer().render(ProductSerializer(product).data))
+
+
+def product_detail__get(*, product_id: str, get_product: Callable[[], Product]) -> dict:
+    """
+    Карточка товара из кеша. Ответ содержит категории, поэтому вместе с ним хранится версия дерева категорий.
+    Рекомендации пересчитываются отдельно от товара и подставляются из ProductCrossSale при каждом ответе.
+    При промахе товар берётся через get_product, чтобы сохранить проверки вьюсета (404 для товара не на витрине).
+    """
+    cache_key = PRODUCT_DETAIL_CACHE_KEY.format(product_id=product_id)
+    version = category_tree__version()
+    cached = cache.get(cache_key)
+    if cached is not None and cached["version"] == version:
+        crossale = product_cross_sale__get_items(product_id=product_id)
+        if crossale is None:
+            return cached["data"]
+        return {**cached["data"], "crossale": crossale}
+    data = product_detail__build(product=get_product())
+    cache.set(cache_key, {"version": version, "data": data}, timeout=PRODUCT_DETAIL_CACHE_TIMEOUT)
+    return data
+
+
+def product_detail__invalidate(*, product_id: str) -> None:
+    cache.delete(PRODUCT_DETAIL_CACHE_KEY.format(product_id=product_id))
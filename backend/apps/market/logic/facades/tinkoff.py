@@ -2,6 +2,7 @@ import hashlib
 from uuid import UUID
 
 import requests
+from django.conf import settings
 from django.db import transaction
 
 from apps.credentials.models import TinkoffCredentials
@@ -60,7 +61,7 @@ def basket_payment_url(
     if basket.payment_id:
         tinkoff = TinkoffCredentials.get_solo()
         response = requests.post(
-            url="https://securepay.tinkoff.ru/v2/GetState",
+            url=settings.TINKOFF_API_URL + "GetState",
             json={
                 "TerminalKey": tinkoff.terminal_key,
                 "Token": hashlib.sha256(
@@ -1,19 +1,22 @@
 import datetime
-import pgbulk
 import pytz
 import requests
 from django.conf import settings
 from django.core.mail import send_mail
 
-from django.db.models import F, QuerySet, Sum, Q
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, QuerySet, Sum, Q
+from django.utils import timezone
 from rest_framework.serializers import ModelSerializer
 
 from apps.content.models import RecipientEmail
 from apps.credentials.models import EmailCredentials
-from apps.market.enum import ShippingMethod
+from apps.market.constants import ITEM_BASKET_MAX_QUANTITY
+from apps.market.enum import BasketMergePolicy, BasketStatus, ShippingMethod
+from apps.market.logic.interactors.basket_totals import basket_totals__schedule_invalidate
 from apps.market.logic.selectors.basket_viewset_selectors import basket_daily_info_selector
 
-from apps.market.models import Basket, ItemBasket
+from apps.market.models import Basket, ItemBasket, Variant
 from utils.exeption import BusinessLogicException
 
 
@@ -39,39 +42,55 @@ def clear__payment_method__when__changed__delivery_method__or__address_data(
             )
 
 
-def fixed__item_basket__when_accept(*, item_baskets: QuerySet[ItemBasket], basket) -> None:
-    fixed_items = [
-        ItemBasket(
-            id=item.id,
-            code=item.variant_product.code,
-            name=item.variant_product.name,
-            price=item.variant_product.price,
-            sale_price=item.variant_product.sale_price,
-            item_total_cost=item.variant_product.price * item.quantity,
-            item_total_cost_with_discount=item.variant_product.sale_price
-                                          * item.quantity,
-            item_discount=(
-                              (item.variant_product.price - item.variant_product.sale_price)
-                              if item.variant_product.sale_price
-                              else 0
-                          )
-                          * item.quantity,
-            basket_id=basket.id,
+def basket__finalize_order(*, basket: Basket, order_date: datetime.datetime) -> None:
+    """
+    Оформляет заказ одним запросом: CTE фиксирует в позициях код, название и цены вариантов,
+    UPDATE корзины считает по возвращённым строкам итоговую стоимость и скидку и переводит корзину в «оформлен».
+    Число запросов не зависит от размера корзины. Итоги и статус записываются и в переданный объект корзины.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+                WITH fixed AS (
+                    UPDATE {ItemBasket._meta.db_table} AS item SET
+                        code = variant.code,
+                        name = variant.name,
+                        price = variant.price,
+                        sale_price = variant.sale_price,
+                        item_total_cost = variant.price * item.quantity,
+                        item_total_cost_with_discount = variant.sale_price * item.quantity,
+                        item_discount = CASE
+                            WHEN COALESCE(variant.sale_price, 0) <> 0
+                                THEN (variant.price - variant.sale_price) * item.quantity
+                            ELSE 0
+                        END
+                    FROM {Variant._meta.db_table} AS variant
+                    WHERE item.basket_id = %(basket_id)s AND variant.id = item.variant_product_id
+                    RETURNING item.item_total_cost, item.item_discount
+                )
+                UPDATE {Basket._meta.db_table} AS basket SET
+                    total_cost = totals.without_discount - totals.discount,
+                    discount = totals.discount,
+                    order_date = %(order_date)s,
+                    status = %(status)s,
+                    update_at = %(update_at)s
+                FROM (
+                    SELECT SUM(item_total_cost) AS without_discount, SUM(item_discount) AS discount FROM fixed
+                ) AS totals
+                WHERE basket.id = %(basket_id)s
+                RETURNING basket.total_cost, basket.discount
+            """,
+            {
+                'basket_id': basket.pk,
+                'order_date': order_date,
+                'status': BasketStatus.COMPLETED,
+                'update_at': timezone.now(),
+            },
         )
-        for item in item_baskets
-    ]
-    update_fields = (
-        "id",
-        "code",
-        "name",
-        "price",
-        "sale_price",
-        "item_total_cost",
-        "item_total_cost_with_discount",
-        "item_discount",
-        "basket_id",
-    )
-    pgbulk.update(ItemBasket, fixed_items, update_fields=update_fields)
+        basket.total_cost, basket.discount = cursor.fetchone()
+    basket.order_date = order_date
+    basket.status = BasketStatus.COMPLETED
+    basket_totals__schedule_invalidate(basket_id=basket.pk)
 
 
 def checking__products__to_order(*, basket: Basket) -> bool:
@@ -85,6 +104,78 @@ def checking__products__to_order(*, basket: Basket) -> bool:
     return products_to_order
 
 
+def basket__refresh_buy_to_order(*, basket: Basket) -> None:
+    """
+    Пересчитывает признак покупки под заказ одним UPDATE, без загрузки корзины и full_clean.
+    """
+    products_to_order = ItemBasket.objects.filter(
+        basket_id=OuterRef('pk'),
+        quantity__gt=F('variant_product__quantity'),
+        variant_product__to_order=True,
+    )
+    Basket.objects.filter(pk=basket.pk).update(buy_to_order=Exists(products_to_order), update_at=timezone.now())
+
+
+ITEM_BASKET_MERGE_EXPRESSIONS = {
+    BasketMergePolicy.SUM: 'item.quantity::integer + EXCLUDED.quantity',
+    BasketMergePolicy.MAX: 'GREATEST(item.quantity, EXCLUDED.quantity)',
+    BasketMergePolicy.REPLACE: 'EXCLUDED.quantity',
+}
+
+
+# Участник получен по значению: без плагина Django mypy видит атрибут TextChoices как кортеж (значение, подпись).
+@transaction.atomic
+def item_baskets__upsert(
+        *, basket: Basket, quantities: dict[str, int], policy: BasketMergePolicy = BasketMergePolicy('replace')
+) -> dict[str, int]:
+    """
+    Добавляет варианты в корзину одним INSERT ... ON CONFLICT по паре корзина - вариант.
+    policy определяет количество для варианта, который уже лежит в корзине: сумма, большее или новое.
+    Для вариантов не под заказ количество ограничивается доступным остатком, варианты без остатка пропускаются.
+    Признак buy_to_order пересчитывается один раз на всю пачку.
+
+    return: количество, с которым вариант лёг в корзину, по id варианта
+    """
+    if not quantities:
+        return {}
+    variant_table = Variant._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+                INSERT INTO {ItemBasket._meta.db_table} AS item (
+                    basket_id, variant_product_id, quantity, reserved_quantity
+                )
+                SELECT %(basket_id)s, variant.id, CASE
+                    WHEN variant.to_order THEN requested.quantity
+                    ELSE LEAST(requested.quantity, FLOOR(variant.quantity))
+                END, 0
+                FROM unnest(%(variant_ids)s::varchar[], %(quantities)s::integer[])
+                    AS requested(variant_id, quantity)
+                JOIN {variant_table} AS variant ON variant.id = requested.variant_id
+                WHERE variant.to_order OR variant.quantity >= 1
+                ON CONFLICT (basket_id, variant_product_id) DO UPDATE SET quantity = LEAST(
+                    {ITEM_BASKET_MERGE_EXPRESSIONS[policy]},
+                    %(max_quantity)s,
+                    (
+                        SELECT FLOOR(variant.quantity) FROM {variant_table} AS variant
+                        WHERE variant.id = EXCLUDED.variant_product_id AND NOT variant.to_order
+                    )
+                )
+                RETURNING variant_product_id, quantity
+            """,
+            {
+                'basket_id': basket.pk,
+                'variant_ids': list(quantities),
+                'quantities': list(quantities.values()),
+                'max_quantity': ITEM_BASKET_MAX_QUANTITY,
+            },
+        )
+        added = dict(cursor.fetchall())
+    basket__refresh_buy_to_order(basket=basket)
+    basket_totals__schedule_invalidate(basket_id=basket.pk)
+    return added
+
+
 def check_another_variants(*, item: ItemBasket) -> bool:
     product = item.variant_product.product
     return product.variants.filter(Q(quantity__gt=0) | Q(to_order=True)).exists()
@@ -0,0 +1,115 @@
+import time
+from decimal import Decimal
+from functools import partial
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.market.constants import BASKET_TOTALS_CACHE_TIMEOUT
+from apps.market.logic.interactors.variant_price_snapshot import \
+    variant_price_product_versions__get
+from apps.market.logic.selectors.basket_viewset_selectors import \
+    items__with_variants
+from apps.market.models import Basket, ItemBasket
+
+BASKET_TOTALS_VERSION_KEY = "basket_totals:version:{basket_id}"
+BASKET_TOTALS_KEY = "basket_totals:{basket_id}:{version}"
+
+
+def decimals__sum(values: Iterable[Decimal | None]) -> Decimal | None:
+    """
+    Сумма как у SQL SUM: NULL пропускаются, без значений - None.
+    """
+    values = [value for value in values if value is not None]
+    return sum(values, Decimal(0)) if values else None
+
+
+def decimals__subtract(minuend: Decimal | None, subtrahend: Decimal | None) -> Decimal | None:
+    return minuend - subtrahend if minuend is not None and subtrahend is not None else None
+
+
+def item_basket__settlement_quantity(*, item: ItemBasket) -> Decimal | int | None:
+    variant = item.variant_product
+    if variant is None:
+        return None
+    if variant.to_order or (variant.stock is not None and item.quantity <= variant.stock):
+        return item.quantity
+    return variant.stock
+
+
+def basket_totals__calculate(*, item_baskets: Iterable[ItemBasket]) -> dict:
+    """
+    Количество позиций, стоимость по зафиксированным ценам позиций (get_cost_info) и расчётная стоимость
+    по текущим ценам и остаткам вариантов (get_settlement_cost_info) за один проход по позициям.
+    Результат совпадает с агрегатами этих кверисетов, включая None для пустой корзины.
+    """
+    count = 0
+    costs, discounts, settlement_costs, settlement_discounts = [], [], [], []
+    for item in item_baskets:
+        count += 1
+        costs.append(item.price * item.quantity if item.price is not None else None)
+        if item.sale_price is not None and item.sale_price > 0:
+            discounts.append((item.price - item.sale_price) * item.quantity if item.price is not None else None)
+        else:
+            discounts.append(0)
+        variant = item.variant_product
+        quantity = item_basket__settlement_quantity(item=item)
+        price = variant.price if variant is not None else None
+        settlement_costs.append(price * quantity if price is not None and quantity is not None else None)
+        sale_price = variant.sale_price if variant is not None else None
+        if sale_price is not None and sale_price > 0:
+            settlement_discounts.append(
+                (price - sale_price) * quantity if price is not None and quantity is not None else None
+            )
+        else:
+            settlement_discounts.append(0)
+    cost, discount = decimals__sum(costs), decimals__sum(discounts)
+    settlement_cost, settlement_discount = decimals__sum(settlement_costs), decimals__sum(settlement_discounts)
+    return {
+        "count_variants": count,
+        "expenses": {
+            "basket_without_discount": cost,
+            "basket_discount": discount,
+            "basket_with_discount": decimals__subtract(cost, discount),
+            "basket_final_cost": decimals__subtract(cost, discount),
+        },
+        "settlement_data_cost": {
+            "basket_full_cost": settlement_cost,
+            "basket_discount": settlement_discount,
+            "basket_with_discount": decimals__subtract(settlement_cost, settlement_discount),
+            "basket_final_cost": decimals__subtract(settlement_cost, settlement_discount),
+        },
+    }
+
+
+def basket_totals__invalidate(*, basket_id: int) -> None:
+    cache.set(BASKET_TOTALS_VERSION_KEY.format(basket_id=basket_id), time.time_ns(), timeout=None)
+
+
+def basket_totals__schedule_invalidate(*, basket_id: int) -> None:
+    transaction.on_commit(partial(basket_totals__invalidate, basket_id=basket_id))
+
+
+def basket_totals__get(*, basket: Basket) -> dict:
+    """
+    Итоги корзины из кеша. Запись хранится под версией корзины (меняется при изменении позиций) вместе с версиями
+    снимка цен товаров корзины и пересчитывается, только если изменился один из этих товаров.
+    Позиции берутся из prefetch корзины, если он есть.
+    """
+    version_key = BASKET_TOTALS_VERSION_KEY.format(basket_id=basket.pk)
+    version = cache.get(version_key)
+    if version is None:
+        version = cache.get_or_set(version_key, time.time_ns, timeout=None)
+    key = BASKET_TOTALS_KEY.format(basket_id=basket.pk, version=version)
+    cached = cache.get(key)
+    if cached is not None:
+        if variant_price_product_versions__get(product_ids=cached["product_versions"]) == cached["product_versions"]:
+            return cached["totals"]
+    prefetched = getattr(basket, "_prefetched_objects_cache", {}).get("item_baskets")
+    item_baskets = list(prefetched if prefetched is not None else items__with_variants().filter(basket=basket))
+    product_ids = {item.variant_product.product_id for item in item_baskets if item.variant_product is not None}
+    product_versions = variant_price_product_versions__get(product_ids=product_ids)
+    totals = basket_totals__calculate(item_baskets=item_baskets)
+    cache.set(key, {"product_versions": product_versions, "totals": totals}, timeout=BASKET_TOTALS_CACHE_TIMEOUT)
+    return totals
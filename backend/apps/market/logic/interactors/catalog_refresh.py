@@ -0,0 +1,127 @@
+from collections import defaultdict
+from functools import partial
+from typing import Callable, Iterable
+from weakref import WeakKeyDictionary
+
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from apps.market.logic.facades.product_facades import (
+    filter_params__invalidate, product_detail__invalidate)
+from apps.market.logic.interactors.product_card import product_cards__refresh
+from apps.market.logic.interactors.product_cross_sale import (
+    product_cross_sales__refresh, product_cross_sales__refresh_recommending)
+from apps.market.logic.interactors.product_search import \
+    product_search_vectors__refresh
+from apps.market.logic.interactors.product_visibility import \
+    products__refresh_visibility
+from apps.market.logic.interactors.suggest_index import suggest_feed__publish
+from apps.market.logic.interactors.variant_price_snapshot import \
+    variant_price_snapshot__refresh
+
+CATALOG_REFRESH_VISIBILITY = "visibility"
+CATALOG_REFRESH_CARD = "card"
+CATALOG_REFRESH_SEARCH_VECTOR = "search_vector"
+CATALOG_REFRESH_CROSS_SALE = "cross_sale"
+CATALOG_REFRESH_RECOMMENDED = "recommended"
+CATALOG_REFRESH_VARIANT_PRICE = "variant_price"
+CATALOG_REFRESH_SUGGEST = "suggest"
+CATALOG_REFRESH_DETAIL = "detail"
+CATALOG_REFRESH_FILTER_PARAMS = "filter_params"
+
+
+def product_details__invalidate(*, product_ids: set[str]) -> None:
+    for product_id in product_ids:
+        product_detail__invalidate(product_id=product_id)
+
+
+# Порядок выполнения пересчётов. Флаг витрины читают карточки и рекомендации, карточки - подсказки,
+# кеши ответов сбрасываются последними, когда производные данные уже пересчитаны.
+CATALOG_REFRESH_STEPS: tuple[tuple[str, Callable[[set[str]], object]], ...] = (
+    (CATALOG_REFRESH_VISIBILITY, lambda product_ids: products__refresh_visibility(product_ids=product_ids)),
+    (CATALOG_REFRESH_CARD, lambda product_ids: product_cards__refresh(product_ids=product_ids)),
+    (CATALOG_REFRESH_SEARCH_VECTOR, lambda product_ids: product_search_vectors__refresh(product_ids=product_ids)),
+    (CATALOG_REFRESH_CROSS_SALE, lambda product_ids: product_cross_sales__refresh(product_ids=product_ids)),
+    (
+        CATALOG_REFRESH_RECOMMENDED,
+        lambda product_ids: product_cross_sales__refresh_recommending(recommended_ids=product_ids),
+    ),
+    (CATALOG_REFRESH_VARIANT_PRICE, lambda product_ids: variant_price_snapshot__refresh(product_ids=product_ids)),
+    (CATALOG_REFRESH_SUGGEST, lambda product_ids: suggest_feed__publish(product_ids=product_ids)),
+    (CATALOG_REFRESH_DETAIL, lambda product_ids: product_details__invalidate(product_ids=product_ids)),
+    (CATALOG_REFRESH_FILTER_PARAMS, lambda product_ids: filter_params__invalidate()),
+)
+
+# Изменения товара затрагивают всё, кроме собственного списка рекомендаций: он зависит только от связей.
+CATALOG_CHANGED_STEPS = tuple(step for step, _ in CATALOG_REFRESH_STEPS if step != CATALOG_REFRESH_CROSS_SALE)
+CATALOG_CHANGED_STEPS_WITHOUT_FILTER_PARAMS = tuple(
+    step for step in CATALOG_CHANGED_STEPS if step != CATALOG_REFRESH_FILTER_PARAMS
+)
+
+
+class CatalogRefreshBatch:
+    """
+    Товары по шагам пересчёта, накопленные в транзакции соединения до коммита.
+    """
+
+    def __init__(self, *, connection: BaseDatabaseWrapper) -> None:
+        self.product_ids: defaultdict[str, set[str]] = defaultdict(set)
+        self.flush = partial(catalog_refresh__flush, connection=connection, batch=self)
+        # Список обработчиков коммита соединения, в котором зарегистрирован flush.
+        # Django заменяет этот список при коммите и откате транзакции или точки сохранения.
+        self.hooks: list = connection.run_on_commit
+
+    def is_pending(self, *, connection: BaseDatabaseWrapper) -> bool:
+        """
+        Ждёт ли пачка коммита. После отката обработчик пачки выброшен вместе с изменениями транзакции,
+        и товары откаченной транзакции пересчитывать не нужно.
+        """
+        if connection.run_on_commit is not self.hooks:
+            if not any(callback is self.flush for _, callback, _ in connection.run_on_commit):
+                return False
+            self.hooks = connection.run_on_commit
+        return True
+
+
+# Пачка на соединение: соединения Django не разделяются между потоками, поэтому пачка не требует блокировок.
+_catalog_refresh_batches: WeakKeyDictionary[BaseDatabaseWrapper, CatalogRefreshBatch] = WeakKeyDictionary()
+
+
+def catalog_refresh__run(*, product_ids: dict[str, set[str]]) -> None:
+    for step, refresh in CATALOG_REFRESH_STEPS:
+        step_product_ids = product_ids.get(step)
+        if step_product_ids:
+            refresh(step_product_ids)
+
+
+def catalog_refresh__flush(*, connection: BaseDatabaseWrapper, batch: CatalogRefreshBatch) -> None:
+    if _catalog_refresh_batches.get(connection) is batch:
+        del _catalog_refresh_batches[connection]
+    catalog_refresh__run(product_ids=batch.product_ids)
+
+
+def catalog_refresh__schedule(*, product_id: str, steps: Iterable[str]) -> None:
+    """
+    Копит товары в пачке текущей транзакции до коммита. На пачку регистрируется один обработчик коммита,
+    который выполняет пересчёты в порядке CATALOG_REFRESH_STEPS. Пачка откаченной транзакции отбрасывается.
+    Вне транзакции пачка выполняется сразу.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        catalog_refresh__run(product_ids={step: {product_id} for step in steps})
+        return
+    batch = _catalog_refresh_batches.get(connection)
+    if batch is None or not batch.is_pending(connection=connection):
+        batch = _catalog_refresh_batches[connection] = CatalogRefreshBatch(connection=connection)
+        transaction.on_commit(batch.flush)
+    for step in steps:
+        batch.product_ids[step].add(product_id)
+
+
+def catalog__changed(*, product_id: str, filter_params: bool = True) -> None:
+    """
+    Пересчёты после изменения товара. filter_params=False, если изменение не затрагивает параметры фильтров:
+    тогда их кеш и индекс фасетов не сбрасываются.
+    """
+    steps = CATALOG_CHANGED_STEPS if filter_params else CATALOG_CHANGED_STEPS_WITHOUT_FILTER_PARAMS
+    catalog_refresh__schedule(product_id=product_id, steps=steps)
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from django.core.cache import cache
+from structlog import get_logger
+
+from apps.market.dto.category import CategoryNodeDto
+from apps.market.models import Category
+
+logger = get_logger(__name__)
+
+CATEGORY_TREE_VERSION_KEY = "category_tree:version"
+
+
+class CategoryTree:
+    """
+    Дерево категорий в памяти процесса. Узлы упорядочены как в MPTT (tree_id, lft),
+    поэтому потомки категории - непрерывный отрезок списка сразу за ней.
+    """
+
+    def __init__(self, *, nodes: list[CategoryNodeDto], version: int | None = None) -> None:
+        self.version = version
+        self.ordered = sorted(nodes, key=lambda node: (node.tree_id, node.lft))
+        self.nodes = {node.id: node for node in self.ordered}
+        self.positions = {node.id: position for position, node in enumerate(self.ordered)}
+        self._descendants: dict[int, frozenset[int]] = {}
+
+    def node(self, *, category_id: int | str) -> CategoryNodeDto | None:
+        try:
+            return self.nodes.get(int(category_id))
+        except (TypeError, ValueError):
+            return None
+
+    def active_node(self, *, category_id: int | str) -> CategoryNodeDto | None:
+        node = self.node(category_id=category_id)
+        return node if node is not None and node.is_active else None
+
+    def descendant_ids(self, *, category_id: int | str, include_self: bool = True) -> frozenset[int]:
+        node = self.node(category_id=category_id)
+        if node is None:
+            return frozenset()
+        if node.id not in self._descendants:
+            ids = []
+            for descendant in self.ordered[self.positions[node.id]:]:
+                if descendant.tree_id != node.tree_id or descendant.lft > node.rght:
+                    break
+                ids.append(descendant.id)
+            self._descendants[node.id] = frozenset(ids)
+        descendants = self._descendants[node.id]
+        return descendants if include_self else descendants - {node.id}
+
+    def ancestor_ids(self, *, category_id: int | str) -> list[int]:
+        ancestors = []
+        node = self.node(category_id=category_id)
+        while node is not None and node.parent_id is not None:
+            ancestors.append(node.parent_id)
+            node = self.nodes.get(node.parent_id)
+        return ancestors[::-1]
+
+    def family_ids(self, *, category_id: int | str) -> list[int]:
+        """
+        Предки, сама категория и потомки в порядке MPTT, как в Category.get_family().
+        """
+        family = set(self.ancestor_ids(category_id=category_id)) | self.descendant_ids(category_id=category_id)
+        return [node.id for node in self.ordered if node.id in family]
+
+    def children_ids(self, *, category_id: int | str) -> list[int]:
+        node = self.node(category_id=category_id)
+        if node is None:
+            return []
+        children = [
+            child_id
+            for child_id in self.descendant_ids(category_id=node.id)
+            if self.nodes[child_id].parent_id == node.id
+        ]
+        return sorted(children, key=lambda child_id: self.nodes[child_id].lft)
+
+
+def category_tree__version() -> int:
+    return cache.get_or_set(CATEGORY_TREE_VERSION_KEY, lambda: time.time_ns(), timeout=None)
+
+
+def category_tree__invalidate() -> None:
+    try:
+        cache.incr(CATEGORY_TREE_VERSION_KEY)
+    except ValueError:
+        category_tree__version()
+
+
+def category_tree__build(*, version: int | None = None) -> CategoryTree:
+    nodes = [
+        CategoryNodeDto(
+            id=category_id, parent_id=parent_id, tree_id=tree_id, lft=lft, rght=rght, level=level, is_active=is_active
+        )
+        for category_id, parent_id, tree_id, lft, rght, level, is_active in Category.objects.values_list(
+            "id", "parent_id", "tree_id", "lft", "rght", "level", "is_active"
+        )
+    ]
+    logger.info("category_tree__build", categories=len(nodes), version=version)
+    return CategoryTree(nodes=nodes, version=version)
+
+
+_category_tree: CategoryTree | None = None
+_category_tree_lock = threading.Lock()
+
+
+def category_tree__get() -> CategoryTree:
+    """
+    Дерево текущего процесса. Перечитывается из базы, только когда изменилась версия (сохранение или перенос категории).
+    """
+    global _category_tree
+    version = category_tree__version()
+    tree = _category_tree
+    if tree is not None and tree.version == version:
+        return tree
+    with _category_tree_lock:
+        if _category_tree is None or _category_tree.version != version:
+            _category_tree = category_tree__build(version=version)
+        return _category_tree
@@ -0,0 +1,265 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from structlog import get_logger
+
+from apps.market.constants import (FACET_FILTERS,
+                                   FACET_INDEX_MIN_REBUILD_INTERVAL,
+                                   FACET_INDEX_SNAPSHOT_TIMEOUT,
+                                   FACET_PRICE_BUCKETS)
+from apps.market.logic.interactors.category_tree import category_tree__get
+from apps.market.models import (Product, ProductCard, TagProduct,
+                                VariantCharacteristics)
+
+logger = get_logger(__name__)
+
+FACET_INDEX_SNAPSHOT_KEY = "facet_index:snapshot:{version}"
+
+
+class ProductFacetIndex:
+    """
+    Инвертированные списки товаров на витрине: идентификаторы товаров по бренду, тегу, лейблу,
+    значению характеристики и категории (вместе с потомками). Пересечение списков повторяет
+    фильтры ProductOrderingFilter с теми же параметрами.
+    """
+
+    def __init__(
+            self,
+            *,
+            universe: set[str],
+            postings: dict[str, dict[str, set[str]]],
+            prices: dict[str, Decimal | None],
+            active_categories: set[str],
+            version: int | None = None,
+    ) -> None:
+        self.universe = universe
+        self.postings = postings
+        self.prices = prices
+        self.active_categories = active_categories
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def _postings_union(self, *, facet: str, values: list[str]) -> set[str]:
+        facet_postings = self.postings.get(facet, {})
+        result: set[str] = set()
+        for value in values:
+            result |= facet_postings.get(value, set())
+        return result
+
+    def _category_ids(self, *, values: list[str]) -> set[str]:
+        category_id = values[0]
+        if category_id not in self.active_categories:
+            return set()
+        return self.postings.get("category", {}).get(category_id, set())
+
+    def _price_ids(self, *, values: list[str], product_ids: set[str]) -> set[str]:
+        try:
+            min_price, max_price = (Decimal(value) for value in values[:2])
+        except (InvalidOperation, ValueError):
+            return set()
+        matched = set()
+        for product_id in product_ids:
+            price = self.prices.get(product_id)
+            if price is not None and min_price <= price <= max_price:
+                matched.add(product_id)
+        return matched
+
+    def filter_ids(self, *, filters: dict[str, list[str]], exclude: str | None = None) -> set[str]:
+        product_ids = set(self.universe)
+        for facet, values in filters.items():
+            if facet == exclude or facet == "price_range":
+                continue
+            if facet == "category":
+                product_ids &= self._category_ids(values=values)
+            else:
+                product_ids &= self._postings_union(facet=facet, values=values)
+        if "price_range" in filters and exclude != "price_range":
+            product_ids = self._price_ids(values=filters["price_range"], product_ids=product_ids)
+        return product_ids
+
+    def _facet_counts(self, *, facet: str, product_ids: set[str]) -> dict[str, int]:
+        counts = {
+            value: len(value_ids & product_ids)
+            for value, value_ids in self.postings.get(facet, {}).items()
+        }
+        return {value: count for value, count in counts.items() if count}
+
+    def _price_bucket_counts(self, *, product_ids: set[str]) -> list[dict]:
+        counts = [0] * len(FACET_PRICE_BUCKETS)
+        for product_id in product_ids:
+            price = self.prices.get(product_id)
+            if price is not None:
+                # Границы корзин целые, поэтому целая часть цены попадает в ту же корзину, что и сама цена.
+                counts[bisect_right(FACET_PRICE_BUCKETS, int(price)) - 1] += 1
+        bounds = list(FACET_PRICE_BUCKETS[1:]) + [None]
+        return [
+            {"min_price": min_price, "max_price": max_price, "count": count}
+            for min_price, max_price, count in zip(FACET_PRICE_BUCKETS, bounds, counts)
+        ]
+
+    def counts(self, *, filters: dict[str, list[str]], restrict_to: set[str] | None = None) -> dict:
+        """
+        Количество товаров по значениям фасетов. Для каждого фасета учитываются все фильтры, кроме его собственного,
+        чтобы в боковой панели были видны альтернативы уже выбранному значению.
+        """
+
+        def facet_ids(exclude: str | None) -> set[str]:
+            product_ids = self.filter_ids(filters=filters, exclude=exclude)
+            return product_ids if restrict_to is None else product_ids & restrict_to
+
+        return {
+            "total": len(facet_ids(None)),
+            "brands": self._facet_counts(facet="brand", product_ids=facet_ids("brand")),
+            "characteristics": self._facet_counts(
+                facet="characteristics_value", product_ids=facet_ids("characteristics_value")
+            ),
+            "price_buckets": self._price_bucket_counts(product_ids=facet_ids("price_range")),
+        }
+
+
+def facet_filters__from_query(*, query_params: dict) -> dict[str, list[str]]:
+    filters = {}
+    for facet in FACET_FILTERS:
+        values = [value for value in (query_params.get(facet) or "").split(",") if value]
+        if values:
+            filters[facet] = values
+    return filters
+
+
+FacetPostings = dict[str, dict[str, set[str]]]
+
+
+def facet_postings__add_cards(*, postings: FacetPostings) -> dict[str, Decimal | None]:
+    """
+    Бренды и лейблы карточек витрины.
+
+    return: цена для фильтра по id товара, ключи - все товары витрины
+    """
+    prices: dict[str, Decimal | None] = {}
+    cards = ProductCard.objects.values_list(
+        "product_id", "product__brand_id", "product__label_id", "product__effective_min_price"
+    )
+    for product_id, brand_id, label_id, price in cards:
+        prices[product_id] = price
+        if brand_id is not None:
+            postings["brand"][str(brand_id)].add(product_id)
+        if label_id is not None:
+            postings["label"][str(label_id)].add(product_id)
+    return prices
+
+
+def facet_postings__add_tags(*, postings: FacetPostings, universe: set[str]) -> None:
+    for tag_id, product_id in TagProduct.objects.values_list("tag_id", "product_id"):
+        if product_id in universe:
+            postings["tags"][str(tag_id)].add(product_id)
+
+
+def facet_postings__add_characteristics(*, postings: FacetPostings, universe: set[str]) -> None:
+    characteristics = VariantCharacteristics.objects.filter(
+        Q(variant__is_active=True) & Q(Q(variant__stock__gt=0) | Q(variant__to_order=True))
+    ).values_list("value", "variant__product_id")
+    for value, product_id in characteristics:
+        if product_id in universe and value is not None:
+            postings["characteristics_value"][value].add(product_id)
+
+
+def facet_postings__add_categories(*, postings: FacetPostings, universe: set[str]) -> set[str]:
+    """
+    Товары категории вместе с товарами её потомков.
+
+    return: id активных категорий
+    """
+    category_products: dict[str, set[str]] = defaultdict(set)
+    for category_id, product_id in Product.category.through.objects.values_list("category_id", "product_id"):
+        if product_id in universe:
+            category_products[str(category_id)].add(product_id)
+    category_tree = category_tree__get()
+    for category_id in category_tree.nodes:
+        for descendant_id in category_tree.descendant_ids(category_id=category_id):
+            postings["category"][str(category_id)] |= category_products.get(str(descendant_id), set())
+    return {str(node.id) for node in category_tree.nodes.values() if node.is_active}
+
+
+def facet_index__build(*, version: int | None = None) -> ProductFacetIndex:
+    postings: FacetPostings = defaultdict(lambda: defaultdict(set))
+    prices = facet_postings__add_cards(postings=postings)
+    universe = set(prices)
+    facet_postings__add_tags(postings=postings, universe=universe)
+    facet_postings__add_characteristics(postings=postings, universe=universe)
+    active_categories = facet_postings__add_categories(postings=postings, universe=universe)
+    logger.info("facet_index__build", products=len(universe), version=version)
+    return ProductFacetIndex(
+        universe=universe,
+        postings={facet: dict(values) for facet, values in postings.items()},
+        prices=prices,
+        active_categories=active_categories,
+        version=version,
+    )
+
+
+def facet_index__load(*, version: int) -> ProductFacetIndex:
+    """
+    Индекс версии каталога из общего кеша. Если его там нет, индекс собирается из базы
+    и публикуется, чтобы остальные процессы не повторяли сборку.
+    """
+    key = FACET_INDEX_SNAPSHOT_KEY.format(version=version)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        return ProductFacetIndex(**snapshot, version=version)
+    index = facet_index__build(version=version)
+    snapshot = {
+        "universe": index.universe,
+        "postings": index.postings,
+        "prices": index.prices,
+        "active_categories": index.active_categories,
+    }
+    cache.set(key, snapshot, timeout=FACET_INDEX_SNAPSHOT_TIMEOUT)
+    return index
+
+
+_facet_index: ProductFacetIndex | None = None
+_facet_index_lock = threading.Lock()
+
+
+def facet_index__rebuild(*, version: int) -> None:
+    global _facet_index
+    if not _facet_index_lock.acquire(blocking=False):
+        return
+    try:
+        _facet_index = facet_index__load(version=version)
+    except Exception as error:
+        logger.warning("facet_index__rebuild_failed", version=version, error=str(error))
+    finally:
+        _facet_index_lock.release()
+        connection.close()
+
+
+def facet_index__get(*, version: int) -> ProductFacetIndex:
+    """
+    Индекс текущего процесса. Когда меняется версия каталога (см. filter_params__invalidate), но не чаще
+    FACET_INDEX_MIN_REBUILD_INTERVAL секунд, индекс пересобирается в фоновом потоке, а запросы до подмены
+    отвечают по прежнему индексу. Ждать приходится только первой загрузки индекса в процессе.
+    """
+    global _facet_index
+    index = _facet_index
+    if index is None:
+        with _facet_index_lock:
+            index = _facet_index
+            if index is None:
+                index = _facet_index = facet_index__load(version=version)
+        return index
+    if (
+            index.version != version
+            and time.monotonic() - index.built_at >= FACET_INDEX_MIN_REBUILD_INTERVAL
+            and not _facet_index_lock.locked()
+    ):
+        threading.Thread(
+            target=facet_index__rebuild, kwargs={"version": version}, name="facet-index-rebuild", daemon=True
+        ).start()
+    return index
@@ -0,0 +1,113 @@
+import json
+from functools import partial
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework.renderers import JSONRenderer
+from structlog import get_logger
+
+from apps.market.api.serializers import ProductListSerializer
+from apps.market.models import Brand, Product, ProductCard
+from utils.abstractions.response_cache import (response_cache__invalidate,
+                                               response_cache__tag)
+
+logger = get_logger(__name__)
+
+PRODUCT_CARDS_REBUILD_CHUNK_SIZE = 500
+
+
+def product_card__defaults(*, product: Product, data: dict) -> dict:
+    """
+    Значения полей карточки для товара из get_products_on_display и его ответа ProductListSerializer.
+    """
+    # Как и цены get_products_on_display и правило витрины, учитываются только активные неархивные варианты.
+    variants = [
+        variant for variant in product.variants.all()
+        if variant.is_active and not variant.archived and (variant.price or 0) > 0
+    ]
+    return {
+        "brand_id": product.brand_id,
+        "min_price": product.min_variant_price,
+        "max_price": max((variant.price for variant in variants), default=None),
+        "price_discount": product.price_with_discount,
+        "price_for_filter": product.price_for_filter,
+        "price_variants": data["price_variants"],
+        "price_label": data["price_label"],
+        "image_preview": data["image_preview"],
+        "label": data["label"],
+        "variants": data["variants"],
+        "h1": data["h1"],
+        "custom_item_title": data["custom_item_title"],
+        "in_stock": any((variant.quantity or 0) > 0 for variant in variants),
+        "to_order": any(variant.to_order for variant in variants),
+    }
+
+
+def product_card__refresh(*, product_id: str) -> ProductCard | None:
+    """
+    Пересчитывает карточку товара. Если товар больше не выводится на витрину, карточка удаляется.
+    Содержимое карточки берётся из ProductListSerializer, поэтому ответ списка товаров не меняется.
+    """
+    brand_ids = set(ProductCard.objects.filter(product_id=product_id).values_list("brand_id", flat=True))
+    product = Product.objects.get_products_on_display().filter(id=product_id).first()
+    if not product:
+        ProductCard.objects.filter(product_id=product_id).delete()
+        brands__refresh_displayable_products_count(brand_ids=brand_ids)
+        return None
+    data = json.loads(JSONRenderer().render(ProductListSerializer(product).data))
+    card, _ = ProductCard.objects.update_or_create(
+        product_id=product_id, defaults=product_card__defaults(product=product, data=data)
+    )
+    brands__refresh_displayable_products_count(brand_ids=brand_ids | {card.brand_id})
+    return card
+
+
+def product_cards__refresh(*, product_ids: Iterable[str]) -> None:
+    for product_id in product_ids:
+        product_card__refresh(product_id=product_id)
+
+
+def product_cards__rebuild() -> int:
+    """
+    Полный пересчёт карточек. Нужен после массовых обновлений в обход сигналов (синхронизация с Моим складом).
+    Товары сериализуются пачками через ProductListPrefetchSerializer.
+    """
+    products = list(Product.objects.get_products_on_display())
+    for start in range(0, len(products), PRODUCT_CARDS_REBUILD_CHUNK_SIZE):
+        chunk = products[start:start + PRODUCT_CARDS_REBUILD_CHUNK_SIZE]
+        chunk_data = json.loads(JSONRenderer().render(ProductListSerializer(chunk, many=True).data))
+        with transaction.atomic():
+            for product, data in zip(chunk, chunk_data):
+                ProductCard.objects.update_or_create(
+                    product_id=product.id, defaults=product_card__defaults(product=product, data=data)
+                )
+    ProductCard.objects.exclude(product_id__in=[product.id for product in products]).delete()
+    brands__refresh_displayable_products_count()
+    logger.info("product_cards__rebuild", refreshed=len(products))
+    return len(products)
+
+
+def brands__refresh_displayable_products_count(*, brand_ids: Iterable[str | None] | None = None) -> None:
+    """
+    Пересчитывает число карточек брендов одним UPDATE. Без brand_ids пересчитываются все бренды.
+    """
+    brands = Brand.objects.all()
+    if brand_ids is not None:
+        brand_ids = [brand_id for brand_id in brand_ids if brand_id is not None]
+        if not brand_ids:
+            return
+        brands = brands.filter(id__in=brand_ids)
+    brands.update(
+        displayable_products_count=Coalesce(
+            Subquery(
+                ProductCard.objects.filter(brand_id=OuterRef("pk")).values("brand_id").annotate(
+                    count=Count("pk")
+                ).values("count")[:1]
+            ),
+            Value(0),
+        )
+    )
+    # UPDATE не отправляет post_save, поэтому закешированный список брендов сбрасывается явно.
+    transaction.on_commit(partial(response_cache__invalidate, tag=response_cache__tag(model=Brand)))
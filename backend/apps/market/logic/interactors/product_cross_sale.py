@@ -0,0 +1,60 @@
+import json
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from structlog import get_logger
+
+from apps.market.api.serializers import RecommendetProductSerializer
+from apps.market.models import CrossSaleProduct, Product, ProductCrossSale
+
+logger = get_logger(__name__)
+
+
+def product_cross_sales__refresh(*, product_ids: Iterable[str] | None = None) -> int:
+    """
+    Пересчитывает списки рекомендаций. Без product_ids пересчитываются все товары с рекомендациями.
+    Рекомендуемые товары берутся из get_products_on_display и сериализуются одной пачкой.
+    """
+    links = CrossSaleProduct.objects.order_by('id')
+    if product_ids is not None:
+        product_ids = set(product_ids)
+        links = links.filter(product_id__in=product_ids)
+    recommendations = defaultdict(list)
+    for product_id, recommendet_id in links.values_list('product_id', 'recommendet_id'):
+        recommendations[product_id].append(recommendet_id)
+    if product_ids is None:
+        product_ids = set(recommendations)
+        ProductCrossSale.objects.exclude(product_id__in=product_ids).delete()
+
+    recommended_ids = {recommendet_id for ids in recommendations.values() for recommendet_id in ids}
+    products = Product.objects.get_products_on_display().filter(id__in=recommended_ids)
+    data = json.loads(JSONRenderer().render(RecommendetProductSerializer(products, many=True).data))
+    items = {item['id']: item for item in data}
+
+    with transaction.atomic():
+        for product_id in product_ids:
+            ProductCrossSale.objects.update_or_create(
+                product_id=product_id,
+                defaults={
+                    'items': [
+                        items[recommendet_id] for recommendet_id in recommendations[product_id]
+                        if recommendet_id in items
+                    ]
+                },
+            )
+    logger.info('product_cross_sales__refresh', refreshed=len(product_ids))
+    return len(product_ids)
+
+
+def product_cross_sales__refresh_recommending(*, recommended_ids: Iterable[str]) -> int:
+    """
+    Пересчитывает списки товаров, которые рекомендуют изменённые товары.
+    """
+    product_ids = set(
+        CrossSaleProduct.objects.filter(recommendet_id__in=list(recommended_ids)).values_list('product_id', flat=True)
+    )
+    if not product_ids:
+        return 0
+    return product_cross_sales__refresh(product_ids=product_ids)
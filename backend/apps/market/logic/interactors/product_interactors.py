@@ -0,0 +1,50 @@
+from typing import Iterable
+
+from apps.market.models import Variant
+
+
+def variant__is_available(*, variant: Variant) -> bool:
+    return bool(
+        variant.is_active
+        and variant.price
+        and variant.price > 0
+        and ((variant.quantity or 0) > 0 or variant.to_order)
+    )
+
+
+def variants__has_promotion(*, variants: Iterable[Variant]) -> bool:
+    return any(variant.sale_price is None or variant.sale_price > 0 for variant in variants)
+
+
+def variants__price_variants(*, variants: Iterable[Variant]) -> list[dict]:
+    return [
+        {"price": variant.price, "sale_price": variant.sale_price}
+        for variant in variants
+        if variant.price != 0
+    ]
+
+
+def variants__price_label(*, variants: Iterable[Variant]) -> dict | None:
+    """
+    Ценник товара по уже загруженным вариантам. Повторяет запросы ProductListSerializer.get_price_label:
+    цена со скидкой берётся у варианта с минимальной ценой распродажи, иначе отдаётся диапазон цен.
+    """
+    available = [variant for variant in variants if variant__is_available(variant=variant)]
+    with_sale_price = [variant for variant in available if variant.sale_price and variant.sale_price > 0]
+    if with_sale_price:
+        variant = min(with_sale_price, key=lambda item: item.sale_price)
+        return {
+            "price_discount": variant.sale_price,
+            "price": variant.price,
+            "min_price": None,
+            "max_price": None,
+        }
+    if available:
+        prices = [variant.price for variant in available]
+        return {
+            "price_discount": None,
+            "price": None,
+            "min_price": min(prices),
+            "max_price": max(prices),
+        }
+    return None
@@ -0,0 +1,62 @@
+from typing import Iterable
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db.models import OuterRef, QuerySet, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+from structlog import get_logger
+
+from apps.market.constants import SEARCH_CONFIG
+from apps.market.models import Product, ProductCharacteristics, Variant
+
+logger = get_logger(__name__)
+
+
+def _related_text(*, queryset: QuerySet, field: str) -> Coalesce:
+    return Coalesce(
+        Subquery(
+            queryset.filter(product_id=OuterRef('pk')).values('product_id').annotate(
+                text=StringAgg(field, delimiter=' ')
+            ).values('text')[:1]
+        ),
+        Value(''),
+        output_field=TextField(),
+    )
+
+
+def product_search_vector__expression() -> SearchVector:
+    """
+    Вес A - название, код и артикул, B - бренд и коды вариантов, C - характеристики, D - описание.
+    """
+    return (
+        SearchVector('name', 'code', 'article', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('brand__name', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(
+            _related_text(queryset=Variant.objects.all(), field='code'), weight='B', config=SEARCH_CONFIG
+        )
+        + SearchVector(
+            _related_text(queryset=ProductCharacteristics.objects.all(), field='value'),
+            weight='C',
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector('description', weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def product_search_vectors__refresh(*, product_ids: Iterable[str] | None = None) -> int:
+    """
+    Пересчитывает поисковый вектор одним UPDATE. Без product_ids пересчитываются все товары.
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=list(product_ids))
+    # UPDATE не поддерживает join, поэтому название бренда берётся подзапросом.
+    updated = products.update(
+        search_vector=Subquery(
+            Product.objects.filter(pk=OuterRef('pk')).annotate(
+                vector=product_search_vector__expression()
+            ).values('vector')[:1]
+        )
+    )
+    logger.info('product_search_vectors__refresh', updated=updated)
+    return updated
@@ -0,0 +1,38 @@
+from typing import Iterable
+
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+from structlog import get_logger
+
+from apps.market.models import Product, Variant
+
+logger = get_logger(__name__)
+
+
+def product_visibility__condition() -> Q:
+    """
+    Правило витрины: товар активен, не в архиве, вес не нулевой, есть категория,
+    у активных неархивных вариантов есть цена больше нуля и остаток или заказ.
+    """
+    active_variants = Variant.objects.filter(product_id=OuterRef('pk'), is_active=True, archived=False)
+    return (
+        Q(is_active=True)
+        & Q(archived=False)
+        & ~Q(weight=0)
+        & Exists(Product.category.through.objects.filter(product_id=OuterRef('pk')))
+        & Exists(active_variants.filter(price__gt=0))
+        & Exists(active_variants.filter(Q(quantity__gt=0) | Q(to_order=True)))
+    )
+
+
+def products__refresh_visibility(*, product_ids: Iterable[str] | None = None) -> int:
+    """
+    Пересчитывает флаг is_displayable одним UPDATE. Без product_ids пересчитываются все товары.
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(id__in=list(product_ids))
+    updated = products.update(
+        is_displayable=Case(When(product_visibility__condition(), then=Value(True)), default=Value(False))
+    )
+    logger.info('products__refresh_visibility', updated=updated)
+    return updated
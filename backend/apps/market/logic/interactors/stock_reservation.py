@@ -0,0 +1,225 @@
+import datetime
+from decimal import Decimal
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from structlog import get_logger
+
+from apps.market.constants import NOT_ENOUGH_STOCK
+from apps.market.enum import BasketStatus, PaymentMethod, PaymentStatus
+from apps.market.logic.interactors.catalog_refresh import catalog__changed
+from apps.market.models import Basket, ItemBasket, Product, Variant
+from utils.abstractions.response_cache import (response_cache__invalidate,
+                                               response_cache__tag)
+from utils.exeption import BusinessLogicException
+
+logger = get_logger(__name__)
+
+
+def stock_reservation__plan(
+        *, items: list[tuple[int, str, int, Decimal]], variants: dict[str, tuple[Decimal | None, bool]]
+) -> tuple[dict[int, Decimal], list[int]]:
+    """
+    Сколько добавить в резерв по каждой позиции корзины.
+    items: id позиции, id варианта, количество и уже зарезервированное количество.
+    variants: доступный остаток и признак под заказ по id варианта.
+    Позиция не под заказ резервируется целиком или попадает в нехватку. Под заказ резервируется то,
+    что есть в наличии, остальное везётся под заказ.
+
+    return: количество к резерву по id позиции и id позиций, которым не хватило остатка
+    """
+    available = {variant_id: max(quantity or Decimal(0), Decimal(0)) for variant_id, (quantity, _) in variants.items()}
+    reservations, shortages = {}, []
+    for item_id, variant_id, quantity, reserved_quantity in items:
+        if variant_id not in variants:
+            continue
+        needed = Decimal(quantity) - reserved_quantity
+        if needed <= 0:
+            continue
+        _, to_order = variants[variant_id]
+        if not to_order and needed > available[variant_id]:
+            shortages.append(item_id)
+            continue
+        reserved = min(needed, available[variant_id])
+        if reserved > 0:
+            available[variant_id] -= reserved
+            reservations[item_id] = reserved
+    return reservations, shortages
+
+
+def variants__lock(*, variant_ids: set[str]) -> dict[str, tuple[str, Decimal | None, bool]]:
+    """
+    SELECT ... FOR UPDATE вариантов в порядке id: параллельные оформления с общими вариантами
+    ждут друг друга, а не взаимоблокируются.
+
+    return: id товара, доступный остаток и признак под заказ по id варианта
+    """
+    locked = (
+        Variant.objects.select_for_update()
+        .filter(id__in=variant_ids)
+        .order_by("id")
+        .values_list("id", "product_id", "quantity", "to_order")
+    )
+    return {variant_id: (product_id, quantity, bool(to_order)) for variant_id, product_id, quantity, to_order in locked}
+
+
+def variants__shift_reserve(*, quantities: dict[str, Decimal]) -> None:
+    """
+    Переносит количество из доступного остатка в резерв одним UPDATE, отрицательное количество снимает резерв.
+    Варианты должны быть заблокированы variants__lock.
+    """
+    if not quantities:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+                UPDATE {Variant._meta.db_table} AS variant SET
+                    reserve = GREATEST(COALESCE(variant.reserve, 0) + delta.quantity, 0),
+                    quantity = COALESCE(variant.quantity, 0) - delta.quantity
+                FROM unnest(%(variant_ids)s::varchar[], %(quantities)s::numeric[]) AS delta(variant_id, quantity)
+                WHERE variant.id = delta.variant_id
+            """,
+            {'variant_ids': list(quantities), 'quantities': list(quantities.values())},
+        )
+
+
+def variants__availability_changed(
+        *, variants: dict[str, tuple[str, Decimal | None, bool]], quantities: dict[str, Decimal]
+) -> set[str]:
+    """
+    Товары, у которых после переноса в резерв вариант закончился или снова появился в наличии.
+    variants - состояние из variants__lock до переноса. Варианты под заказ от остатка не зависят.
+    """
+    changed = set()
+    for variant_id, delta in quantities.items():
+        product_id, quantity, to_order = variants[variant_id]
+        before = quantity or Decimal(0)
+        if not to_order and (before > 0) != (before - delta > 0):
+            changed.add(product_id)
+    return changed
+
+
+def variants__schedule_refresh(*, product_ids: set[str], filter_params_product_ids: set[str]) -> None:
+    """
+    Остатки меняются UPDATE без сигналов, поэтому всё, что от них зависит, пересчитывается явно:
+    производные данные товаров через catalog__changed и закешированные ответы по вариантам и товарам.
+    Параметры фильтров зависят только от наличия и сбрасываются для filter_params_product_ids.
+    """
+    if not product_ids:
+        return
+    for product_id in product_ids:
+        catalog__changed(product_id=product_id, filter_params=product_id in filter_params_product_ids)
+    for model in (Product, Variant):
+        transaction.on_commit(partial(response_cache__invalidate, tag=response_cache__tag(model=model)))
+
+
+@transaction.atomic
+def basket__reserve_stock(*, basket: Basket) -> None:
+    """
+    Резервирует остатки вариантов корзины при оформлении: переносит количество из quantity в reserve.
+    Корзина блокируется на время резервирования, чтобы позиции не менялись, варианты - через variants__lock.
+    Повторный вызов резервирует только недостающее. Если варианту не под заказ не хватает остатка,
+    ничего не резервируется и выбрасывается BusinessLogicException.
+    Для онлайн-оплаты резерв ограничен по времени BASKET_RESERVATION_MINUTES.
+    """
+    Basket.objects.select_for_update().values_list("id", flat=True).get(pk=basket.pk)
+    items = list(
+        ItemBasket.objects.filter(basket_id=basket.pk, variant_product__isnull=False)
+        .values_list("id", "variant_product_id", "quantity", "reserved_quantity")
+    )
+    variants = variants__lock(variant_ids={variant_id for _, variant_id, _, _ in items})
+    reservations, shortages = stock_reservation__plan(
+        items=items,
+        variants={variant_id: (quantity, to_order) for variant_id, (_, quantity, to_order) in variants.items()},
+    )
+    if shortages:
+        logger.info("stock_reservation__shortage", basket_id=basket.pk, item_ids=shortages)
+        raise BusinessLogicException(NOT_ENOUGH_STOCK)
+
+    variant_by_item = {item_id: variant_id for item_id, variant_id, _, _ in items}
+    quantities: dict[str, Decimal] = {}
+    for item_id, reserved in reservations.items():
+        variant_id = variant_by_item[item_id]
+        quantities[variant_id] = quantities.get(variant_id, Decimal(0)) + reserved
+    variants__shift_reserve(quantities=quantities)
+    if reservations:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                    UPDATE {ItemBasket._meta.db_table} AS item
+                    SET reserved_quantity = item.reserved_quantity + delta.quantity
+                    FROM unnest(%(item_ids)s::bigint[], %(quantities)s::numeric[]) AS delta(item_id, quantity)
+                    WHERE item.id = delta.item_id
+                """,
+                {'item_ids': list(reservations), 'quantities': list(reservations.values())},
+            )
+    variants__schedule_refresh(
+        product_ids={variants[variant_id][0] for variant_id in quantities},
+        filter_params_product_ids=variants__availability_changed(variants=variants, quantities=quantities),
+    )
+
+    basket.reserved_until = (
+        timezone.now() + datetime.timedelta(minutes=settings.BASKET_RESERVATION_MINUTES)
+        if basket.payment_method == PaymentMethod.ONLINE
+        else None
+    )
+    Basket.objects.filter(pk=basket.pk).update(reserved_until=basket.reserved_until)
+
+
+@transaction.atomic
+def basket__release_stock(*, basket_id: int) -> bool:
+    """
+    Снимает ограниченный по времени резерв неоплаченного заказа и переводит его в статус «снято с резервации».
+    Блокировки берутся в том же порядке, что при резервировании: корзина, затем варианты по id.
+
+    return: был ли снят резерв
+    """
+    basket = (
+        Basket.objects.select_for_update()
+        .filter(pk=basket_id, reserved_until__isnull=False)
+        .exclude(payment_status=PaymentStatus.PAID)
+        .first()
+    )
+    if basket is None:
+        return False
+    quantities: dict[str, Decimal] = {}
+    reserved_items = ItemBasket.objects.filter(
+        basket_id=basket_id, reserved_quantity__gt=0, variant_product__isnull=False
+    )
+    for variant_id, reserved_quantity in reserved_items.values_list("variant_product_id", "reserved_quantity"):
+        quantities[variant_id] = quantities.get(variant_id, Decimal(0)) - reserved_quantity
+    variants = variants__lock(variant_ids=set(quantities))
+    variants__shift_reserve(quantities=quantities)
+    reserved_items.update(reserved_quantity=0)
+    variants__schedule_refresh(
+        product_ids={product_id for product_id, _, _ in variants.values()},
+        filter_params_product_ids=variants__availability_changed(variants=variants, quantities=quantities),
+    )
+    Basket.objects.filter(pk=basket_id).update(
+        reserved_until=None, status=BasketStatus.UNACCEPTED, update_at=timezone.now()
+    )
+    logger.info("stock_reservation__released", basket_id=basket_id)
+    return True
+
+
+def basket__confirm_stock_reservation(*, basket_id: int) -> None:
+    """
+    Оплаченный заказ держит резерв бессрочно, остатки списываются при синхронизации с МойСклад.
+    """
+    Basket.objects.filter(pk=basket_id).update(reserved_until=None)
+
+
+def baskets__release_expired_reservations() -> int:
+    """
+    Снимает просроченные резервы, каждый в своей транзакции.
+
+    return: количество заказов, с которых снят резерв
+    """
+    basket_ids = list(
+        Basket.objects.filter(reserved_until__lt=timezone.now())
+        .exclude(payment_status=PaymentStatus.PAID)
+        .values_list("id", flat=True)
+    )
+    return sum(basket__release_stock(basket_id=basket_id) for basket_id in basket_ids)
@@ -0,0 +1,310 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import connection
+from structlog import get_logger
+
+from apps.market.constants import (SUGGEST_FEED_POLL_INTERVAL,
+                                   SUGGEST_FEED_STALL_TIMEOUT,
+                                   SUGGEST_FEED_TIMEOUT, SUGGEST_LIMIT,
+                                   SUGGEST_TRIGRAM_THRESHOLD)
+from apps.market.models import ProductCard, Variant
+
+logger = get_logger(__name__)
+
+SUGGEST_SNAPSHOT_KEY = "suggest:snapshot"
+SUGGEST_FEED_SEQ_KEY = "suggest:feed:seq"
+SUGGEST_FEED_ITEM_KEY = "suggest:feed:{seq}"
+
+# Запись индекса: (id товара, название, тексты для поиска). Название None означает, что товар снят с витрины.
+SuggestEntry = tuple[str, str | None, tuple[str, ...]]
+
+
+def suggest__normalize(value: str) -> str:
+    return " ".join(value.lower().replace("ё", "е").split())
+
+
+def suggest__words(value: str) -> list[str]:
+    return re.findall(r"\w+", suggest__normalize(value))
+
+
+def suggest__trigrams(value: str) -> set[str]:
+    """
+    Триграммы слов строки, как в pg_trgm: слово дополняется двумя пробелами слева и одним справа.
+    """
+    trigrams: set[str] = set()
+    for word in suggest__words(value):
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+class SuggestionIndex:
+    """
+    Индекс подсказок поисковой строки. Префиксный поиск идёт по отсортированному списку слов
+    (аналог префиксного дерева), поиск с опечатками - по спискам товаров для каждой триграммы.
+    """
+
+    def __init__(self, *, seq: int = 0) -> None:
+        self.seq = seq
+        self.names: dict[str, str] = {}
+        self.product_terms: dict[str, set[str]] = {}
+        self.product_trigrams: dict[str, set[str]] = {}
+        self.term_postings: dict[str, set[str]] = defaultdict(set)
+        self.sorted_terms: list[str] = []
+        self.trigram_postings: dict[str, set[str]] = defaultdict(set)
+
+    def remove(self, *, product_id: str) -> None:
+        self.names.pop(product_id, None)
+        for term in self.product_terms.pop(product_id, set()):
+            self.term_postings[term].discard(product_id)
+        for trigram in self.product_trigrams.pop(product_id, set()):
+            self.trigram_postings[trigram].discard(product_id)
+
+    def _add(self, *, product_id: str, name: str, texts: Iterable[str]) -> list[str]:
+        """
+        return: слова, которых раньше не было в индексе
+        """
+        self.remove(product_id=product_id)
+        texts = [name, *texts]
+        terms = {word for text in texts for word in suggest__words(text)}
+        # Коды и артикулы ищутся целиком, в том числе с разделителями: "AB-12" находится по "ab12".
+        terms.update("".join(suggest__words(text)) for text in texts[1:])
+        terms.discard("")
+        trigrams = set().union(*(suggest__trigrams(text) for text in texts))
+        self.names[product_id] = name
+        self.product_terms[product_id] = terms
+        self.product_trigrams[product_id] = trigrams
+        new_terms = [term for term in terms if term not in self.term_postings]
+        for term in terms:
+            self.term_postings[term].add(product_id)
+        for trigram in trigrams:
+            self.trigram_postings[trigram].add(product_id)
+        return new_terms
+
+    def add(self, *, product_id: str, name: str, texts: Iterable[str]) -> None:
+        for term in self._add(product_id=product_id, name=name, texts=texts):
+            insort(self.sorted_terms, term)
+
+    def apply(self, *, entry: SuggestEntry) -> None:
+        product_id, name, texts = entry
+        if name is None:
+            self.remove(product_id=product_id)
+        else:
+            self.add(product_id=product_id, name=name, texts=texts)
+
+    def extend(self, *, entries: Iterable[SuggestEntry]) -> None:
+        """
+        Массовая загрузка записей: список слов сортируется один раз после загрузки, а не вставкой каждого слова.
+        """
+        for product_id, name, texts in entries:
+            if name is None:
+                self.remove(product_id=product_id)
+            else:
+                self._add(product_id=product_id, name=name, texts=texts)
+        self.sorted_terms = sorted(self.term_postings)
+
+    def _prefix_ids(self, *, prefix: str) -> set[str]:
+        product_ids: set[str] = set()
+        for position in range(bisect_left(self.sorted_terms, prefix), len(self.sorted_terms)):
+            term = self.sorted_terms[position]
+            if not term.startswith(prefix):
+                break
+            product_ids |= self.term_postings[term]
+        return product_ids
+
+    def _trigram_scores(self, *, query: str) -> dict[str, float]:
+        query_trigrams = suggest__trigrams(query)
+        if not query_trigrams:
+            return {}
+        shared: dict[str, int] = defaultdict(int)
+        for trigram in query_trigrams:
+            for product_id in self.trigram_postings.get(trigram, ()):
+                shared[product_id] += 1
+        scores = {product_id: count / len(query_trigrams) for product_id, count in shared.items()}
+        return {product_id: score for product_id, score in scores.items() if score >= SUGGEST_TRIGRAM_THRESHOLD}
+
+    def suggest(self, *, query: str, limit: int = SUGGEST_LIMIT) -> list[dict]:
+        """
+        Сначала товары, у которых каждое слово запроса является началом одного из слов товара,
+        затем похожие по триграммам, если подсказок не хватает.
+        """
+        words = suggest__words(query)
+        if not words:
+            return []
+        normalized = " ".join(words)
+        matched: set[str] | None = None
+        for word in words:
+            word_ids = self._prefix_ids(prefix=word)
+            matched = word_ids if matched is None else matched & word_ids
+            if not matched:
+                break
+        result = sorted(
+            matched or (),
+            key=lambda product_id: (
+                not suggest__normalize(self.names[product_id]).startswith(normalized),
+                self.names[product_id],
+            ),
+        )[:limit]
+        if len(result) < limit:
+            scores = self._trigram_scores(query=normalized)
+            fuzzy = sorted(
+                (product_id for product_id in scores if product_id not in (matched or ())),
+                key=lambda product_id: (-scores[product_id], self.names[product_id]),
+            )
+            result.extend(fuzzy[:limit - len(result)])
+        return [{"id": product_id, "name": self.names[product_id]} for product_id in result]
+
+
+def suggest_entries__by_products(*, product_ids: Iterable[str] | None = None) -> list[SuggestEntry]:
+    """
+    Записи индекса для товаров на витрине. Для товаров из product_ids без карточки возвращается запись на удаление.
+    """
+    cards = ProductCard.objects.all()
+    variants = Variant.objects.filter(product__card__isnull=False, code__isnull=False)
+    if product_ids is not None:
+        product_ids = set(product_ids)
+        cards = cards.filter(product_id__in=product_ids)
+        variants = variants.filter(product_id__in=product_ids)
+    variant_codes: dict[str, list[str]] = defaultdict(list)
+    for product_id, code in variants.values_list("product_id", "code"):
+        variant_codes[product_id].append(code)
+    entries = []
+    rows = cards.values_list("product_id", "product__name", "product__article", "product__code", "product__brand__name")
+    for product_id, name, article, code, brand_name in rows:
+        texts = (article, code, brand_name, *variant_codes[product_id])
+        entries.append((product_id, name or "", tuple(text for text in texts if text)))
+    if product_ids is not None:
+        found = {entry[0] for entry in entries}
+        entries.extend((product_id, None, ()) for product_id in product_ids - found)
+    return entries
+
+
+def suggest_feed__seq() -> int:
+    return cache.get_or_set(SUGGEST_FEED_SEQ_KEY, 0, timeout=None)
+
+
+def suggest_feed__publish(*, product_ids: Iterable[str]) -> None:
+    """
+    Публикует изменения товаров в ленту: каждая запись хранится в кеше под своим порядковым номером.
+    """
+    for entry in suggest_entries__by_products(product_ids=product_ids):
+        suggest_feed__seq()
+        seq = cache.incr(SUGGEST_FEED_SEQ_KEY)
+        cache.set(SUGGEST_FEED_ITEM_KEY.format(seq=seq), entry, timeout=SUGGEST_FEED_TIMEOUT)
+
+
+def suggest_snapshot__build() -> dict:
+    """
+    Снимок индекса для быстрого старта процессов. Номер ленты берётся до чтения товаров,
+    поэтому изменения, попавшие в ленту во время сборки, будут применены повторно.
+    """
+    seq = suggest_feed__seq()
+    entries = suggest_entries__by_products()
+    snapshot = {"seq": seq, "entries": entries}
+    cache.set(SUGGEST_SNAPSHOT_KEY, snapshot, timeout=None)
+    logger.info("suggest_snapshot__build", seq=seq, products=len(entries))
+    return snapshot
+
+
+def suggest_index__from_snapshot(*, snapshot: dict) -> SuggestionIndex:
+    index = SuggestionIndex(seq=snapshot["seq"])
+    index.extend(entries=snapshot["entries"])
+    return index
+
+
+def suggest_index__load(*, seq: int | None = None) -> SuggestionIndex:
+    """
+    Индекс из снимка в кеше. Если снимка нет или он не новее индекса с номером seq, снимок собирается заново.
+    """
+    snapshot = cache.get(SUGGEST_SNAPSHOT_KEY)
+    if snapshot is None or (seq is not None and snapshot["seq"] <= seq):
+        snapshot = suggest_snapshot__build()
+    return suggest_index__from_snapshot(snapshot=snapshot)
+
+
+class SuggestionIndexHolder:
+    """
+    Индекс текущего процесса. Загружается из снимка в кеше и догоняет ленту изменений,
+    опрашивая номер ленты не чаще SUGGEST_FEED_POLL_INTERVAL секунд.
+    Если лента не двигается дольше SUGGEST_FEED_STALL_TIMEOUT, индекс пересобирается в фоновом потоке:
+    запросы до подмены отвечают по старому индексу. lock защищает только быстрые операции в памяти,
+    пересборка идёт под reload_lock, чтобы в процессе она выполнялась одна.
+    """
+
+    def __init__(self) -> None:
+        self.index: SuggestionIndex | None = None
+        self.checked_at = 0.0
+        self.stalled_since: float | None = None
+        self.lock = threading.Lock()
+        self.reload_lock = threading.Lock()
+
+    def swap(self, *, index: SuggestionIndex) -> None:
+        with self.lock:
+            self.index = index
+            self.stalled_since = None
+
+    def reload(self) -> None:
+        if not self.reload_lock.acquire(blocking=False):
+            return
+        try:
+            self.swap(index=suggest_index__load(seq=self.index.seq if self.index is not None else None))
+        except Exception as error:
+            logger.warning("suggestion_index__reload_failed", error=str(error))
+        finally:
+            self.reload_lock.release()
+            connection.close()
+
+    def schedule_reload(self) -> None:
+        if self.reload_lock.locked():
+            return
+        threading.Thread(target=self.reload, name="suggestion-index-reload", daemon=True).start()
+
+    def get(self) -> SuggestionIndex:
+        """
+        Текущий индекс. Ждать загрузки приходится только до появления первого индекса в процессе.
+        """
+        index = self.index
+        if index is None:
+            with self.reload_lock:
+                index = self.index
+                if index is None:
+                    index = suggest_index__load()
+                    self.swap(index=index)
+        return index
+
+    def catch_up(self, *, index: SuggestionIndex) -> None:
+        seq = suggest_feed__seq()
+        if seq <= index.seq:
+            return
+        keys = [SUGGEST_FEED_ITEM_KEY.format(seq=item) for item in range(index.seq + 1, seq + 1)]
+        entries = cache.get_many(keys)
+        for key in keys:
+            if key not in entries:
+                # Запись ещё не записана или вытеснена из кеша. Если лента не двигается, перечитываем снимок.
+                if self.stalled_since is None:
+                    self.stalled_since = time.monotonic()
+                elif time.monotonic() - self.stalled_since > SUGGEST_FEED_STALL_TIMEOUT:
+                    self.schedule_reload()
+                return
+            index.apply(entry=entries[key])
+            index.seq += 1
+        self.stalled_since = None
+
+    def suggest(self, *, query: str, limit: int = SUGGEST_LIMIT) -> list[dict]:
+        index = self.get()
+        with self.lock:
+            # Индекс мог быть подменён, пока запрос ждал блокировку.
+            index = self.index or index
+            if time.monotonic() - self.checked_at >= SUGGEST_FEED_POLL_INTERVAL:
+                self.checked_at = time.monotonic()
+                self.catch_up(index=index)
+            return index.suggest(query=query, limit=limit)
+
+
+suggestion_index = SuggestionIndexHolder()
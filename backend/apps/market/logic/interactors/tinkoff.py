@@ -2,6 +2,7 @@ import hashlib
 import uuid
 
 import requests
+from django.conf import settings
 from django.urls import reverse
 from restdoctor.rest_framework.exceptions import BadRequest
 from structlog import get_logger
@@ -154,7 +155,7 @@ def tinkoff__init_payment(
     Документация API - https://www.tinkoff.ru/kassa/dev/payments/ .
     """
     response = requests.post(
-        url="https://securepay.tinkoff.ru/v2/Init",
+        url=settings.TINKOFF_API_URL + "Init",
         json=payment_dto.dict(exclude_unset=True, by_alias=True),
     )
     payment_data = response.json()
@@ -175,7 +176,7 @@ def tinkoff__cancel_payment(*, payment_id: str):
     """
     tinkoff = TinkoffCredentials.get_solo()
     response = requests.post(
-        url="https://securepay.tinkoff.ru/v2/Cancel",
+        url=settings.TINKOFF_API_URL + "Cancel",
         json={
             "TerminalKey": tinkoff.terminal_key,
             "Token": hashlib.sha256(
@@ -0,0 +1,237 @@
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from structlog import get_logger
+
+from apps.market.constants import (VARIANT_PRICE_SNAPSHOT_LOCK_TIMEOUT,
+                                   VARIANT_PRICE_SNAPSHOT_POLL_INTERVAL)
+from apps.market.dto.basket import VariantPriceDto
+from apps.market.models import ProductImage, Variant
+
+logger = get_logger(__name__)
+
+# Индекс снимка: общая версия и версии товаров. Записи вариантов хранятся отдельно по товарам.
+VARIANT_PRICE_INDEX_KEY = "variant_prices:index"
+VARIANT_PRICE_PRODUCT_KEY = "variant_prices:product:{product_id}"
+# Версия товара хранится и для товаров без активных вариантов: по ней проверяются закешированные итоги корзин.
+VARIANT_PRICE_PRODUCT_VERSION_KEY = "variant_prices:product_version:{product_id}"
+VARIANT_PRICE_VERSION_KEY = "variant_prices:version"
+VARIANT_PRICE_LOCK_KEY = "variant_prices:lock"
+
+
+class VariantPriceSnapshot:
+    """
+    Цены, скидки и остатки активных вариантов в памяти процесса вместе с готовыми данными VariantSerializer.
+    Считает гостевую корзину без запросов к базе.
+    """
+
+    def __init__(
+            self, *, entries: dict[str, VariantPriceDto], version: int | None = None,
+            product_versions: dict[str, int] | None = None,
+    ) -> None:
+        self.entries = entries
+        self.version = version
+        self.product_versions = product_versions or {}
+
+    def price_basket(self, *, items: Iterable[dict]) -> dict:
+        """
+        Количества одного варианта складываются. Для вариантов не под заказ количество ограничивается остатком,
+        стоимость считается по ограниченному количеству. Неизвестные и снятые с продажи варианты
+        возвращаются в missing.
+        """
+        quantities: dict[str, int] = {}
+        for item in items:
+            quantities[item["id"]] = quantities.get(item["id"], 0) + item["quantity"]
+        total_cost = discount = Decimal(0)
+        elements, missing = [], []
+        for variant_id, requested_quantity in quantities.items():
+            entry = self.entries.get(variant_id)
+            if entry is None:
+                missing.append(variant_id)
+                continue
+            quantity = requested_quantity
+            if not entry.to_order:
+                quantity = min(requested_quantity, max(int(entry.quantity or 0), 0))
+            item_cost = entry.price * quantity
+            item_discount = entry.discount * quantity
+            total_cost += item_cost
+            discount += item_discount
+            elements.append({
+                "variant_product": entry.payload,
+                "quantity": quantity,
+                "requested_quantity": requested_quantity,
+                "item_cost": item_cost,
+                "item_discount": item_discount,
+                "item_cost_with_discount": item_cost - item_discount,
+            })
+        return {
+            "cost_info": {
+                "basket_total_cost": total_cost,
+                "basket_discount": discount,
+                "basket_with_discount": total_cost - discount,
+            },
+            "basket_elements": elements,
+            "missing": missing,
+        }
+
+
+def variant_price_entries__build(*, product_ids: Iterable[str] | None = None) -> dict[str, VariantPriceDto]:
+    # Сериализаторы сами читают версию снимка через basket_totals, поэтому импорт внутри функции.
+    from apps.market.api.serializers import VariantSerializer
+
+    variants = (
+        Variant.objects.get_variant_discount()
+        .filter(is_active=True, archived=False)
+        .select_related("product__label")
+        .prefetch_related(
+            "characteristics__type",
+            Prefetch(
+                "product__images",
+                queryset=ProductImage.objects.filter(priority=0).order_by("pk"),
+                to_attr="preview_images",
+            ),
+        )
+    )
+    if product_ids is not None:
+        variants = variants.filter(product_id__in=list(product_ids))
+    return {
+        variant.id: VariantPriceDto(
+            product_id=variant.product_id,
+            price=variant.price or Decimal(0),
+            discount=variant.variant_discount or Decimal(0),
+            quantity=variant.quantity,
+            to_order=bool(variant.to_order),
+            payload=dict(VariantSerializer(variant).data),
+        )
+        for variant in variants
+    }
+
+
+@contextmanager
+def variant_price_snapshot__lock() -> Iterator[None]:
+    """
+    Пересборки снимка в разных процессах выполняются по очереди, иначе одновременные записи индекса теряют товары.
+    Блокировка - ключ в общем кеше: add записывает его, только если ключа нет. Ключ истекает сам,
+    если процесс упал, не сняв блокировку.
+    """
+    token = uuid.uuid4().hex
+    while not cache.add(VARIANT_PRICE_LOCK_KEY, token, timeout=VARIANT_PRICE_SNAPSHOT_LOCK_TIMEOUT):
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        if cache.get(VARIANT_PRICE_LOCK_KEY) == token:
+            cache.delete(VARIANT_PRICE_LOCK_KEY)
+
+
+def variant_price_entries__by_product(*, entries: dict[str, VariantPriceDto]) -> dict[str, dict[str, VariantPriceDto]]:
+    grouped: dict[str, dict[str, VariantPriceDto]] = defaultdict(dict)
+    for variant_id, entry in entries.items():
+        grouped[entry.product_id][variant_id] = entry
+    return grouped
+
+
+def variant_price_snapshot__refresh(*, product_ids: Iterable[str] | None = None) -> dict:
+    """
+    Пересобирает записи вариантов указанных товаров и публикует их в кеш под новой версией.
+    Перезаписываются только записи изменённых товаров и индекс, а не весь снимок.
+    Без product_ids или без индекса в кеше снимок собирается целиком.
+
+    return: индекс снимка
+    """
+    with variant_price_snapshot__lock():
+        stored = cache.get(VARIANT_PRICE_INDEX_KEY)
+        products: dict[str, int] = dict(stored["products"]) if stored is not None else {}
+        if stored is None or product_ids is None:
+            # При полной сборке из снимка пропадают все товары, которых в ней нет.
+            product_ids, requested, products = None, set(products), {}
+        else:
+            requested = set(product_ids)
+        grouped = variant_price_entries__by_product(entries=variant_price_entries__build(product_ids=product_ids))
+        version = time.time_ns()
+        # Товары без активных вариантов пропадают из снимка.
+        removed = requested - set(grouped)
+        for product_id in removed:
+            products.pop(product_id, None)
+        products.update({product_id: version for product_id in grouped})
+        cache.set_many(
+            {VARIANT_PRICE_PRODUCT_KEY.format(product_id=product_id): items for product_id, items in grouped.items()},
+            timeout=None,
+        )
+        cache.delete_many([VARIANT_PRICE_PRODUCT_KEY.format(product_id=product_id) for product_id in removed])
+        cache.set_many(
+            {
+                VARIANT_PRICE_PRODUCT_VERSION_KEY.format(product_id=product_id): version
+                for product_id in requested | set(grouped)
+            },
+            timeout=None,
+        )
+        index = {"version": version, "products": products}
+        cache.set(VARIANT_PRICE_INDEX_KEY, index, timeout=None)
+        cache.set(VARIANT_PRICE_VERSION_KEY, version, timeout=None)
+    logger.info("variant_price_snapshot__refresh", products=len(grouped), removed=len(removed))
+    return index
+
+
+def variant_price_product_versions__get(*, product_ids: Iterable[str]) -> dict[str, int | None]:
+    """
+    Версии снимка для товаров одним запросом к кешу. Для товаров, которые ещё не пересобирались, версия None.
+    """
+    keys = {VARIANT_PRICE_PRODUCT_VERSION_KEY.format(product_id=product_id): product_id for product_id in product_ids}
+    versions = cache.get_many(list(keys))
+    return {product_id: versions.get(key) for key, product_id in keys.items()}
+
+
+def variant_price_snapshot__load(*, current: VariantPriceSnapshot | None = None) -> VariantPriceSnapshot:
+    """
+    Снимок по индексу в кеше. Из кеша читаются только товары, версия которых отличается от текущего снимка,
+    остальные записи переносятся из него. Товары, вытесненные из кеша, пересобираются.
+    """
+    index = cache.get(VARIANT_PRICE_INDEX_KEY) or variant_price_snapshot__refresh()
+    known = current.product_versions if current is not None else {}
+    changed = {product_id for product_id, version in index["products"].items() if known.get(product_id) != version}
+    keys = {VARIANT_PRICE_PRODUCT_KEY.format(product_id=product_id): product_id for product_id in changed}
+    stored = cache.get_many(list(keys))
+    missing = {product_id for key, product_id in keys.items() if key not in stored}
+    if missing:
+        logger.warning("variant_price_snapshot__missing_products", products=len(missing))
+        variant_price_snapshot__refresh(product_ids=missing)
+        stored.update(cache.get_many([key for key, product_id in keys.items() if product_id in missing]))
+    entries = {
+        variant_id: entry
+        for variant_id, entry in (current.entries.items() if current is not None else ())
+        if entry.product_id in index["products"] and entry.product_id not in changed
+    }
+    for items in stored.values():
+        entries.update(items)
+    return VariantPriceSnapshot(entries=entries, version=index["version"], product_versions=dict(index["products"]))
+
+
+_variant_price_snapshot: VariantPriceSnapshot | None = None
+_variant_price_checked_at = 0.0
+_variant_price_lock = threading.Lock()
+
+
+def variant_price_snapshot__get() -> VariantPriceSnapshot:
+    """
+    Снимок текущего процесса. Версия в кеше проверяется не чаще VARIANT_PRICE_SNAPSHOT_POLL_INTERVAL секунд,
+    при смене версии из кеша дочитываются изменённые товары. В базу процесс идёт, только если снимка нет в кеше.
+    """
+    global _variant_price_snapshot, _variant_price_checked_at
+    snapshot = _variant_price_snapshot
+    if snapshot is not None and time.monotonic() - _variant_price_checked_at < VARIANT_PRICE_SNAPSHOT_POLL_INTERVAL:
+        return snapshot
+    with _variant_price_lock:
+        current = _variant_price_snapshot
+        # Если снимок уже обновил другой поток, версию повторно не проверяем.
+        if current is None or (current is snapshot and cache.get(VARIANT_PRICE_VERSION_KEY) != current.version):
+            current = _variant_price_snapshot = variant_price_snapshot__load(current=current)
+        _variant_price_checked_at = time.monotonic()
+        return current
@@ -1,12 +1,12 @@
 from datetime import datetime
 from decimal import Decimal
 
-from django.db.models import Q, QuerySet
+from django.db.models import Exists, OuterRef, Prefetch, Q, QuerySet
 from rest_framework.exceptions import ValidationError
 
 from apps.market.constants import BASKET_WRONG_PK
 from apps.market.enum import PaymentMethod, PaymentStatus, BasketStatus
-from apps.market.models import Basket, ItemBasket
+from apps.market.models import Basket, ItemBasket, ProductImage, Variant
 from apps.shipping_and_payment.models import PaymentVariant
 
 
@@ -14,6 +14,32 @@ def items__all() -> QuerySet[ItemBasket]:
     return ItemBasket.objects.all()
 
 
+def items__with_variants() -> QuerySet[ItemBasket]:
+    """
+    Позиции со всем, что нужно ItemBasketSerializer и итогам корзины: вариант с товаром, лейблом,
+    характеристиками и превью. another_variant_available - есть ли у товара вариант в наличии или под заказ.
+    """
+    available_variants = Variant.objects.filter(product_id=OuterRef("variant_product__product_id")).filter(
+        Q(quantity__gt=0) | Q(to_order=True)
+    )
+    return (
+        ItemBasket.objects.select_related("variant_product__product__label")
+        .prefetch_related(
+            "variant_product__characteristics__type",
+            Prefetch(
+                "variant_product__product__images",
+                queryset=ProductImage.objects.filter(priority=0).order_by("pk"),
+                to_attr="preview_images",
+            ),
+        )
+        .annotate(another_variant_available=Exists(available_variants))
+    )
+
+
+def baskets__prefetch_items(*, qs: QuerySet[Basket]) -> QuerySet[Basket]:
+    return qs.prefetch_related(Prefetch("item_baskets", queryset=items__with_variants()))
+
+
 def items__by_basket(
     *, basket: Basket, qs: QuerySet[ItemBasket] = None
 ) -> QuerySet[ItemBasket]:
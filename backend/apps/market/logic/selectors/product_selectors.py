@@ -1,51 +1,173 @@
-from django.db.models import QuerySet, Q, Max, Min, Case, When, F
-from django.db.models.functions import Least
+import re
+from typing import Iterable
 
-from apps.market.models import Variant, Product, Brand
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramWordSimilarity)
+from django.db.models import (Case, F, FloatField, Max, Min, Model, Prefetch,
+                              Q, QuerySet, Value, When,
+                              prefetch_related_objects)
+from django.db.models.functions import Coalesce, JSONObject, Least
 
+from apps.market.constants import SEARCH_CONFIG, SEARCH_TRIGRAM_MIN_LENGTH
+from apps.market.enum import TypeLabel
+from apps.market.logic.interactors.category_tree import category_tree__get
+from apps.market.models import (Brand, Category, Label, Product,
+                                ProductCharacteristics, ProductCrossSale,
+                                ProductImage, Variant)
 
-def get_variants__from_products(products: QuerySet[Product]) -> QuerySet:
-    queryset_variants = Variant.objects.filter(
-            Q(product_id__in=products)
-            & Q(price__gt=0)
-            & Q(Q(quantity__gt=0) | Q(to_order=True))
-        )
-    return queryset_variants
+
+def get_products__by_internal_ids(*, queryset: QuerySet[Product], list_ids: list[int]) -> QuerySet:
+    qs = queryset.filter(internal__id__in=list_ids)
+    return qs
 
 
-def get_brants__from_products(*, products: QuerySet[Product]) -> QuerySet:
-    brands = Brand.objects.filter(
-        products__id__in=products.values_list('id', flat=True)
-    ).values('id', 'name').order_by('name', 'id').distinct('name', 'id')
-    return brands
+def get_products__empty() -> QuerySet[Product]:
+    return Product.objects.none()
 
 
-def get_price_ranges__from_variants(*, variants: QuerySet[Variant]) -> QuerySet:
-    price_range = variants.only("price", "sale_price").aggregate(
-        max_price=Max("price"),
-        min_price=Min(
-            Case(
-                When(sale_price__gt=0, then=Least(F("sale_price"), F("price"))),
-                default="price",
-            )
+def get_promotion_label() -> dict | None:
+    return Label.objects.filter(type_label=TypeLabel.PROMOTION).values().first()
+
+
+def products__prefetch_for_list(*, products: list[Product]) -> list[Product]:
+    """
+    Подгружает пачкой всё, что нужно ProductListSerializer: варианты, лейблы, превью (priority=0)
+    и характеристики h1/item_title. Превью и характеристики кладутся в preview_images и title_characteristics.
+    """
+    prefetch_related_objects(
+        products,
+        "label",
+        "variants",
+        Prefetch(
+            "images",
+            queryset=ProductImage.objects.filter(priority=0).order_by("pk"),
+            to_attr="preview_images",
+        ),
+        Prefetch(
+            "characteristics",
+            queryset=ProductCharacteristics.objects.filter(
+                Q(type__name="h1") | Q(type__name__endswith="item_title")
+            ).select_related("type").order_by("pk"),
+            to_attr="title_characteristics",
         ),
     )
-    return price_range
+    return products
 
 
-def get_characteristics__from_variants(*, variants: QuerySet[Variant]) -> QuerySet:
-    variant_characteristics = variants.filter(product__exclude_from_filter=False).annotate(
-            params=F("characteristics__type__name"),
-            sizes=F("characteristics__value"),
-        ).distinct("sizes").values("params", "sizes")
-    return variant_characteristics
+def categories__prefetch_family(*, categories: list[Category]) -> list[Category]:
+    """
+    Значения семейства и дочерних категорий для CategorySerializer одним запросом по дереву категорий в памяти.
+    Кладутся в family_values и children_values в формате get_family().values() и get_children().values().
+    """
+    tree = category_tree__get()
+    family = {category.id: tree.family_ids(category_id=category.id) for category in categories}
+    ids = {category_id for category_ids in family.values() for category_id in category_ids}
+    values = {row["id"]: row for row in Category.objects.filter(id__in=ids).values()}
+    for category in categories:
+        category.family_values = [values[category_id] for category_id in family[category.id] if category_id in values]
+        category.children_values = [
+            values[category_id] for category_id in tree.children_ids(category_id=category.id) if category_id in values
+        ]
+    return categories
 
 
-def get_products__by_internal_ids(*, queryset: QuerySet[Product], list_ids: list[int]) -> QuerySet:
-    qs = queryset.filter(internal__id__in=list_ids)
-    return qs
+def product__prefetch_for_detail(*, product: Product) -> Product:
+    """
+    Подгружает всё, что нужно ProductSerializer: число запросов не зависит от количества вариантов,
+    изображений и категорий товара. Заполняет те же атрибуты, что products__prefetch_for_list.
+    """
+    prefetch_related_objects(
+        [product],
+        "label",
+        "brand",
+        "tags",
+        "category",
+        "images",
+        "cross_sale",
+        Prefetch("characteristics", queryset=ProductCharacteristics.objects.select_related("type")),
+        Prefetch("variants", queryset=Variant.objects.prefetch_related("characteristics__type")),
+    )
+    product.preview_images = sorted(
+        (image for image in product.images.all() if image.priority == 0), key=lambda image: image.pk
+    )
+    product.title_characteristics = sorted(
+        (
+            item for item in product.characteristics.all()
+            if item.type.name == "h1" or item.type.name.endswith("item_title")
+        ),
+        key=lambda item: item.pk,
+    )
+    product.promotion_label = get_promotion_label()
+    categories__prefetch_family(categories=list(product.category.all()))
+    return product
 
 
-def get_products__empty() -> QuerySet[Product]:
-    return Product.objects.none()
+def product_cross_sale__get_items(*, product_id: str) -> list[dict] | None:
+    return ProductCrossSale.objects.filter(product_id=product_id).values_list("items", flat=True).first()
+
+
+def get_stored_values(*, instance: Model, fields: Iterable[str]) -> dict | None:
+    """
+    Значения полей объекта, сохранённые в базе. None, если объекта в базе нет.
+    """
+    return type(instance)._base_manager.filter(pk=instance.pk).values(*fields).first()
+
+
+def get_filter_params__from_products(*, products: QuerySet[Product]) -> dict:
+    """
+    Бренды, диапазон цен и значения характеристик отфильтрованных товаров.
+    Цены и характеристики берутся у вариантов с ценой и остатком или под заказ.
+    """
+    product_ids = products.values("id")
+    variants = Variant.objects.filter(
+        Q(product_id__in=product_ids) & Q(price__gt=0) & Q(Q(quantity__gt=0) | Q(to_order=True))
+    )
+    brands = Brand.objects.filter(id__in=products.values("brand_id")).aggregate(
+        brands=ArrayAgg(JSONObject(id="id", name="name"), ordering=("name", "id"), default=Value([]))
+    )["brands"]
+    price_range = variants.aggregate(
+        max_price=Max("price"),
+        min_price=Min(Case(When(sale_price__gt=0, then=Least("sale_price", "price")), default="price")),
+    )
+    characteristics = list(
+        variants.annotate(params=F("characteristics__type__name"), sizes=F("characteristics__value"))
+        .order_by("sizes")
+        .distinct("sizes")
+        .values("params", "sizes")
+    )
+    return {
+        "characteristics": characteristics,
+        "price_range": price_range,
+        "brands": brands,
+    }
+
+
+def search_query__prefix(*, value: str) -> str:
+    """
+    Строка tsquery для поиска по мере набора: все слова обязательны, последнее ищется по префиксу.
+    """
+    words = re.findall(r'\w+', value.lower())
+    if not words:
+        return ''
+    return ' & '.join(words[:-1] + [f'{words[-1]}:*'])
+
 
+def products__search(*, products: QuerySet[Product], value: str) -> QuerySet[Product]:
+    """
+    Товары, подходящие под поисковую строку, по убыванию релевантности.
+    Полнотекстовый поиск дополняется триграммами по названию (опечатки) и подстрокой кода и артикула.
+    """
+    value = value.strip()
+    raw_query = search_query__prefix(value=value)
+    if not raw_query:
+        return products.none()
+    query = SearchQuery(raw_query, search_type='raw', config=SEARCH_CONFIG)
+    condition = Q(search_vector=query) | Q(article__icontains=value) | Q(code__icontains=value)
+    rank = SearchRank(F('search_vector'), query)
+    if len(value) >= SEARCH_TRIGRAM_MIN_LENGTH:
+        condition |= Q(name__trigram_word_similar=value)
+        rank = rank + TrigramWordSimilarity(value, 'name')
+    return products.filter(condition).annotate(
+        search_rank=Coalesce(rank, Value(0.0), output_field=FloatField())
+    ).order_by('-search_rank')
@@ -0,0 +1,85 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.market.benchmark.catalog import catalog__cleanup, catalog__generate
+from apps.market.benchmark.runner import (benchmark__compare, benchmark__run,
+                                          git__commit)
+from apps.market.dto.benchmark import CatalogSizeDto
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон горячих путей витрины на синтетическом каталоге. '
+        'Каталог сохраняется в базе, чтобы обработчики после коммита выполнялись и попадали в замеры, '
+        'и удаляется после прогона. Запускать на отдельной базе.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--variants', type=int, default=4, help='Вариантов на товар')
+        parser.add_argument('--characteristics', type=int, default=5, help='Характеристик на товар и вариант')
+        parser.add_argument('--images', type=int, default=3, help='Изображений на товар')
+        parser.add_argument('--categories', type=int, default=30)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--only', nargs='*', help='Имена эндпоинтов, например products.list')
+        parser.add_argument('--output', type=Path, help='JSON-файл с результатами')
+        parser.add_argument('--compare', type=Path, help='JSON предыдущего прогона для сравнения')
+        parser.add_argument(
+            '--threshold', type=float, default=20.0, help='Допустимый рост p95 в процентах при сравнении'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        size = CatalogSizeDto(
+            products=options['products'],
+            variants=options['variants'],
+            characteristics=options['characteristics'],
+            images=options['images'],
+            categories=options['categories'],
+        )
+        with override_settings(QUERY_BUDGET_ENABLED=False):
+            with transaction.atomic():
+                catalog = catalog__generate(size=size, seed=options['seed'])
+            try:
+                endpoints = benchmark__run(
+                    catalog=catalog,
+                    seed=options['seed'],
+                    iterations=options['iterations'],
+                    warmup=options['warmup'],
+                    only=options['only'],
+                )
+            finally:
+                catalog__cleanup(catalog=catalog)
+
+        report = {
+            'commit': git__commit(),
+            'created_at': datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+            'seed': options['seed'],
+            'size': size.dict(),
+            'endpoints': endpoints,
+        }
+        for name, result in endpoints.items():
+            self.stdout.write(
+                f"{name:32} p50 {result['p50_ms']:>9} мс  p95 {result['p95_ms']:>9} мс  "
+                f"запросов {result['queries']:>4}  память {result['memory_peak_kb']:>9} КБ"
+            )
+        if options['output']:
+            options['output'].write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        if options['compare']:
+            baseline = json.loads(options['compare'].read_text())
+            regressions = benchmark__compare(
+                current=endpoints, baseline=baseline['endpoints'], threshold=options['threshold']
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии относительно {}:\n{}'.format(baseline.get('commit'), '\n'.join(regressions))
+                )
+            self.stdout.write(f"Регрессий относительно {baseline.get('commit')} нет")
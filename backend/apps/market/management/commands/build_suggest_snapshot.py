@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from apps.market.logic.interactors.suggest_index import suggest_snapshot__build
+
+
+class Command(BaseCommand):
+    help = 'Собирает снимок индекса поисковых подсказок в общем кеше, из него индекс загружают процессы'
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        snapshot = suggest_snapshot__build()
+        self.stdout.write(f'Товаров в снимке подсказок: {len(snapshot["entries"])}, номер ленты: {snapshot["seq"]}')
@@ -0,0 +1,76 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+
+from apps.credentials.models import TinkoffCredentials
+from apps.market.benchmark.checkout_funnel import (checkout_funnel__prepare,
+                                                   checkout_funnel__run)
+from apps.market.benchmark.runner import git__commit
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный сценарий воронки покупки против запущенного сервера: каталог, фильтр, карточка, '
+        'добавление в корзину, заполнение корзины, оформление и ссылка на оплату. '
+        'Внешние сервисы подменяются заглушками run_integration_stubs. Создаёт пользователей в базе.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--base-url', default='http://localhost:8000')
+        parser.add_argument('--concurrency', type=int, default=10, help='Одновременных покупателей')
+        parser.add_argument('--duration', type=float, default=60, help='Длительность прогона в секундах')
+        parser.add_argument(
+            '--hot-variants', type=int, help='Ограничить пул вариантов, чтобы покупатели спорили за остатки'
+        )
+        parser.add_argument('--think-ms', type=int, default=0, help='Пауза покупателя между шагами, до N мс')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--lock-interval', type=float, default=0.5, help='Период опроса ожиданий блокировок')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', type=Path, help='JSON-файл с результатами')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        setup = checkout_funnel__prepare(
+            users=options['concurrency'], hot_variants=options['hot_variants'], seed=options['seed']
+        )
+        if not setup.items:
+            raise CommandError('В базе нет вариантов на витрине, сценарию нечего покупать')
+        if not TinkoffCredentials.get_solo().terminal_key:
+            self.stderr.write('Не заполнен ключ терминала Tinkoff, шаг send_payment_url будет падать')
+
+        result = checkout_funnel__run(
+            base_url=options['base_url'],
+            setup=setup,
+            duration=options['duration'],
+            seed=options['seed'],
+            think_ms=options['think_ms'],
+            timeout=options['timeout'],
+            lock_interval=options['lock_interval'],
+        )
+        for step, step_result in result['steps'].items():
+            self.stdout.write(
+                f"{step:18} {step_result['throughput_rps']:>8} rps  ошибок {step_result['error_rate']:>7.2%}  "
+                f"p50 {step_result['p50_ms']:>9} мс  p95 {step_result['p95_ms']:>9} мс  {step_result['statuses']}"
+            )
+        lock_waits = result['lock_waits']
+        self.stdout.write(
+            f"Ожидания блокировок: максимум {lock_waits['max_waiting']}, в среднем {lock_waits['avg_waiting']}, "
+            f"суммарно {lock_waits['wait_seconds']} с, взаимоблокировок {lock_waits['deadlocks']}"
+        )
+        for query, count in lock_waits['queries'].items():
+            self.stdout.write(f"{count:>6}  {query}")
+
+        if options['output']:
+            report = {
+                'commit': git__commit(),
+                'created_at': datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+                'base_url': options['base_url'],
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'hot_variants': options['hot_variants'],
+                **result,
+            }
+            options['output'].write_text(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,56 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+
+from apps.market.benchmark.runner import git__commit
+from apps.market.benchmark.stock_reservation import (
+    stock_reservation__cleanup, stock_reservation__prepare,
+    stock_reservation__run)
+
+
+class Command(BaseCommand):
+    help = (
+        'Параллельное резервирование остатков: корзины спорят за несколько вариантов одного товара. '
+        'Завершается ошибкой, если остатки перепроданы или резерв разошёлся с позициями корзин. '
+        'Данные сценария удаляются после прогона. Запускать на отдельной базе.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--baskets', type=int, default=500)
+        parser.add_argument('--variants', type=int, default=5, help='Вариантов, за которые спорят корзины')
+        parser.add_argument('--stock', type=int, default=50, help='Остаток каждого варианта')
+        parser.add_argument('--concurrency', type=int, default=50, help='Одновременных оформлений')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', type=Path, help='JSON-файл с результатами')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        setup = stock_reservation__prepare(
+            baskets=options['baskets'], variants=options['variants'], stock=options['stock'], seed=options['seed']
+        )
+        try:
+            result = stock_reservation__run(setup=setup, concurrency=options['concurrency'])
+        finally:
+            stock_reservation__cleanup(setup=setup)
+
+        self.stdout.write(
+            f"Корзин {result.baskets}: зарезервировано {result.reserved}, нехватка {result.shortages}, "
+            f"ошибок {result.errors}, взаимоблокировок {result.deadlocks}"
+        )
+        self.stdout.write(f"{result.throughput_rps} оформлений/с  p50 {result.p50_ms} мс  p95 {result.p95_ms} мс")
+        if options['output']:
+            report = {
+                'commit': git__commit(),
+                'created_at': datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+                'concurrency': options['concurrency'],
+                **result.dict(),
+            }
+            options['output'].write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        if result.violations:
+            raise CommandError('Остатки разошлись:\n{}'.format('\n'.join(result.violations)))
+        if result.errors or result.deadlocks:
+            raise CommandError(f'Ошибок {result.errors}, взаимоблокировок {result.deadlocks}')
+        self.stdout.write('Перепродажи нет')
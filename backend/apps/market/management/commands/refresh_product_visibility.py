@@ -0,0 +1,22 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.market.logic.interactors.product_card import product_cards__rebuild
+from apps.market.logic.interactors.product_visibility import \
+    products__refresh_visibility
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает флаг is_displayable всех товаров и карточки товаров на витрине'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--skip-cards', action='store_true', help='Не пересчитывать карточки ProductCard после флага'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        updated = products__refresh_visibility()
+        self.stdout.write(f'Пересчитан флаг витрины: {updated}')
+        if not options['skip_cards']:
+            self.stdout.write(f'Пересчитано карточек: {product_cards__rebuild()}')
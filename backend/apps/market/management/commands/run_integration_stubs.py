@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.market.benchmark.stubs import integration_stubs__serve
+
+
+class Command(BaseCommand):
+    help = (
+        'Локальные заглушки Tinkoff, СДЭК и SMS.ru для нагрузочного прогона. '
+        'Бекенд запускается с DJANGO_TINKOFF_API_URL=http://<host>:<port>/tinkoff/.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+        parser.add_argument('--latency-ms', type=int, default=0, help='Задержка ответа внешнего сервиса')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        base_url = f"http://{options['host']}:{options['port']}"
+        self.stdout.write(
+            f"Заглушки запущены: {base_url}/tinkoff/, {base_url}/cdek/, {base_url}/smsru/"
+        )
+        integration_stubs__serve(host=options['host'], port=options['port'], latency_ms=options['latency_ms'])
@@ -0,0 +1,121 @@
+# Generated by Django 4.2.2 on 2026-10-17 16:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductCard",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="card",
+                        serialize=False,
+                        to="market.product",
+                        verbose_name="Товар",
+                    ),
+                ),
+                (
+                    "min_price",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=20,
+                        null=True,
+                        verbose_name="Минимальная цена",
+                    ),
+                ),
+                (
+                    "max_price",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=20,
+                        null=True,
+                        verbose_name="Максимальная цена",
+                    ),
+                ),
+                (
+                    "price_discount",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=20,
+                        null=True,
+                        verbose_name="Минимальная цена распродажи",
+                    ),
+                ),
+                (
+                    "price_for_filter",
+                    models.DecimalField(
+                        blank=True,
+                        db_index=True,
+                        decimal_places=2,
+                        max_digits=20,
+                        null=True,
+                        verbose_name="Цена для фильтрации",
+                    ),
+                ),
+                (
+                    "price_variants",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Цены вариантов"
+                    ),
+                ),
+                (
+                    "price_label",
+                    models.JSONField(blank=True, null=True, verbose_name="Ценник"),
+                ),
+                (
+                    "image_preview",
+                    models.JSONField(blank=True, null=True, verbose_name="Превью"),
+                ),
+                (
+                    "label",
+                    models.JSONField(blank=True, null=True, verbose_name="Лейбл"),
+                ),
+                (
+                    "variants",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        verbose_name="Идентификаторы вариантов",
+                    ),
+                ),
+                ("h1", models.TextField(blank=True, null=True, verbose_name="h1")),
+                (
+                    "custom_item_title",
+                    models.TextField(
+                        blank=True, null=True, verbose_name="Заголовок товара"
+                    ),
+                ),
+                (
+                    "in_stock",
+                    models.BooleanField(default=False, verbose_name="Есть в наличии"),
+                ),
+                (
+                    "to_order",
+                    models.BooleanField(
+                        default=False, verbose_name="Есть варианты под заказ"
+                    ),
+                ),
+                (
+                    "refreshed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Время пересчёта"),
+                ),
+            ],
+            options={
+                "verbose_name": "Карточка товара",
+                "verbose_name_plural": "Карточки товаров",
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.2 on 2026-10-17 16:11
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0002_productcard"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True,
+                editable=False,
+                help_text="Название, коды, бренд, коды вариантов, характеристики и описание товара для полнотекстового поиска.",
+                null=True,
+                verbose_name="Поисковый вектор",
+            ),
+        ),
+        # Заполнение вектора существующих товаров, веса как в product_search_vector__expression.
+        migrations.RunSQL(
+            sql="""
+                UPDATE market_product AS product SET search_vector =
+                    setweight(to_tsvector('russian', concat_ws(' ',
+                        COALESCE(product.name, ''), COALESCE(product.code, ''), COALESCE(product.article, '')
+                    )), 'A')
+                    || setweight(to_tsvector('russian', COALESCE(brand.name, '')), 'B')
+                    || setweight(to_tsvector('russian', COALESCE((
+                        SELECT string_agg(variant.code, ' ') FROM market_variant AS variant
+                        WHERE variant.product_id = product.id
+                    ), '')), 'B')
+                    || setweight(to_tsvector('russian', COALESCE((
+                        SELECT string_agg(characteristic.value, ' ')
+                        FROM market_productcharacteristics AS characteristic
+                        WHERE characteristic.product_id = product.id
+                    ), '')), 'C')
+                    || setweight(to_tsvector('russian', COALESCE(product.description, '')), 'D')
+                FROM market_product AS source
+                LEFT JOIN market_brand AS brand ON brand.id = source.brand_id
+                WHERE source.id = product.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="product_search_vector_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"],
+                name="product_name_trgm_idx",
+                opclasses=("gin_trgm_ops",),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("article"),
+                    name="gin_trgm_ops",
+                ),
+                name="product_article_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("code"), name="gin_trgm_ops"
+                ),
+                name="product_code_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 4.2.2 on 2026-10-17 16:15
+
+from django.db import migrations, models
+import pgtrigger.compiler
+import pgtrigger.migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0003_product_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="effective_min_price",
+            field=models.DecimalField(
+                blank=True,
+                db_index=True,
+                decimal_places=2,
+                editable=False,
+                help_text="Минимальная цена активных вариантов с учётом цены распродажи. Используется фильтром по цене.",
+                max_digits=20,
+                null=True,
+                verbose_name="Минимальная цена с учётом скидки",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="has_discount",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                editable=False,
+                help_text="У одного из активных вариантов указана цена распродажи.",
+                verbose_name="Есть скидка",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="max_price",
+            field=models.DecimalField(
+                blank=True,
+                db_index=True,
+                decimal_places=2,
+                editable=False,
+                help_text="Максимальная цена активных вариантов. Пересчитывается триггером при изменении вариантов.",
+                max_digits=20,
+                null=True,
+                verbose_name="Максимальная цена",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="min_price",
+            field=models.DecimalField(
+                blank=True,
+                db_index=True,
+                decimal_places=2,
+                editable=False,
+                help_text="Минимальная цена активных вариантов. Пересчитывается триггером при изменении вариантов.",
+                max_digits=20,
+                null=True,
+                verbose_name="Минимальная цена",
+            ),
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name="product",
+            trigger=pgtrigger.compiler.Trigger(
+                name="product_prices_refresh",
+                sql=pgtrigger.compiler.UpsertTriggerSql(
+                    func="\n    SELECT\n        MIN(variant.price),\n        MAX(variant.price),\n        MIN(CASE WHEN variant.sale_price > 0 THEN variant.sale_price ELSE variant.price END),\n        COALESCE(BOOL_OR(variant.sale_price > 0), FALSE)\n    INTO NEW.min_price, NEW.max_price, NEW.effective_min_price, NEW.has_discount\n    FROM market_variant AS variant\n    WHERE variant.product_id = NEW.id AND variant.is_active AND variant.price > 0;\n    RETURN NEW;\n",
+                    hash="c8395c72249904d78c978fc37b3dad94be996a36",
+                    operation="INSERT OR UPDATE",
+                    pgid="pgtrigger_product_prices_refresh_256d4",
+                    table="market_product",
+                    when="BEFORE",
+                ),
+            ),
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name="variant",
+            trigger=pgtrigger.compiler.Trigger(
+                name="variant_insert_product_prices",
+                sql=pgtrigger.compiler.UpsertTriggerSql(
+                    func="\n    UPDATE market_product SET has_discount = has_discount WHERE id IN (SELECT product_id FROM new_values);\n    RETURN NULL;\n",
+                    hash="ae07f7a826b1880b9c76016a20bc19c81ec4fd7c",
+                    level="STATEMENT",
+                    operation="INSERT",
+                    pgid="pgtrigger_variant_insert_product_prices_9121e",
+                    referencing="REFERENCING NEW TABLE AS new_values ",
+                    table="market_variant",
+                    when="AFTER",
+                ),
+            ),
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name="variant",
+            trigger=pgtrigger.compiler.Trigger(
+                name="variant_update_product_prices",
+                sql=pgtrigger.compiler.UpsertTriggerSql(
+                    func="\n    UPDATE market_product SET has_discount = has_discount WHERE id IN (\n    SELECT changed.product_id\n    FROM old_values\n    JOIN new_values ON new_values.id = old_values.id\n    CROSS JOIN LATERAL (VALUES (old_values.product_id), (new_values.product_id)) AS changed(product_id)\n    WHERE (old_values.price, old_values.sale_price, old_values.is_active, old_values.product_id)\n        IS DISTINCT FROM (new_values.price, new_values.sale_price, new_values.is_active, new_values.product_id)\n);\n    RETURN NULL;\n",
+                    hash="02881fd93b159874b8250e6145a6b955f56400ab",
+                    level="STATEMENT",
+                    operation="UPDATE",
+                    pgid="pgtrigger_variant_update_product_prices_e026a",
+                    referencing="REFERENCING OLD TABLE AS old_values  NEW TABLE AS new_values ",
+                    table="market_variant",
+                    when="AFTER",
+                ),
+            ),
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name="variant",
+            trigger=pgtrigger.compiler.Trigger(
+                name="variant_delete_product_prices",
+                sql=pgtrigger.compiler.UpsertTriggerSql(
+                    func="\n    UPDATE market_product SET has_discount = has_discount WHERE id IN (SELECT product_id FROM old_values);\n    RETURN NULL;\n",
+                    hash="0f02925b45dcac39a1497f7dcf10afed6fbf33f3",
+                    level="STATEMENT",
+                    operation="DELETE",
+                    pgid="pgtrigger_variant_delete_product_prices_e3f87",
+                    referencing="REFERENCING OLD TABLE AS old_values ",
+                    table="market_variant",
+                    when="AFTER",
+                ),
+            ),
+        ),
+        # Заполнение цен существующих товаров: значения считает триггер product_prices_refresh.
+        migrations.RunSQL(
+            sql="UPDATE market_product SET has_discount = has_discount;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.2 on 2026-10-17 16:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0004_product_prices"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductCrossSale",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="cross_sale",
+                        serialize=False,
+                        to="market.product",
+                        verbose_name="Товар",
+                    ),
+                ),
+                (
+                    "items",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Рекомендуемые товары"
+                    ),
+                ),
+                (
+                    "refreshed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Время пересчёта"),
+                ),
+            ],
+            options={
+                "verbose_name": "Список рекомендаций",
+                "verbose_name_plural": "Списки рекомендаций",
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.2 on 2026-10-17 16:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0005_productcrosssale"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="brand",
+            name="displayable_products_count",
+            field=models.PositiveIntegerField(
+                db_index=True,
+                default=0,
+                editable=False,
+                help_text="Число карточек ProductCard бренда. Пересчитывается при обновлении карточек.",
+                verbose_name="Товаров на витрине",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productcard",
+            name="brand",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="product_cards",
+                to="market.brand",
+                verbose_name="Бренд",
+            ),
+        ),
+        # Заполнение бренда существующих карточек и числа товаров брендов.
+        migrations.RunSQL(
+            sql="""
+                UPDATE market_productcard AS card SET brand_id = product.brand_id
+                FROM market_product AS product WHERE product.id = card.product_id;
+                UPDATE market_brand AS brand SET displayable_products_count = (
+                    SELECT COUNT(*) FROM market_productcard AS card WHERE card.brand_id = brand.id
+                );
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
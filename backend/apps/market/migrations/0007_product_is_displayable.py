@@ -0,0 +1,56 @@
+# Generated by Django 4.2.2 on 2026-10-17 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0006_brand_displayable_products_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="is_displayable",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                help_text="Пересчитывается при изменении товара, его вариантов и категорий.",
+                verbose_name="Выводится на витрину",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_displayable", True)),
+                fields=["-updated_at"],
+                name="product_displayable_idx",
+            ),
+        ),
+        # Заполнение флага существующих товаров по правилу product_visibility__condition.
+        migrations.RunSQL(
+            sql="""
+                UPDATE market_product AS product SET is_displayable = COALESCE(
+                    product.is_active
+                    AND NOT product.archived
+                    AND (product.weight IS NULL OR product.weight <> 0)
+                    AND EXISTS (
+                        SELECT 1 FROM market_product_category AS product_category
+                        WHERE product_category.product_id = product.id
+                    )
+                    AND EXISTS (
+                        SELECT 1 FROM market_variant AS variant
+                        WHERE variant.product_id = product.id AND variant.is_active AND NOT variant.archived
+                            AND variant.price > 0
+                    )
+                    AND EXISTS (
+                        SELECT 1 FROM market_variant AS variant
+                        WHERE variant.product_id = product.id AND variant.is_active AND NOT variant.archived
+                            AND (variant.quantity > 0 OR variant.to_order)
+                    ),
+                    FALSE
+                );
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.2 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0007_product_is_displayable"),
+    ]
+
+    operations = [
+        # Дубли варианта в одной корзине могли появиться из-за гонки get_or_create. Остаётся самая ранняя строка,
+        # в неё переносятся суммы количества и стоимостей дублей, чтобы корзины и заказы ничего не потеряли.
+        migrations.RunSQL(
+            sql="""
+                WITH totals AS (
+                    SELECT
+                        MIN(id) AS id,
+                        LEAST(SUM(quantity), 32767) AS quantity,
+                        SUM(item_total_cost) AS item_total_cost,
+                        SUM(item_total_cost_with_discount) AS item_total_cost_with_discount,
+                        SUM(item_discount) AS item_discount
+                    FROM market_itembasket
+                    WHERE variant_product_id IS NOT NULL
+                    GROUP BY basket_id, variant_product_id
+                    HAVING COUNT(*) > 1
+                )
+                UPDATE market_itembasket AS item SET
+                    quantity = totals.quantity,
+                    item_total_cost = totals.item_total_cost,
+                    item_total_cost_with_discount = totals.item_total_cost_with_discount,
+                    item_discount = totals.item_discount
+                FROM totals
+                WHERE item.id = totals.id;
+                DELETE FROM market_itembasket AS duplicate
+                USING market_itembasket AS original
+                WHERE duplicate.basket_id = original.basket_id
+                    AND duplicate.variant_product_id = original.variant_product_id
+                    AND duplicate.id > original.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="itembasket",
+            constraint=models.UniqueConstraint(
+                fields=("basket", "variant_product"), name="item_basket_unique_variant"
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.2 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0008_itembasket_unique_variant"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="basket",
+            name="reserved_until",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Время, после которого резерв остатков неоплаченного заказа снимается",
+                null=True,
+                verbose_name="Резерв до",
+            ),
+        ),
+        migrations.AddField(
+            model_name="itembasket",
+            name="reserved_quantity",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                help_text="Количество, зарезервированное из остатка варианта при оформлении заказа",
+                max_digits=20,
+                verbose_name="В резерве",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.2 on 2026-10-17 22:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0009_basket_reservation"),
+    ]
+
+    operations = [
+        # default модели Django не переносит в базу, а позиции корзины вставляются и сырым SQL.
+        migrations.RunSQL(
+            sql="ALTER TABLE market_itembasket ALTER COLUMN reserved_quantity SET DEFAULT 0;",
+            reverse_sql="ALTER TABLE market_itembasket ALTER COLUMN reserved_quantity DROP DEFAULT;",
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.2 on 2026-10-17 23:05
+
+from django.db import migrations
+import pgtrigger.compiler
+import pgtrigger.migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0010_itembasket_reserved_quantity_default"),
+    ]
+
+    operations = [
+        pgtrigger.migrations.RemoveTrigger(
+            model_name="product",
+            name="product_prices_refresh",
+        ),
+        pgtrigger.migrations.RemoveTrigger(
+            model_name="variant",
+            name="variant_update_product_prices",
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name="product",
+            trigger=pgtrigger.compiler.Trigger(
+                name="product_prices_refresh",
+                sql=pgtrigger.compiler.UpsertTriggerSql(
+                    func="\n    SELECT\n        MIN(variant.price),\n        MAX(variant.price),\n        MIN(CASE WHEN variant.sale_price > 0 THEN variant.sale_price ELSE variant.price END),\n        COALESCE(BOOL_OR(variant.sale_price > 0), FALSE)\n    INTO NEW.min_price, NEW.max_price, NEW.effective_min_price, NEW.has_discount\n    FROM market_variant AS variant\n    WHERE variant.product_id = NEW.id AND variant.is_active AND NOT variant.archived AND variant.price > 0;\n    RETURN NEW;\n",
+                    hash="3579e24f2be05a2071eacd40b418ba9824382075",
+                    operation="INSERT OR UPDATE",
+                    pgid="pgtrigger_product_prices_refresh_256d4",
+                    table="market_product",
+                    when="BEFORE",
+                ),
+            ),
+        ),
+        pgtrigger.migrations.AddTrigger(
+            model_name="variant",
+            trigger=pgtrigger.compiler.Trigger(
+                name="variant_update_product_prices",
+                sql=pgtrigger.compiler.UpsertTriggerSql(
+                    func="\n    UPDATE market_product SET has_discount = has_discount WHERE id IN (\n    SELECT changed.product_id\n    FROM old_values\n    JOIN new_values ON new_values.id = old_values.id\n    CROSS JOIN LATERAL (VALUES (old_values.product_id), (new_values.product_id)) AS changed(product_id)\n    WHERE (old_values.price, old_values.sale_price, old_values.is_active, old_values.archived, old_values.product_id)\n        IS DISTINCT FROM (\n            new_values.price, new_values.sale_price, new_values.is_active, new_values.archived, new_values.product_id\n        )\n);\n    RETURN NULL;\n",
+                    hash="5a503afb093433cedac75e9df727fa1f603eb207",
+                    level="STATEMENT",
+                    operation="UPDATE",
+                    pgid="pgtrigger_variant_update_product_prices_e026a",
+                    referencing="REFERENCING OLD TABLE AS old_values  NEW TABLE AS new_values ",
+                    table="market_variant",
+                    when="AFTER",
+                ),
+            ),
+        ),
+        # Цены уже сохранённых товаров пересчитываются триггером без архивных вариантов.
+        migrations.RunSQL(
+            sql="UPDATE market_product SET has_discount = has_discount;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
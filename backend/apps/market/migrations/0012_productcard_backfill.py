@@ -0,0 +1,24 @@
+# Generated by Django 4.2.2 on 2026-10-17 23:30
+
+from django.db import migrations
+
+
+def product_cards__backfill(apps, schema_editor) -> None:
+    # Поля карточки считает ProductListSerializer, поэтому карточки заполняются кодом приложения, а не SQL.
+    from apps.market.logic.interactors.product_card import \
+        product_cards__rebuild
+    from apps.market.logic.interactors.product_visibility import \
+        products__refresh_visibility
+
+    products__refresh_visibility()
+    product_cards__rebuild()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("market", "0011_product_prices_archived"),
+    ]
+
+    operations = [
+        migrations.RunPython(product_cards__backfill, reverse_code=migrations.RunPython.noop),
+    ]
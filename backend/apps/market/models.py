@@ -1,11 +1,15 @@
 import uuid
 
+import pgtrigger
 from colorfield.fields import ColorField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
 from django.db.models import (Case, DecimalField, F, Index, Min, Q, QuerySet,
                               Sum, When)
+from django.db.models.functions import Upper
 from mptt.models import TreeForeignKey
 
 from apps.market.enum import (BasketStatus, ColorSample, PaymentMethod,
@@ -15,6 +19,34 @@ from apps.user.models import User
 from utils.abstractions.model import AbstractBaseModel, AbstractionMPTTModel
 from utils.fields import ImageOrSVGField
 
+# Цены товара считаются по активным неархивным вариантам с ненулевой ценой.
+PRODUCT_PRICES_REFRESH_SQL = """
+    SELECT
+        MIN(variant.price),
+        MAX(variant.price),
+        MIN(CASE WHEN variant.sale_price > 0 THEN variant.sale_price ELSE variant.price END),
+        COALESCE(BOOL_OR(variant.sale_price > 0), FALSE)
+    INTO NEW.min_price, NEW.max_price, NEW.effective_min_price, NEW.has_discount
+    FROM market_variant AS variant
+    WHERE variant.product_id = NEW.id AND variant.is_active AND NOT variant.archived AND variant.price > 0;
+    RETURN NEW;
+"""
+# Значения пересчитывает триггер товара, здесь строки товаров только обновляются.
+VARIANT_PRODUCTS_TOUCH_SQL = """
+    UPDATE market_product SET has_discount = has_discount WHERE id IN ({product_ids});
+    RETURN NULL;
+"""
+VARIANT_PRICE_CHANGED_PRODUCT_IDS_SQL = """
+    SELECT changed.product_id
+    FROM old_values
+    JOIN new_values ON new_values.id = old_values.id
+    CROSS JOIN LATERAL (VALUES (old_values.product_id), (new_values.product_id)) AS changed(product_id)
+    WHERE (old_values.price, old_values.sale_price, old_values.is_active, old_values.archived, old_values.product_id)
+        IS DISTINCT FROM (
+            new_values.price, new_values.sale_price, new_values.is_active, new_values.archived, new_values.product_id
+        )
+"""
+
 
 class Category(AbstractionMPTTModel):
     class MPTTMeta:
@@ -170,6 +202,13 @@ class Brand(AbstractBaseModel):
         blank=True,
         null=True,
     )
+    displayable_products_count = models.PositiveIntegerField(
+        verbose_name='Товаров на витрине',
+        help_text='Число карточек ProductCard бренда. Пересчитывается при обновлении карточек.',
+        default=0,
+        db_index=True,
+        editable=False,
+    )
 
     def __str__(self) -> str:
         return self.name
@@ -200,15 +239,42 @@ class ProductManager(models.Manager):
         return queryset
 
     def get_products_on_display(self) -> QuerySet:
-        qs = self.model.objects.get_prepared_products()
-        queryset = qs.annotate(
-            min_variant_price=Min("variants__price", filter=Q(variants__price__gt=0)),
-            price_with_discount=Min('variants__sale_price'),
-            price_for_filter=Case(
-                When(price_with_discount=0, then='min_variant_price'),
-                default=Min('variants__sale_price', filter=Q(variants__sale_price__gt=0))
+        """
+        Товары на витрине по флагу is_displayable, который поддерживает product_visibility.
+        Цены считаются, как и раньше, по активным неархивным вариантам.
+        """
+        active_variants = Q(variants__is_active=True) & Q(variants__archived=False)
+        queryset = (
+            self.model.objects.get_queryset()
+            .filter(is_displayable=True)
+            .annotate(
+                min_variant_price=Min("variants__price", filter=active_variants & Q(variants__price__gt=0)),
+                price_with_discount=Min('variants__sale_price', filter=active_variants),
+                price_for_filter=Case(
+                    When(price_with_discount=0, then='min_variant_price'),
+                    default=Min('variants__sale_price', filter=active_variants & Q(variants__sale_price__gt=0))
+                )
+            )
+            .order_by("-updated_at")
+        )
+        return queryset
+
+    def get_product_cards(self) -> QuerySet:
+        """
+        Товары на витрине, собранные из предрасчитанных карточек ProductCard.
+        Аннотации повторяют get_products_on_display, чтобы фильтры ProductOrderingFilter работали без изменений.
+        """
+        queryset = (
+            self.model.objects.get_queryset()
+            .filter(card__isnull=False)
+            .select_related("card")
+            .annotate(
+                min_variant_price=F("card__min_price"),
+                price_with_discount=F("card__price_discount"),
+                price_for_filter=F("card__price_for_filter"),
             )
-        ).filter(Q(variants__quantity__gt=0) | Q(variants__to_order=True))
+            .order_by("-updated_at")
+        )
         return queryset
 
 
@@ -216,6 +282,23 @@ class Product(AbstractBaseModel):
     class Meta:
         verbose_name = 'Товар на витрине'
         verbose_name_plural = 'Товары на витрине'
+        indexes = (
+            GinIndex(fields=('search_vector',), name='product_search_vector_idx'),
+            GinIndex(fields=('name',), name='product_name_trgm_idx', opclasses=('gin_trgm_ops',)),
+            # icontains в PostgreSQL строится как UPPER(field) LIKE UPPER(value)
+            GinIndex(OpClass(Upper('article'), name='gin_trgm_ops'), name='product_article_trgm_idx'),
+            GinIndex(OpClass(Upper('code'), name='gin_trgm_ops'), name='product_code_trgm_idx'),
+            Index(fields=('-updated_at',), condition=Q(is_displayable=True), name='product_displayable_idx'),
+        )
+        triggers = (
+            pgtrigger.Trigger(
+                name='product_prices_refresh',
+                level=pgtrigger.Row,
+                when=pgtrigger.Before,
+                operation=pgtrigger.Insert | pgtrigger.Update,
+                func=PRODUCT_PRICES_REFRESH_SQL,
+            ),
+        )
 
     archived = models.BooleanField(
         verbose_name='Архивированный товар',
@@ -291,6 +374,56 @@ class Product(AbstractBaseModel):
         help_text='Активность товара',
         default=True,
     )
+    is_displayable = models.BooleanField(
+        verbose_name='Выводится на витрину',
+        help_text='Пересчитывается при изменении товара, его вариантов и категорий.',
+        default=False,
+        editable=False,
+    )
+    min_price = models.DecimalField(
+        verbose_name='Минимальная цена',
+        help_text='Минимальная цена активных вариантов. Пересчитывается триггером при изменении вариантов.',
+        decimal_places=2,
+        max_digits=20,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+    max_price = models.DecimalField(
+        verbose_name='Максимальная цена',
+        help_text='Максимальная цена активных вариантов. Пересчитывается триггером при изменении вариантов.',
+        decimal_places=2,
+        max_digits=20,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+    effective_min_price = models.DecimalField(
+        verbose_name='Минимальная цена с учётом скидки',
+        help_text='Минимальная цена активных вариантов с учётом цены распродажи. Используется фильтром по цене.',
+        decimal_places=2,
+        max_digits=20,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+    has_discount = models.BooleanField(
+        verbose_name='Есть скидка',
+        help_text='У одного из активных вариантов указана цена распродажи.',
+        default=False,
+        editable=False,
+        db_index=True,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        help_text='Название, коды, бренд, коды вариантов, характеристики и описание товара для полнотекстового поиска.',
+        null=True,
+        blank=True,
+        editable=False,
+    )
     brand = models.ForeignKey(
         to=Brand,
         verbose_name='Бренд',
@@ -374,6 +507,75 @@ class ShowcaseProduct(Product):
         proxy = True
 
 
+class ProductCard(AbstractBaseModel):
+    """
+    Денормализованная карточка товара для списка товаров на витрине.
+    Строка существует только для товаров, которые выводятся на витрину.
+    """
+
+    class Meta:
+        verbose_name = 'Карточка товара'
+        verbose_name_plural = 'Карточки товаров'
+
+    product = models.OneToOneField(
+        to=Product,
+        verbose_name='Товар',
+        related_name='card',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    brand = models.ForeignKey(
+        to=Brand,
+        verbose_name='Бренд',
+        related_name='product_cards',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    min_price = models.DecimalField(
+        verbose_name='Минимальная цена',
+        decimal_places=2,
+        max_digits=20,
+        null=True,
+        blank=True,
+    )
+    max_price = models.DecimalField(
+        verbose_name='Максимальная цена',
+        decimal_places=2,
+        max_digits=20,
+        null=True,
+        blank=True,
+    )
+    price_discount = models.DecimalField(
+        verbose_name='Минимальная цена распродажи',
+        decimal_places=2,
+        max_digits=20,
+        null=True,
+        blank=True,
+    )
+    price_for_filter = models.DecimalField(
+        verbose_name='Цена для фильтрации',
+        decimal_places=2,
+        max_digits=20,
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    price_variants = models.JSONField(verbose_name='Цены вариантов', default=list, blank=True)
+    price_label = models.JSONField(verbose_name='Ценник', null=True, blank=True)
+    image_preview = models.JSONField(verbose_name='Превью', null=True, blank=True)
+    label = models.JSONField(verbose_name='Лейбл', null=True, blank=True)
+    variants = models.JSONField(verbose_name='Идентификаторы вариантов', default=list, blank=True)
+    h1 = models.TextField(verbose_name='h1', null=True, blank=True)
+    custom_item_title = models.TextField(verbose_name='Заголовок товара', null=True, blank=True)
+    in_stock = models.BooleanField(verbose_name='Есть в наличии', default=False)
+    to_order = models.BooleanField(verbose_name='Есть варианты под заказ', default=False)
+    refreshed_at = models.DateTimeField(verbose_name='Время пересчёта', auto_now=True)
+
+    def __str__(self) -> str:
+        return f'Карточка товара {self.product_id}'
+
+
 class CrossSaleProduct(AbstractBaseModel):
     class Meta:
         verbose_name = 'Рекомендация'
@@ -390,6 +592,30 @@ class CrossSaleProduct(AbstractBaseModel):
                                     on_delete=models.CASCADE)
 
 
+class ProductCrossSale(AbstractBaseModel):
+    """
+    Предрасчитанный список рекомендаций товара для карточки товара.
+    Хранит только рекомендуемые товары, которые выводятся на витрину, в формате RecommendetProductSerializer.
+    """
+
+    class Meta:
+        verbose_name = 'Список рекомендаций'
+        verbose_name_plural = 'Списки рекомендаций'
+
+    product = models.OneToOneField(
+        to=Product,
+        verbose_name='Товар',
+        related_name='cross_sale',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    items = models.JSONField(verbose_name='Рекомендуемые товары', default=list, blank=True)
+    refreshed_at = models.DateTimeField(verbose_name='Время пересчёта', auto_now=True)
+
+    def __str__(self) -> str:
+        return f'Рекомендации товара {self.product_id}'
+
+
 class ProductImage(AbstractBaseModel):
     class Meta:
         verbose_name = 'Изображение товара'
@@ -450,6 +676,33 @@ class Variant(AbstractBaseModel):
     class Meta:
         verbose_name = 'Вариант'
         verbose_name_plural = 'Варианты'
+        # Триггеры уровня запроса: массовое обновление вариантов пересчитывает каждый товар один раз.
+        triggers = (
+            pgtrigger.Trigger(
+                name='variant_insert_product_prices',
+                level=pgtrigger.Statement,
+                when=pgtrigger.After,
+                operation=pgtrigger.Insert,
+                referencing=pgtrigger.Referencing(new='new_values'),
+                func=VARIANT_PRODUCTS_TOUCH_SQL.format(product_ids='SELECT product_id FROM new_values'),
+            ),
+            pgtrigger.Trigger(
+                name='variant_update_product_prices',
+                level=pgtrigger.Statement,
+                when=pgtrigger.After,
+                operation=pgtrigger.Update,
+                referencing=pgtrigger.Referencing(old='old_values', new='new_values'),
+                func=VARIANT_PRODUCTS_TOUCH_SQL.format(product_ids=VARIANT_PRICE_CHANGED_PRODUCT_IDS_SQL),
+            ),
+            pgtrigger.Trigger(
+                name='variant_delete_product_prices',
+                level=pgtrigger.Statement,
+                when=pgtrigger.After,
+                operation=pgtrigger.Delete,
+                referencing=pgtrigger.Referencing(old='old_values'),
+                func=VARIANT_PRODUCTS_TOUCH_SQL.format(product_ids='SELECT product_id FROM old_values'),
+            ),
+        )
 
     id = models.CharField(
         verbose_name='Идентификатор',
@@ -872,6 +1125,12 @@ class Basket(AbstractBaseModel):
         null=True,
         blank=True
     )
+    reserved_until = models.DateTimeField(
+        verbose_name='Резерв до',
+        help_text='Время, после которого резерв остатков неоплаченного заказа снимается',
+        null=True,
+        blank=True
+    )
     token = models.UUIDField(verbose_name='Токен платежа',
                              null=True,
                              blank=True
@@ -1076,6 +1335,9 @@ class ItemBasket(AbstractBaseModel):
         verbose_name = 'Товар в корзине'
         verbose_name_plural = 'Товары в корзине'
         ordering = ('id',)
+        constraints = (
+            models.UniqueConstraint(fields=('basket', 'variant_product'), name='item_basket_unique_variant'),
+        )
 
     code = models.CharField(
         verbose_name='Код варианта товара',
@@ -1119,6 +1381,13 @@ class ItemBasket(AbstractBaseModel):
         default=1,
         validators=[MinValueValidator(1)]
     )
+    reserved_quantity = models.DecimalField(
+        verbose_name='В резерве',
+        help_text='Количество, зарезервированное из остатка варианта при оформлении заказа',
+        decimal_places=2,
+        max_digits=20,
+        default=0,
+    )
     item_total_cost = models.DecimalField(
         verbose_name='Общая стоимость товара',
         help_text='Стоимость указанного количества одного наименования товара',
@@ -0,0 +1,147 @@
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from mptt.signals import node_moved
+
+from apps.market.constants import (FILTER_PARAMS_BRAND_FIELDS,
+                                   FILTER_PARAMS_PRODUCT_FIELDS,
+                                   FILTER_PARAMS_VARIANT_FIELDS)
+from apps.market.logic.facades.product_facades import (
+    filter_params__invalidate, filter_params__is_changed)
+from apps.market.logic.interactors.basket_totals import \
+    basket_totals__schedule_invalidate
+from apps.market.logic.interactors.catalog_refresh import (
+    CATALOG_REFRESH_CROSS_SALE, CATALOG_REFRESH_VARIANT_PRICE,
+    catalog__changed, catalog_refresh__schedule)
+from apps.market.logic.interactors.category_tree import \
+    category_tree__invalidate
+from apps.market.models import (Brand, Category, Characteristic,
+                                CrossSaleProduct, Favorite, ItemBasket, Label,
+                                Product, ProductCharacteristics, ProductImage,
+                                Tag, TagProduct, Variant,
+                                VariantCharacteristics)
+from utils.abstractions.response_cache import response_cache__connect
+
+FILTER_PARAMS_FIELDS: dict[type[Model], tuple[str, ...]] = {
+    Product: FILTER_PARAMS_PRODUCT_FIELDS,
+    Variant: FILTER_PARAMS_VARIANT_FIELDS,
+    Brand: FILTER_PARAMS_BRAND_FIELDS,
+}
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Variant)
+@receiver(pre_save, sender=Brand)
+def filter_params__on_pre_save(
+        sender: type[Model], instance: Model, update_fields: frozenset[str] | None, **kwargs: dict
+) -> None:
+    # Прежние значения есть только до записи, обработчики post_save читают результат сравнения из объекта.
+    instance._filter_params_changed = filter_params__is_changed(
+        instance=instance, fields=FILTER_PARAMS_FIELDS[sender], update_fields=update_fields
+    )
+
+
+def filter_params__changed_on_save(*, instance: Model) -> bool:
+    return getattr(instance, '_filter_params_changed', True)
+
+
+@receiver(post_save, sender=Product)
+def product_card__on_product_save(sender: type[Product], instance: Product, **kwargs: dict) -> None:
+    catalog__changed(product_id=instance.id, filter_params=filter_params__changed_on_save(instance=instance))
+
+
+@receiver(m2m_changed, sender=Product.category.through)
+def product_card__on_category_change(
+        sender: type, instance: Product | Category, action: str, reverse: bool, pk_set: set | None, **kwargs: dict
+) -> None:
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        catalog__changed(product_id=instance.id)
+        return
+    product_ids = pk_set if action != 'pre_clear' else instance.products.values_list('id', flat=True)
+    for product_id in product_ids:
+        catalog__changed(product_id=product_id)
+
+
+@receiver(post_save, sender=Variant)
+def product_card__on_variant_save(sender: type[Variant], instance: Variant, **kwargs: dict) -> None:
+    catalog__changed(product_id=instance.product_id, filter_params=filter_params__changed_on_save(instance=instance))
+
+
+@receiver(post_delete, sender=Variant)
+def product_card__on_variant_delete(sender: type[Variant], instance: Variant, **kwargs: dict) -> None:
+    catalog__changed(product_id=instance.product_id)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductCharacteristics)
+@receiver(post_delete, sender=ProductCharacteristics)
+def product_card__on_product_part_change(
+        sender: type, instance: ProductImage | ProductCharacteristics, **kwargs: dict
+) -> None:
+    # Изображения и характеристики товара не входят в параметры фильтров.
+    catalog__changed(product_id=instance.product_id, filter_params=False)
+
+
+@receiver(post_save, sender=VariantCharacteristics)
+@receiver(post_delete, sender=VariantCharacteristics)
+def variant_price_snapshot__on_characteristic_change(
+        sender: type[VariantCharacteristics], instance: VariantCharacteristics, **kwargs: dict
+) -> None:
+    # При удалении варианта характеристики удаляются каскадом, товар пересобирается по сигналу самого варианта.
+    product_id = Variant.objects.filter(id=instance.variant_id).values_list('product_id', flat=True).first()
+    if product_id is not None:
+        catalog_refresh__schedule(product_id=product_id, steps=(CATALOG_REFRESH_VARIANT_PRICE,))
+
+
+@receiver(post_save, sender=ItemBasket)
+@receiver(post_delete, sender=ItemBasket)
+def basket_totals__on_item_change(sender: type[ItemBasket], instance: ItemBasket, **kwargs: dict) -> None:
+    basket_totals__schedule_invalidate(basket_id=instance.basket_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(node_moved, sender=Category)
+def filter_params__on_category_change(sender: type[Category], instance: Category, **kwargs: dict) -> None:
+    transaction.on_commit(category_tree__invalidate)
+    transaction.on_commit(filter_params__invalidate)
+
+
+@receiver(post_save, sender=Brand)
+def product_card__on_brand_save(sender: type[Brand], instance: Brand, **kwargs: dict) -> None:
+    filter_params = filter_params__changed_on_save(instance=instance)
+    for product_id in instance.products.values_list('id', flat=True):
+        catalog__changed(product_id=product_id, filter_params=filter_params)
+
+
+@receiver(post_save, sender=CrossSaleProduct)
+@receiver(post_delete, sender=CrossSaleProduct)
+def product_cross_sale__on_link_change(
+        sender: type[CrossSaleProduct], instance: CrossSaleProduct, **kwargs: dict
+) -> None:
+    catalog_refresh__schedule(product_id=instance.product_id, steps=(CATALOG_REFRESH_CROSS_SALE,))
+
+
+@receiver(m2m_changed, sender=Product.crossale.through)
+def product_cross_sale__on_crossale_change(
+        sender: type, instance: Product, action: str, reverse: bool, pk_set: set | None, **kwargs: dict
+) -> None:
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        catalog_refresh__schedule(product_id=instance.id, steps=(CATALOG_REFRESH_CROSS_SALE,))
+        return
+    product_ids = pk_set if action != 'pre_clear' else instance.products.values_list('product_id', flat=True)
+    for product_id in product_ids:
+        catalog_refresh__schedule(product_id=product_id, steps=(CATALOG_REFRESH_CROSS_SALE,))
+
+
+response_cache__connect(models=(
+    Brand, Category, Characteristic, CrossSaleProduct, Favorite, Label, Product, Product.category.through,
+    ProductCharacteristics, ProductImage, Tag, TagProduct, Variant, VariantCharacteristics,
+))
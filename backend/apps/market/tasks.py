@@ -2,14 +2,29 @@ import hashlib
 from datetime import datetime
 
 import requests
-from django.db.models import Q
+from django.conf import settings
 from structlog import get_logger
 
 from apps.credentials.models import TinkoffCredentials
+from apps.market.constants import TINKOFF_PAYMENT_FAILED_STATUSES
 from apps.market.enum import PaymentMethod, PaymentStatus
 from apps.market.logic.interactors.cdek import create_cdek_order
+from apps.market.logic.interactors.product_card import product_cards__rebuild
+from apps.market.logic.interactors.product_cross_sale import \
+    product_cross_sales__refresh
+from apps.market.logic.interactors.product_search import \
+    product_search_vectors__refresh
+from apps.market.logic.interactors.product_visibility import \
+    products__refresh_visibility
+from apps.market.logic.interactors.stock_reservation import (
+    basket__confirm_stock_reservation, basket__release_stock,
+    baskets__release_expired_reservations)
+from apps.market.logic.interactors.suggest_index import \
+    suggest_snapshot__build
+from apps.market.logic.interactors.variant_price_snapshot import \
+    variant_price_snapshot__refresh
 from apps.market.logic.selectors.basket_viewset_selectors import basket__find_by_pk
-from apps.market.models import Basket, Product
+from apps.market.models import Basket
 from config.celery import app
 
 logger = get_logger(__name__)
@@ -20,7 +35,7 @@ def payment_reaction(basket_id: int, token) -> None:
     basket = Basket.objects.get(pk=basket_id)
     tinkoff = TinkoffCredentials.get_solo()
     response = requests.post(
-        url="https://securepay.tinkoff.ru/v2/GetState",
+        url=settings.TINKOFF_API_URL + "GetState",
         json={
             "TerminalKey": tinkoff.terminal_key,
             "Token": hashlib.sha256(
@@ -38,61 +53,48 @@ def payment_reaction(basket_id: int, token) -> None:
     if basket.payment_status != PaymentStatus.PAID and state_data['Status'] == 'CONFIRMED':
         basket.payment_status = PaymentStatus.PAID
         basket.save()
+        basket__confirm_stock_reservation(basket_id=basket.id)
+    if state_data['Status'] in TINKOFF_PAYMENT_FAILED_STATUSES:
+        basket__release_stock(basket_id=basket.id)
 
 
-@app.task(name='Выбор товаров по полю "characteristics__value"')
-def get_products__by__characteristics_value(value):
-    products = list(Product.objects.filter(characteristics__value__icontains=value).values_list('id', flat=True))
-    return {'data': products}
-
-
-@app.task(name='Выбор по полю "id"')
-def get_products__by__id(value):
-    products = list(Product.objects.filter(id__icontains=value).values_list('id', flat=True))
-    return {'data': products}
-
-
-@app.task(name='Выбор по полю "name"')
-def get_products__by__name(value):
-    products = list(Product.objects.filter(Q(name__icontains=value)).values_list('id', flat=True))
-    return {'data': products}
+@app.task(name='Отправка ежедневного отчёта по заказам')
+def send__daily_order_information_to_email__task():
+    send_daily_order_information_to_email()
 
 
-@app.task(name='Выбор по полю '"code"'')
-def get_products__by__code(value):
-    products = list(Product.objects.filter(code__icontains=value).values_list('id', flat=True))
-    return {'data': products}
+@app.task(name='Обновление файла для яндекс поиска')
+def update__yandexfeed_file() -> None:
+    write__yandex_feed_file(data=collect_data__to_yandex_feed())
 
 
-@app.task(name='Выбор по полю '"article"'')
-def get_products__by__article(value):
-    products = list(Product.objects.filter(article__icontains=value).values_list('id', flat=True))
-    return {'data': products}
+@app.task(name='Пересчёт карточек товаров на витрине')
+def rebuild__product_cards() -> None:
+    products__refresh_visibility()
+    product_cards__rebuild()
 
 
-@app.task(name='Выбор по полю '"description"'')
-def get_products__by__description(value):
-    products = list(Product.objects.filter(Q(description__icontains=value)).values_list('id', flat=True))
-    return {'data': products}
+@app.task(name='Пересчёт поисковых векторов товаров')
+def rebuild__product_search_vectors() -> None:
+    product_search_vectors__refresh()
 
 
-@app.task(name='Выбор по полю '"brand__name"'')
-def get_products__by__brand__name(value):
-    products = list(Product.objects.filter(Q(brand__name__icontains=value)).values_list('id', flat=True))
-    return {'data': products}
+@app.task(name='Пересборка снимка индекса поисковых подсказок')
+def rebuild__suggest_snapshot() -> None:
+    suggest_snapshot__build()
 
 
-@app.task(name='Выбор по полю '"variants__code"'')
-def get_products__by__variants__code(value):
-    products = list(Product.objects.filter(variants__code__icontains=value).values_list('id', flat=True))
-    return {'data': products}
+@app.task(name='Пересчёт списков рекомендаций товаров')
+def rebuild__product_cross_sales() -> None:
+    product_cross_sales__refresh()
 
 
-@app.task(name='Отправка ежедневного отчёта по заказам')
-def send__daily_order_information_to_email__task():
-    send_daily_order_information_to_email()
+@app.task(name='Пересборка снимка цен и остатков вариантов')
+def rebuild__variant_price_snapshot() -> None:
+    variant_price_snapshot__refresh()
 
 
-@app.task(name='Обновление файла для яндекс поиска')
-def update__yandexfeed_file() -> None:
-    write__yandex_feed_file(data=collect_data__to_yandex_feed())
+@app.task(name='Снятие просроченных резервов неоплаченных заказов')
+def release__expired_stock_reservations() -> None:
+    released = baskets__release_expired_reservations()
+    logger.info("stock_reservation__expired_released", baskets=released)
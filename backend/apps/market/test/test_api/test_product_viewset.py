@@ -0,0 +1,28 @@
+import pytest
+from rest_framework.test import APIRequestFactory
+
+# Вьюсеты импортируют интерактор СДЭК, без него модуль не собирается.
+pytest.importorskip('apps.market.logic.interactors.cdek')
+
+from apps.market.api.viewsets import ProductViewSet  # noqa: E402
+from apps.market.models import Favorite  # noqa: E402
+from apps.user.models import User  # noqa: E402
+
+
+@pytest.mark.django_db
+class TestProductViewSetConditionalGet:
+    def test__favorite_change__new_etag(self, django_capture_on_commit_callbacks) -> None:
+        view = ProductViewSet.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+        user = User.objects.create(username='79990000002')
+        response = view(factory.get('/api/products/', {'user': user.id}))
+        etag = response['ETag']
+
+        assert view(factory.get('/api/products/', {'user': user.id}, HTTP_IF_NONE_MATCH=etag)).status_code == 304
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Favorite.objects.create(user=user)
+
+        response = view(factory.get('/api/products/', {'user': user.id}, HTTP_IF_NONE_MATCH=etag))
+        assert response.status_code == 200
+        assert response['ETag'] != etag
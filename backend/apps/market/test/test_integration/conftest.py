@@ -0,0 +1,63 @@
+from decimal import Decimal
+from typing import Callable
+from weakref import WeakKeyDictionary
+
+import pytest
+
+from apps.market.enum import PaymentMethod
+from apps.market.logic.interactors import catalog_refresh
+from apps.market.models import Basket, Product, Variant
+from apps.user.models import User
+
+
+@pytest.fixture(autouse=True)
+def catalog_refresh_batches(monkeypatch) -> WeakKeyDictionary:
+    # В тестах транзакция откатывается, пачка пересчётов каталога не должна переходить в следующий тест.
+    batches: WeakKeyDictionary = WeakKeyDictionary()
+    monkeypatch.setattr(catalog_refresh, '_catalog_refresh_batches', batches)
+    return batches
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings) -> None:
+    # Версии и снимки каталога пишутся в общий кеш, в тестах он заменяется кешем процесса.
+    settings.CACHES = {
+        **settings.CACHES,
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'integration-tests'},
+    }
+
+
+@pytest.fixture
+def product(db: None) -> Product:
+    return Product.objects.create(
+        id='test-product', name='Тестовый товар', code='test-product', article='TEST-1', weight=Decimal('0.50')
+    )
+
+
+@pytest.fixture
+def make_variant(product: Product) -> Callable[..., Variant]:
+    def make(
+            *, index: int = 1, quantity: str = '10', price: str = '1000', to_order: bool = False,
+            archived: bool = False, **fields: object,
+    ) -> Variant:
+        return Variant.objects.create(
+            id=f'{product.id}-variant-{index}',
+            product=product,
+            name=f'{product.name} {index}',
+            price=Decimal(price),
+            stock=Decimal(quantity),
+            reserve=Decimal(0),
+            quantity=Decimal(quantity),
+            to_order=to_order,
+            is_active=True,
+            archived=archived,
+            **fields,
+        )
+
+    return make
+
+
+@pytest.fixture
+def basket(db: None) -> Basket:
+    user = User.objects.create(username='79990000001')
+    return Basket.objects.create(user=user, payment_method=PaymentMethod.ONLINE)
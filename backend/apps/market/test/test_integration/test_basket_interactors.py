@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+from django.utils import timezone
+
+from apps.market.enum import BasketMergePolicy, BasketStatus
+from apps.market.logic.interactors.basket_interactors import (
+    basket__finalize_order, item_baskets__upsert)
+from apps.market.models import ItemBasket
+
+
+class TestItemBasketsUpsert:
+    def test__upsert__new_items(self, basket, make_variant) -> None:
+        in_stock = make_variant(index=1, quantity='2')
+        to_order = make_variant(index=2, quantity='0', to_order=True)
+        make_variant(index=3, quantity='0')
+
+        added = item_baskets__upsert(
+            basket=basket, quantities={in_stock.id: 5, to_order.id: 3, f'{in_stock.product_id}-variant-3': 1}
+        )
+
+        assert added == {in_stock.id: 2, to_order.id: 3}
+        items = ItemBasket.objects.filter(basket=basket).order_by('variant_product_id')
+        assert [(item.variant_product_id, item.quantity, item.reserved_quantity) for item in items] == [
+            (in_stock.id, 2, Decimal(0)),
+            (to_order.id, 3, Decimal(0)),
+        ]
+
+    def test__upsert__merge_policy(self, basket, make_variant) -> None:
+        variant = make_variant(quantity='10')
+        item_baskets__upsert(basket=basket, quantities={variant.id: 4})
+
+        added = item_baskets__upsert(basket=basket, quantities={variant.id: 3}, policy=BasketMergePolicy.SUM)
+
+        assert added == {variant.id: 7}
+        assert ItemBasket.objects.get(basket=basket, variant_product=variant).quantity == 7
+
+
+class TestBasketFinalizeOrder:
+    def test__finalize_order(self, basket, make_variant) -> None:
+        discounted = make_variant(index=1, price='1000', sale_price=Decimal('800'), code='V-1')
+        regular = make_variant(index=2, price='500')
+        ItemBasket.objects.create(basket=basket, variant_product=discounted, quantity=2)
+        ItemBasket.objects.create(basket=basket, variant_product=regular, quantity=3)
+        order_date = timezone.now()
+
+        basket__finalize_order(basket=basket, order_date=order_date)
+
+        assert (basket.total_cost, basket.discount, basket.status) == (
+            Decimal('3100'), Decimal('400'), BasketStatus.COMPLETED
+        )
+        basket.refresh_from_db()
+        assert (basket.total_cost, basket.discount, basket.status, basket.order_date) == (
+            Decimal('3100'), Decimal('400'), BasketStatus.COMPLETED, order_date
+        )
+        items = ItemBasket.objects.filter(basket=basket).order_by('variant_product_id')
+        assert [
+            (item.code, item.name, item.price, item.sale_price, item.item_total_cost, item.item_discount)
+            for item in items
+        ] == [
+            ('V-1', discounted.name, Decimal('1000'), Decimal('800'), Decimal('2000'), Decimal('400')),
+            (None, regular.name, Decimal('500'), None, Decimal('1500'), Decimal('0')),
+        ]
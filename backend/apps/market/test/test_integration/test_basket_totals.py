@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+from apps.market.logic.interactors.basket_totals import basket_totals__get
+from apps.market.logic.interactors.variant_price_snapshot import \
+    variant_price_snapshot__refresh
+from apps.market.models import ItemBasket, Product, Variant
+
+
+class TestBasketTotalsGet:
+    def test__cache_depends_on_basket_products_only(self, basket, make_variant, django_assert_num_queries) -> None:
+        variant = make_variant(quantity='5', price='1000')
+        ItemBasket.objects.create(basket=basket, variant_product=variant, quantity=2, price=Decimal('1000'))
+        other = Product.objects.create(id='other-product', name='Другой товар', weight=Decimal('1'))
+        Variant.objects.create(
+            id='other-variant', product=other, name='Другой', price=Decimal('300'), quantity=Decimal('1'),
+            is_active=True, archived=False,
+        )
+        variant_price_snapshot__refresh()
+        assert basket_totals__get(basket=basket)['settlement_data_cost']['basket_full_cost'] == Decimal('2000')
+
+        # Изменение чужого товара не сбрасывает итоги корзины.
+        variant_price_snapshot__refresh(product_ids={other.id})
+        with django_assert_num_queries(0):
+            basket_totals__get(basket=basket)
+
+        Variant.objects.filter(id=variant.id).update(price=Decimal('1200'))
+        variant_price_snapshot__refresh(product_ids={variant.product_id})
+        assert basket_totals__get(basket=basket)['settlement_data_cost']['basket_full_cost'] == Decimal('2400')
@@ -0,0 +1,73 @@
+import pytest
+from django.db import transaction
+
+from apps.market.logic.interactors import catalog_refresh
+from apps.market.logic.interactors.catalog_refresh import (
+    CATALOG_REFRESH_CROSS_SALE, CATALOG_REFRESH_VARIANT_PRICE,
+    catalog__changed, catalog_refresh__schedule)
+
+REFRESH_FUNCTIONS = (
+    'products__refresh_visibility',
+    'product_cards__refresh',
+    'product_search_vectors__refresh',
+    'product_cross_sales__refresh',
+    'product_cross_sales__refresh_recommending',
+    'variant_price_snapshot__refresh',
+    'suggest_feed__publish',
+    'product_detail__invalidate',
+    'filter_params__invalidate',
+)
+
+
+@pytest.fixture
+def refresh_calls(monkeypatch) -> list[tuple[str, dict]]:
+    calls: list[tuple[str, dict]] = []
+    for name in REFRESH_FUNCTIONS:
+        monkeypatch.setattr(catalog_refresh, name, lambda _name=name, **kwargs: calls.append((_name, kwargs)))
+    return calls
+
+
+@pytest.mark.django_db
+class TestCatalogRefresh:
+    def test__schedule__one_batch_in_fixed_order(self, refresh_calls, django_capture_on_commit_callbacks) -> None:
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            catalog__changed(product_id='first')
+            catalog_refresh__schedule(product_id='linked', steps=(CATALOG_REFRESH_CROSS_SALE,))
+            catalog__changed(product_id='second')
+            catalog__changed(product_id='first')
+
+        assert len(callbacks) == 1
+        assert [name for name, _ in refresh_calls] == [
+            'products__refresh_visibility',
+            'product_cards__refresh',
+            'product_search_vectors__refresh',
+            'product_cross_sales__refresh',
+            'product_cross_sales__refresh_recommending',
+            'variant_price_snapshot__refresh',
+            'suggest_feed__publish',
+            'product_detail__invalidate',
+            'product_detail__invalidate',
+            'filter_params__invalidate',
+        ]
+        assert refresh_calls[0] == ('products__refresh_visibility', {'product_ids': {'first', 'second'}})
+        assert refresh_calls[3] == ('product_cross_sales__refresh', {'product_ids': {'linked'}})
+        assert refresh_calls[4][1] == {'recommended_ids': {'first', 'second'}}
+
+    def test__schedule__only_requested_steps(self, refresh_calls, django_capture_on_commit_callbacks) -> None:
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            catalog_refresh__schedule(product_id='first', steps=(CATALOG_REFRESH_VARIANT_PRICE,))
+
+        assert len(callbacks) == 1
+        assert refresh_calls == [('variant_price_snapshot__refresh', {'product_ids': {'first'}})]
+
+    def test__schedule__rolled_back_batch_dropped(
+            self, refresh_calls, django_capture_on_commit_callbacks
+    ) -> None:
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with pytest.raises(RuntimeError), transaction.atomic():
+                catalog_refresh__schedule(product_id='rolled-back', steps=(CATALOG_REFRESH_VARIANT_PRICE,))
+                raise RuntimeError
+            catalog_refresh__schedule(product_id='committed', steps=(CATALOG_REFRESH_VARIANT_PRICE,))
+
+        assert len(callbacks) == 1
+        assert refresh_calls == [('variant_price_snapshot__refresh', {'product_ids': {'committed'}})]
@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import pytest
+from django.db import transaction
+
+from apps.market.logic.interactors.catalog_refresh import (
+    CATALOG_REFRESH_CARD, CATALOG_REFRESH_FILTER_PARAMS)
+from apps.market.logic.selectors.product_selectors import \
+    get_filter_params__from_products
+from apps.market.models import (Brand, Characteristic, Product,
+                                ProductCharacteristics, VariantCharacteristics)
+
+
+def test__filter_params__from_products(product, make_variant) -> None:
+    brand = Brand.objects.create(id='test-brand', name='Тестовый бренд', image='market/brands/test.png')
+    Product.objects.filter(id=product.id).update(brand=brand)
+    size = Characteristic.objects.create(id='size', name='Размер')
+    variant = make_variant(index=1, price='1000', sale_price=Decimal('800'))
+    VariantCharacteristics.objects.create(variant=variant, type=size, value='42')
+    make_variant(index=2, price='5000', quantity='0')
+    make_variant(index=3, price='3000', quantity='0', to_order=True)
+
+    params = get_filter_params__from_products(products=Product.objects.filter(id=product.id))
+
+    assert params['brands'] == [{'id': 'test-brand', 'name': 'Тестовый бренд'}]
+    assert params['price_range'] == {'max_price': Decimal('3000'), 'min_price': Decimal('800')}
+    assert params['characteristics'] == [{'params': 'Размер', 'sizes': '42'}, {'params': None, 'sizes': None}]
+
+
+def test__filter_params__from_no_products() -> None:
+    params = get_filter_params__from_products(products=Product.objects.none())
+
+    assert params == {'characteristics': [], 'price_range': {'max_price': None, 'min_price': None}, 'brands': []}
+
+
+@pytest.mark.django_db
+class TestFilterParamsInvalidation:
+    @pytest.fixture
+    def scheduled(self, catalog_refresh_batches):
+        def scheduled(step: str) -> set[str]:
+            batch = catalog_refresh_batches.get(transaction.get_connection())
+            return set(batch.product_ids[step]) if batch is not None else set()
+
+        return scheduled
+
+    def test__stock_change__only_availability(self, make_variant, catalog_refresh_batches, scheduled) -> None:
+        variant = make_variant(quantity='10')
+        catalog_refresh_batches.clear()
+
+        variant.quantity = Decimal(9)
+        variant.save()
+        assert scheduled(CATALOG_REFRESH_CARD) == {variant.product_id}
+        assert scheduled(CATALOG_REFRESH_FILTER_PARAMS) == set()
+
+        variant.quantity = Decimal(0)
+        variant.save(update_fields=('quantity',))
+        assert scheduled(CATALOG_REFRESH_FILTER_PARAMS) == {variant.product_id}
+
+    def test__price_change(self, make_variant, catalog_refresh_batches, scheduled) -> None:
+        variant = make_variant()
+        catalog_refresh_batches.clear()
+
+        variant.name = 'Новое название варианта'
+        variant.save()
+        assert scheduled(CATALOG_REFRESH_FILTER_PARAMS) == set()
+
+        variant.price = Decimal('1200')
+        variant.save()
+        assert scheduled(CATALOG_REFRESH_FILTER_PARAMS) == {variant.product_id}
+
+    def test__product_parts(self, product, catalog_refresh_batches, scheduled) -> None:
+        catalog_refresh_batches.clear()
+
+        h1 = Characteristic.objects.create(id='h1', name='h1')
+        ProductCharacteristics.objects.create(product=product, type=h1, value='Заголовок')
+        product.volume = Decimal('2')
+        product.save()
+        assert scheduled(CATALOG_REFRESH_CARD) == {product.id}
+        assert scheduled(CATALOG_REFRESH_FILTER_PARAMS) == set()
+
+        product.name = 'Переименованный товар'
+        product.save()
+        assert scheduled(CATALOG_REFRESH_FILTER_PARAMS) == {product.id}
@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+import pytest
+
+from apps.market.models import Product
+from utils.abstractions.pagination import keyset__after
+
+
+@pytest.fixture
+def products(db: None) -> None:
+    weights = {'a': '5', 'b': '10', 'c': '10', 'd': None, 'e': '20'}
+    Product.objects.bulk_create(
+        Product(
+            id=product_id, name=product_id, code=product_id, article=product_id,
+            weight=Decimal(weight) if weight is not None else None,
+        )
+        for product_id, weight in weights.items()
+    )
+
+
+def after(*, ordering: list[tuple[str, bool]], values: list) -> list[str]:
+    products = Product.objects.filter(keyset__after(ordering=ordering, values=values))
+    return sorted(products.values_list('id', flat=True))
+
+
+@pytest.mark.usefixtures('products')
+class TestKeysetAfter:
+    def test__ascending(self) -> None:
+        assert after(ordering=[('weight', False), ('id', False)], values=['10', 'b']) == ['c', 'd', 'e']
+
+    def test__descending(self) -> None:
+        assert after(ordering=[('weight', True), ('id', True)], values=['10', 'c']) == ['a', 'b', 'd']
+
+    def test__cursor_on_null(self) -> None:
+        assert after(ordering=[('weight', False), ('id', False)], values=[None, 'c']) == ['d']
+        assert after(ordering=[('weight', False), ('id', False)], values=[None, 'd']) == []
@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+from apps.market.logic.interactors.product_card import product_card__refresh
+from apps.market.logic.interactors.product_visibility import \
+    products__refresh_visibility
+from apps.market.models import Brand, Category, Product
+
+
+class TestProductCardRefresh:
+    def test__refresh__skips_archived_variants(self, product, make_variant) -> None:
+        product.category.add(Category.objects.create(name='Тестовая категория', is_active=True))
+        make_variant(index=1, price='1000', quantity='0', to_order=True)
+        make_variant(index=2, price='5000', quantity='10', archived=True)
+        products__refresh_visibility(product_ids=[product.id])
+
+        card = product_card__refresh(product_id=product.id)
+
+        assert card is not None
+        assert (card.min_price, card.max_price, card.in_stock, card.to_order) == (
+            Decimal('1000'), Decimal('1000'), False, True
+        )
+
+    def test__refresh__brand_displayable_products_count(self, product, make_variant) -> None:
+        brand = Brand.objects.create(id='test-brand', name='Тестовый бренд', image='market/brands/test.png')
+        Product.objects.filter(id=product.id).update(brand=brand)
+        product.category.add(Category.objects.create(name='Тестовая категория', is_active=True))
+        variant = make_variant(index=1)
+        products__refresh_visibility(product_ids=[product.id])
+
+        product_card__refresh(product_id=product.id)
+        brand.refresh_from_db()
+        assert brand.displayable_products_count == 1
+
+        variant.archived = True
+        variant.save()
+        products__refresh_visibility(product_ids=[product.id])
+        product_card__refresh(product_id=product.id)
+        brand.refresh_from_db()
+        assert brand.displayable_products_count == 0
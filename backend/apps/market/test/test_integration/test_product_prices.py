@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+from apps.market.models import Product, Variant
+
+
+def product__prices(*, product_id: str) -> tuple:
+    return Product.objects.values_list('min_price', 'max_price', 'effective_min_price', 'has_discount').get(
+        id=product_id
+    )
+
+
+class TestProductPricesTrigger:
+    def test__prices__skip_archived_variants(self, product, make_variant) -> None:
+        make_variant(index=1, price='1000', sale_price=Decimal('800'))
+        make_variant(index=2, price='3000')
+        make_variant(index=3, price='100', archived=True)
+
+        assert product__prices(product_id=product.id) == (Decimal(1000), Decimal(3000), Decimal(800), True)
+
+    def test__prices__variant_archived(self, product, make_variant) -> None:
+        cheap = make_variant(index=1, price='500', sale_price=Decimal('400'))
+        make_variant(index=2, price='2000')
+
+        Variant.objects.filter(id=cheap.id).update(archived=True)
+
+        assert product__prices(product_id=product.id) == (Decimal(2000), Decimal(2000), Decimal(2000), False)
+
+        Variant.objects.filter(id=cheap.id).update(archived=False)
+
+        assert product__prices(product_id=product.id) == (Decimal(500), Decimal(2000), Decimal(400), True)
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+import pytest
+from django.db import transaction
+
+from apps.market.enum import BasketStatus
+from apps.market.logic.interactors.catalog_refresh import CATALOG_REFRESH_CARD
+from apps.market.logic.interactors.stock_reservation import (
+    basket__release_stock, basket__reserve_stock)
+from apps.market.models import Basket, ItemBasket, Variant
+from utils.exeption import BusinessLogicException
+
+
+class TestBasketReserveStock:
+    def test__reserve__moves_quantity_to_reserve(
+            self, basket, make_variant, catalog_refresh_batches, django_capture_on_commit_callbacks
+    ) -> None:
+        variant = make_variant(quantity='5')
+        ItemBasket.objects.create(basket=basket, variant_product=variant, quantity=3)
+
+        with django_capture_on_commit_callbacks():
+            basket__reserve_stock(basket=basket)
+
+        variant.refresh_from_db()
+        assert (variant.quantity, variant.reserve) == (Decimal(2), Decimal(3))
+        assert ItemBasket.objects.get(basket=basket).reserved_quantity == Decimal(3)
+        assert Basket.objects.get(pk=basket.pk).reserved_until is not None
+        # Остаток меняется UPDATE без сигналов, карточка товара пересчитывается через catalog__changed.
+        batch = catalog_refresh_batches[transaction.get_connection()]
+        assert variant.product_id in batch.product_ids[CATALOG_REFRESH_CARD]
+
+    def test__reserve__repeat_reserves_only_missing(self, basket, make_variant) -> None:
+        variant = make_variant(quantity='5')
+        item = ItemBasket.objects.create(basket=basket, variant_product=variant, quantity=2)
+        basket__reserve_stock(basket=basket)
+        ItemBasket.objects.filter(pk=item.pk).update(quantity=4)
+
+        basket__reserve_stock(basket=basket)
+
+        variant.refresh_from_db()
+        assert (variant.quantity, variant.reserve) == (Decimal(1), Decimal(4))
+
+    def test__reserve__shortage(self, basket, make_variant) -> None:
+        in_stock = make_variant(index=1, quantity='5')
+        short = make_variant(index=2, quantity='1')
+        ItemBasket.objects.create(basket=basket, variant_product=in_stock, quantity=2)
+        ItemBasket.objects.create(basket=basket, variant_product=short, quantity=2)
+
+        with pytest.raises(BusinessLogicException):
+            basket__reserve_stock(basket=basket)
+
+        assert list(Variant.objects.order_by('id').values_list('quantity', 'reserve')) == [
+            (Decimal(5), Decimal(0)),
+            (Decimal(1), Decimal(0)),
+        ]
+        assert set(ItemBasket.objects.values_list('reserved_quantity', flat=True)) == {Decimal(0)}
+
+    def test__reserve__to_order_reserves_available(self, basket, make_variant) -> None:
+        variant = make_variant(quantity='1', to_order=True)
+        ItemBasket.objects.create(basket=basket, variant_product=variant, quantity=3)
+
+        basket__reserve_stock(basket=basket)
+
+        variant.refresh_from_db()
+        assert (variant.quantity, variant.reserve) == (Decimal(0), Decimal(1))
+
+
+class TestBasketReleaseStock:
+    def test__release(self, basket, make_variant) -> None:
+        variant = make_variant(quantity='5')
+        ItemBasket.objects.create(basket=basket, variant_product=variant, quantity=3)
+        basket__reserve_stock(basket=basket)
+
+        assert basket__release_stock(basket_id=basket.pk) is True
+
+        variant.refresh_from_db()
+        assert (variant.quantity, variant.reserve) == (Decimal(5), Decimal(0))
+        basket.refresh_from_db()
+        assert (basket.reserved_until, basket.status) == (None, BasketStatus.UNACCEPTED)
+        assert basket__release_stock(basket_id=basket.pk) is False
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+
+from apps.market.logic.interactors.variant_price_snapshot import (
+    VARIANT_PRICE_LOCK_KEY, variant_price_snapshot__load,
+    variant_price_snapshot__refresh)
+from apps.market.models import Product, Variant
+
+
+class TestVariantPriceSnapshotRefresh:
+    def test__refresh__reads_only_changed_products(self, product, make_variant) -> None:
+        changed = make_variant(index=1, price='1000')
+        other_product = Product.objects.create(id='other-product', name='Другой товар', weight=Decimal('1'))
+        Variant.objects.create(
+            id='other-variant', product=other_product, name='Другой', price=Decimal('300'), quantity=Decimal('1'),
+            is_active=True, archived=False,
+        )
+        variant_price_snapshot__refresh()
+        snapshot = variant_price_snapshot__load()
+        assert set(snapshot.entries) == {changed.id, 'other-variant'}
+
+        Variant.objects.filter(id=changed.id).update(price=Decimal('1500'))
+        variant_price_snapshot__refresh(product_ids={product.id})
+        refreshed = variant_price_snapshot__load(current=snapshot)
+
+        assert refreshed.entries[changed.id].price == Decimal('1500')
+        assert refreshed.entries['other-variant'] is snapshot.entries['other-variant']
+        assert refreshed.version != snapshot.version
+        assert cache.get(VARIANT_PRICE_LOCK_KEY) is None
+
+    def test__refresh__drops_product_without_active_variants(self, product, make_variant) -> None:
+        variant = make_variant(index=1)
+        variant_price_snapshot__refresh()
+        snapshot = variant_price_snapshot__load()
+
+        Variant.objects.filter(id=variant.id).update(archived=True)
+        index = variant_price_snapshot__refresh(product_ids={product.id})
+
+        assert product.id not in index['products']
+        assert variant_price_snapshot__load(current=snapshot).entries == {}
+
+    def test__load__rebuilds_evicted_product(self, product, make_variant) -> None:
+        variant = make_variant(index=1)
+        variant_price_snapshot__refresh()
+        cache.delete(f'variant_prices:product:{product.id}')
+
+        assert set(variant_price_snapshot__load().entries) == {variant.id}
@@ -0,0 +1,115 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Callable
+
+import pytest
+
+from apps.market.dto.basket import VariantPriceDto
+from apps.market.dto.category import CategoryNodeDto
+from apps.market.logic.interactors.category_tree import CategoryTree
+from apps.market.logic.interactors.facet_index import ProductFacetIndex
+from apps.market.logic.interactors.suggest_index import SuggestionIndex
+from apps.market.logic.interactors.variant_price_snapshot import \
+    VariantPriceSnapshot
+from apps.market.models import Variant
+
+
+@pytest.fixture
+def suggestion_index() -> SuggestionIndex:
+    index = SuggestionIndex()
+    index.apply(entry=('p1', 'Кроссовки Nike Air', ('AB-12', 'Nike')))
+    index.apply(entry=('p2', 'Кеды Converse', ('CV-1', 'Converse')))
+    index.apply(entry=('p3', 'Куртка Nike', ('NK-7', 'Nike')))
+    return index
+
+
+@pytest.fixture
+def make_facet_index() -> Callable[..., ProductFacetIndex]:
+    def make(*, version: int | None = None) -> ProductFacetIndex:
+        return ProductFacetIndex(
+            universe={'p1', 'p2', 'p3', 'p4'},
+            postings={
+                'brand': {'b1': {'p1', 'p2'}, 'b2': {'p3', 'p4'}},
+                'characteristics_value': {'42': {'p1', 'p3'}, '44': {'p2', 'p3', 'p4'}},
+                'category': {'root': {'p1', 'p2', 'p3'}, 'child': {'p3'}, 'hidden': {'p4'}},
+            },
+            prices={'p1': Decimal('500'), 'p2': Decimal('1500'), 'p3': Decimal('4000'), 'p4': None},
+            active_categories={'root', 'child'},
+            version=version,
+        )
+
+    return make
+
+
+@pytest.fixture
+def facet_index(make_facet_index: Callable[..., ProductFacetIndex]) -> ProductFacetIndex:
+    return make_facet_index()
+
+
+@pytest.fixture
+def category_tree() -> CategoryTree:
+    # 1 -> (2 -> 3), 4; второе дерево: 5
+    nodes = [
+        CategoryNodeDto(id=4, parent_id=1, tree_id=1, lft=6, rght=7, level=1, is_active=False),
+        CategoryNodeDto(id=1, parent_id=None, tree_id=1, lft=1, rght=8, level=0, is_active=True),
+        CategoryNodeDto(id=3, parent_id=2, tree_id=1, lft=3, rght=4, level=2, is_active=True),
+        CategoryNodeDto(id=2, parent_id=1, tree_id=1, lft=2, rght=5, level=1, is_active=True),
+        CategoryNodeDto(id=5, parent_id=None, tree_id=2, lft=1, rght=2, level=0, is_active=True),
+    ]
+    return CategoryTree(nodes=nodes)
+
+
+@pytest.fixture
+def variant_price_snapshot() -> VariantPriceSnapshot:
+    return VariantPriceSnapshot(
+        entries={
+            'v1': VariantPriceDto(
+                product_id='p1', price=Decimal('1000'), discount=Decimal('200'), quantity=Decimal('3'),
+                to_order=False, payload={'id': 'v1'},
+            ),
+            'v2': VariantPriceDto(
+                product_id='p1', price=Decimal('500'), discount=Decimal('0'), quantity=Decimal('0'),
+                to_order=True, payload={'id': 'v2'},
+            ),
+        },
+    )
+
+
+@pytest.fixture
+def build_variant() -> Callable[..., Variant]:
+    """
+    Несохранённый вариант: по умолчанию активный, в наличии и без скидки.
+    """
+    def build(**fields: object) -> Variant:
+        data: dict[str, object] = {
+            'price': Decimal('100'), 'sale_price': Decimal('0'), 'quantity': Decimal('1'),
+            'to_order': False, 'is_active': True,
+        }
+        data.update(fields)
+        return Variant(**data)
+
+    return build
+
+
+@pytest.fixture
+def build_basket_item() -> Callable[..., SimpleNamespace]:
+    """
+    Позиция корзины с вариантом в том виде, в котором её читает basket_totals__calculate.
+    """
+    def build(
+            *, quantity: int, price: str | None, sale_price: str | None, variant_price: str,
+            variant_sale_price: str | None, stock: str, to_order: bool = False,
+    ) -> SimpleNamespace:
+        return SimpleNamespace(
+            quantity=quantity,
+            price=Decimal(price) if price is not None else None,
+            sale_price=Decimal(sale_price) if sale_price is not None else None,
+            variant_product=SimpleNamespace(
+                price=Decimal(variant_price),
+                sale_price=Decimal(variant_sale_price) if variant_sale_price is not None else None,
+                stock=Decimal(stock),
+                to_order=to_order,
+            ),
+        )
+
+    return build
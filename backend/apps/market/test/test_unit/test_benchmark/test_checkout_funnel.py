@@ -0,0 +1,50 @@
+from apps.market.benchmark.checkout_funnel import (basket__id_from_payload,
+                                                   funnel_steps__summarize)
+from apps.market.benchmark.stubs import integration_stub__response
+
+
+def test__funnel_steps__summarize() -> None:
+    records = [
+        ('accept', 30.0, 200),
+        ('browse', 10.0, 200),
+        ('browse', 20.0, 200),
+        ('accept', 40.0, 409),
+        ('accept', 50.0, 0),
+    ]
+    summary = funnel_steps__summarize(records=records, duration=2)
+    assert list(summary) == ['browse', 'accept']
+    assert summary['browse']['throughput_rps'] == 1.0
+    assert summary['browse']['errors'] == 0
+    assert summary['accept']['errors'] == 2
+    assert summary['accept']['statuses'] == {'error': 1, '200': 1, '409': 1}
+
+
+def test__basket__id_from_payload() -> None:
+    assert basket__id_from_payload(payload=[{'id': 1}]) == 1
+    assert basket__id_from_payload(payload={'data': [{'id': 2}]}) == 2
+    assert basket__id_from_payload(payload={'results': []}) is None
+
+
+def test__integration_stub__response__tinkoff() -> None:
+    code, payload = integration_stub__response(
+        method='POST', path='/tinkoff/Init', body={'OrderId': '1', 'Amount': 100}, base_url='http://stub'
+    )
+    assert code == 200
+    assert payload['Success'] is True
+    assert payload['PaymentURL'] == f"http://stub/tinkoff/pay/{payload['PaymentId']}"
+    code, payload = integration_stub__response(
+        method='POST', path='/tinkoff/GetState', body={'PaymentId': '7'}, base_url='http://stub'
+    )
+    assert (code, payload['PaymentId'], payload['Status']) == (200, '7', 'NEW')
+    assert integration_stub__response(method='GET', path='/unknown', body={}, base_url='http://stub')[0] == 404
+
+
+def test__integration_stub__response__cdek_and_smsru() -> None:
+    code, payload = integration_stub__response(
+        method='GET', path='/cdek/v2/orders/order-uuid?lang=rus', body={}, base_url='http://stub'
+    )
+    assert (code, payload['entity']['uuid']) == (202, 'order-uuid')
+    code, payload = integration_stub__response(
+        method='POST', path='/smsru/sms/send', body={'to': '79990000001'}, base_url='http://stub'
+    )
+    assert (code, payload['sms']['79990000001']['status']) == (200, 'OK')
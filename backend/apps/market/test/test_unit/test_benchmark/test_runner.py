@@ -0,0 +1,18 @@
+from apps.market.benchmark.runner import benchmark__compare, percentile
+
+
+def test__percentile__nearest_rank() -> None:
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values=values, percent=50) == 50.0
+    assert percentile(values=values, percent=95) == 95.0
+    assert percentile(values=[3.0], percent=95) == 3.0
+
+
+def test__benchmark__compare() -> None:
+    baseline = {'products.list': {'p95_ms': 10.0, 'queries': 3}, 'removed': {'p95_ms': 1.0, 'queries': 1}}
+    current = {'products.list': {'p95_ms': 13.0, 'queries': 4}, 'added': {'p95_ms': 1.0, 'queries': 1}}
+    assert benchmark__compare(current=current, baseline=baseline, threshold=20) == [
+        'products.list: p95 10.0 -> 13.0 мс',
+        'products.list: запросов 3 -> 4',
+    ]
+    assert benchmark__compare(current=current, baseline=baseline, threshold=50) == ['products.list: запросов 3 -> 4']
@@ -0,0 +1,19 @@
+from decimal import Decimal
+
+from apps.market.benchmark.stock_reservation import \
+    stock_reservation__violations
+
+
+def test__stock_reservation__violations() -> None:
+    variants = {
+        'v1': (Decimal(2), Decimal(8)),
+        'v2': (Decimal(-1), Decimal(11)),
+        'v3': (Decimal(4), Decimal(5)),
+    }
+    reserved = {'v1': Decimal(8), 'v2': Decimal(11), 'v3': Decimal(6)}
+    violations = stock_reservation__violations(stock=Decimal(10), variants=variants, reserved=reserved)
+    assert violations == [
+        'v2: доступно -1',
+        'v3: резерв 5, в позициях 6',
+        'v3: доступно 4 и резерв 5 при остатке 10',
+    ]
@@ -0,0 +1,14 @@
+from apps.market.dto.category import CategoryNodeDto
+from apps.market.logic.facades.category_facades import \
+    category_tree__visible_ids
+from apps.market.logic.interactors.category_tree import CategoryTree
+
+
+def test__category_tree__visible_ids__skips_children_of_inactive() -> None:
+    tree = CategoryTree(nodes=[
+        CategoryNodeDto(id=1, parent_id=None, tree_id=1, lft=1, rght=6, level=0, is_active=True),
+        CategoryNodeDto(id=2, parent_id=1, tree_id=1, lft=2, rght=5, level=1, is_active=False),
+        CategoryNodeDto(id=3, parent_id=2, tree_id=1, lft=3, rght=4, level=2, is_active=True),
+        CategoryNodeDto(id=4, parent_id=None, tree_id=2, lft=1, rght=2, level=0, is_active=True),
+    ])
+    assert category_tree__visible_ids(tree=tree) == [1, 4]
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from django.http import QueryDict
+
+from apps.market.logic.facades import product_facades
+from apps.market.logic.facades.product_facades import (
+    filter_params__normalize_query, product_filter_params__get)
+
+
+class TestFilterParamsNormalizeQuery:
+    def test__order_of_params_and_values(self) -> None:
+        first = filter_params__normalize_query(query_params=QueryDict('brand=b,a&category=1'))
+        second = filter_params__normalize_query(query_params=QueryDict('category=1&brand=a,b'))
+        assert first == second == 'brand=a,b&category=1'
+
+    def test__ignored_params(self) -> None:
+        query_params = QueryDict('ordering=-price&page=2&per_page=10&tags=1')
+        assert filter_params__normalize_query(query_params=query_params) == 'tags=1'
+
+    def test__empty_values(self) -> None:
+        assert filter_params__normalize_query(query_params=QueryDict('brand=&tags=1,,2')) == 'tags=1,2'
+
+    def test__order_sensitive_values_kept(self) -> None:
+        query_params = QueryDict('price_range=500,100&category=7,3&type_label=b,a')
+        assert filter_params__normalize_query(query_params=query_params) == (
+            'category=7,3&price_range=500,100&type_label=b,a'
+        )
+
+    def test__last_value_of_repeated_param(self) -> None:
+        assert filter_params__normalize_query(query_params=QueryDict('brand=a&brand=c,b')) == 'brand=b,c'
+
+
+class TestProductFilterParamsGet:
+    def test__favorites_filter_not_cached(self, monkeypatch) -> None:
+        stored: dict = {}
+        monkeypatch.setattr(product_facades, 'cache', SimpleNamespace(
+            get=stored.get, set=lambda key, value, timeout: stored.update({key: value}),
+            get_or_set=lambda key, default, timeout: 1,
+        ))
+        monkeypatch.setattr(product_facades, 'get_filter_params__from_products', lambda products: {'brands': products})
+
+        assert product_filter_params__get(products='first', query_params=QueryDict('user=1')) == {'brands': 'first'}
+        assert product_filter_params__get(products='second', query_params=QueryDict('user=1')) == {'brands': 'second'}
+        assert stored == {}
+
+        product_filter_params__get(products='first', query_params=QueryDict('brand=1'))
+        assert product_filter_params__get(products='second', query_params=QueryDict('brand=1')) == {'brands': 'first'}
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from apps.market.logic.interactors.basket_totals import \
+    basket_totals__calculate
+
+
+class TestBasketTotals:
+    def test__calculate(self, build_basket_item) -> None:
+        items = [
+            build_basket_item(
+                quantity=2, price='1000', sale_price='800', variant_price='1100', variant_sale_price='900', stock='1'
+            ),
+            build_basket_item(
+                quantity=3, price='500', sale_price=None, variant_price='500', variant_sale_price='0', stock='0',
+                to_order=True,
+            ),
+        ]
+        totals = basket_totals__calculate(item_baskets=items)
+        assert totals['count_variants'] == 2
+        assert totals['expenses'] == {
+            'basket_without_discount': Decimal('3500'),
+            'basket_discount': Decimal('400'),
+            'basket_with_discount': Decimal('3100'),
+            'basket_final_cost': Decimal('3100'),
+        }
+        assert totals['settlement_data_cost'] == {
+            'basket_full_cost': Decimal('2600'),
+            'basket_discount': Decimal('200'),
+            'basket_with_discount': Decimal('2400'),
+            'basket_final_cost': Decimal('2400'),
+        }
+
+    def test__calculate__empty_basket(self) -> None:
+        totals = basket_totals__calculate(item_baskets=[])
+        assert totals['count_variants'] == 0
+        assert set(totals['expenses'].values()) == {None}
+        assert set(totals['settlement_data_cost'].values()) == {None}
+
+    def test__calculate__price_not_fixed(self, build_basket_item) -> None:
+        items = [
+            build_basket_item(
+                quantity=1, price=None, sale_price=None, variant_price='700', variant_sale_price=None, stock='5'
+            ),
+        ]
+        totals = basket_totals__calculate(item_baskets=items)
+        assert totals['expenses']['basket_without_discount'] is None
+        assert totals['expenses']['basket_discount'] == 0
+        assert totals['settlement_data_cost']['basket_final_cost'] == Decimal('700')
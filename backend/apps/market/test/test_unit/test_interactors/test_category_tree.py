@@ -0,0 +1,13 @@
+class TestCategoryTree:
+    def test__descendant_ids(self, category_tree) -> None:
+        tree = category_tree
+        assert tree.descendant_ids(category_id=1) == {1, 2, 3, 4}
+        assert tree.descendant_ids(category_id='2') == {2, 3}
+        assert tree.descendant_ids(category_id=2, include_self=False) == {3}
+        assert tree.descendant_ids(category_id=5) == {5}
+
+    def test__active_node(self, category_tree) -> None:
+        tree = category_tree
+        assert tree.active_node(category_id='1').id == 1
+        assert tree.active_node(category_id=4) is None
+        assert tree.active_node(category_id='abc') is None
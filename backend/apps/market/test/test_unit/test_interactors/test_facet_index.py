@@ -0,0 +1,58 @@
+import threading
+
+from apps.market.constants import FACET_INDEX_MIN_REBUILD_INTERVAL
+from apps.market.logic.interactors import facet_index
+from apps.market.logic.interactors.facet_index import (
+    ProductFacetIndex, facet_filters__from_query, facet_index__get)
+
+
+class TestProductFacetIndex:
+    def test__filter_ids(self, facet_index) -> None:
+        index = facet_index
+        assert index.filter_ids(filters={'brand': ['b1', 'b2'], 'characteristics_value': ['42']}) == {'p1', 'p3'}
+        assert index.filter_ids(filters={'category': ['root', 'child']}) == {'p1', 'p2', 'p3'}
+        assert index.filter_ids(filters={'category': ['hidden']}) == set()
+        assert index.filter_ids(filters={'price_range': ['1000', '4000']}) == {'p2', 'p3'}
+
+    def test__counts_ignore_own_filter(self, facet_index) -> None:
+        counts = facet_index.counts(filters={'brand': ['b1'], 'characteristics_value': ['44']})
+        assert counts['total'] == 1
+        assert counts['brands'] == {'b1': 1, 'b2': 2}
+        assert counts['characteristics'] == {'42': 1, '44': 1}
+        assert [bucket['count'] for bucket in counts['price_buckets']][:2] == [0, 1]
+
+    def test__counts_restrict_to(self, facet_index) -> None:
+        counts = facet_index.counts(filters={}, restrict_to={'p1'})
+        assert counts['total'] == 1
+        assert counts['brands'] == {'b1': 1}
+
+
+def test__facet_filters__from_query() -> None:
+    filters = facet_filters__from_query(query_params={'brand': 'b1,,b2', 'tags': '', 'ordering': 'price'})
+    assert filters == {'brand': ['b1', 'b2']}
+
+
+def test__facet_index__get__rebuild_in_background(monkeypatch, make_facet_index) -> None:
+    rebuild_started, rebuild_release = threading.Event(), threading.Event()
+    stale = make_facet_index(version=1)
+    stale.built_at -= FACET_INDEX_MIN_REBUILD_INTERVAL
+    fresh = make_facet_index(version=2)
+
+    def load(*, version: int) -> ProductFacetIndex:
+        rebuild_started.set()
+        rebuild_release.wait(timeout=5)
+        return fresh
+
+    monkeypatch.setattr(facet_index, 'facet_index__load', load)
+    monkeypatch.setattr(facet_index, '_facet_index', stale)
+
+    assert facet_index__get(version=2) is stale
+    assert rebuild_started.wait(timeout=5)
+    # Пока индекс пересобирается, запросы отвечают по старому индексу и не ждут пересборку.
+    assert facet_index__get(version=2) is stale
+
+    rebuild_release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'facet-index-rebuild':
+            thread.join(timeout=5)
+    assert facet_index__get(version=2) is fresh
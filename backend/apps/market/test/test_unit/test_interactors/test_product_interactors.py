@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from apps.market.logic.interactors.product_interactors import (
+    variants__has_promotion, variants__price_label, variants__price_variants)
+
+
+class TestPriceLabel:
+    def test__min_sale_price(self, build_variant) -> None:
+        variants = [
+            build_variant(price=Decimal('100'), sale_price=Decimal('90')),
+            build_variant(price=Decimal('120'), sale_price=Decimal('80')),
+        ]
+        result = variants__price_label(variants=variants)
+        assert result == {'price_discount': Decimal('80'), 'price': Decimal('120'), 'min_price': None,
+                          'max_price': None}
+
+    def test__price_range(self, build_variant) -> None:
+        variants = [build_variant(price=Decimal('100')), build_variant(price=Decimal('150'))]
+        result = variants__price_label(variants=variants)
+        assert result['min_price'] == Decimal('100')
+        assert result['max_price'] == Decimal('150')
+        assert result['price_discount'] is None
+
+    def test__unavailable_variants_are_skipped(self, build_variant) -> None:
+        variants = [
+            build_variant(price=Decimal('10'), quantity=Decimal('0')),
+            build_variant(price=Decimal('20'), is_active=False),
+            build_variant(price=Decimal('30'), quantity=Decimal('0'), to_order=True),
+        ]
+        result = variants__price_label(variants=variants)
+        assert result['min_price'] == Decimal('30')
+        assert result['max_price'] == Decimal('30')
+
+    def test__no_available_variants(self, build_variant) -> None:
+        assert variants__price_label(variants=[build_variant(price=Decimal('0'))]) is None
+
+
+class TestPromotion:
+    def test__sale_price(self, build_variant) -> None:
+        assert variants__has_promotion(variants=[build_variant(sale_price=Decimal('50'))])
+
+    def test__empty_sale_price(self, build_variant) -> None:
+        assert variants__has_promotion(variants=[build_variant(sale_price=None)])
+
+    def test__without_sale_price(self, build_variant) -> None:
+        assert not variants__has_promotion(variants=[build_variant()])
+
+    def test__price_variants_exclude_zero_price(self, build_variant) -> None:
+        variants = [build_variant(price=Decimal('0')), build_variant(price=Decimal('10'))]
+        assert variants__price_variants(variants=variants) == [{'price': Decimal('10'), 'sale_price': Decimal('0')}]
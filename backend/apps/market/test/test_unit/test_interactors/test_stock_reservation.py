@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from apps.market.logic.interactors.stock_reservation import (
+    stock_reservation__plan, variants__availability_changed)
+
+
+class TestStockReservationPlan:
+    def test__plan(self) -> None:
+        items = [(1, 'v1', 2, Decimal(0)), (2, 'v2', 5, Decimal(0)), (3, 'v3', 1, Decimal(0))]
+        variants = {'v1': (Decimal(3), False), 'v2': (Decimal(2), True), 'v3': (None, True)}
+        reservations, shortages = stock_reservation__plan(items=items, variants=variants)
+        assert reservations == {1: Decimal(2), 2: Decimal(2)}
+        assert shortages == []
+
+    def test__plan__shortage(self) -> None:
+        items = [(1, 'v1', 2, Decimal(0)), (2, 'v2', 4, Decimal(0))]
+        variants = {'v1': (Decimal(3), False), 'v2': (Decimal(3), False)}
+        reservations, shortages = stock_reservation__plan(items=items, variants=variants)
+        assert shortages == [2]
+
+    def test__plan__reserves_only_missing(self) -> None:
+        items = [(1, 'v1', 3, Decimal(2)), (2, 'v2', 1, Decimal(1)), (3, 'missing', 1, Decimal(0))]
+        variants = {'v1': (Decimal(1), False), 'v2': (Decimal(0), False)}
+        reservations, shortages = stock_reservation__plan(items=items, variants=variants)
+        assert reservations == {1: Decimal(1)}
+        assert shortages == []
+
+
+def test__availability_changed() -> None:
+    variants = {
+        'v1': ('p1', Decimal(5), False),
+        'v2': ('p2', Decimal(2), False),
+        'v3': ('p3', Decimal(1), True),
+        'v4': ('p4', Decimal(0), False),
+    }
+    quantities = {'v1': Decimal(1), 'v2': Decimal(2), 'v3': Decimal(1), 'v4': Decimal(-3)}
+    assert variants__availability_changed(variants=variants, quantities=quantities) == {'p2', 'p4'}
@@ -0,0 +1,73 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from apps.market.constants import SUGGEST_FEED_STALL_TIMEOUT
+from apps.market.logic.interactors import suggest_index
+from apps.market.logic.interactors.suggest_index import (SuggestionIndex,
+                                                         SuggestionIndexHolder)
+
+
+class TestSuggestionIndex:
+    def test__prefix_of_every_word(self, suggestion_index) -> None:
+        assert [item['id'] for item in suggestion_index.suggest(query='nik кро')][:1] == ['p1']
+
+    def test__name_start_goes_first(self, suggestion_index) -> None:
+        assert [item['id'] for item in suggestion_index.suggest(query='кур')][:1] == ['p3']
+
+    def test__code_without_separators(self, suggestion_index) -> None:
+        assert [item['id'] for item in suggestion_index.suggest(query='ab12')] == ['p1']
+
+    def test__typo(self, suggestion_index) -> None:
+        assert [item['id'] for item in suggestion_index.suggest(query='converce')] == ['p2']
+
+    def test__remove(self, suggestion_index) -> None:
+        index = suggestion_index
+        index.apply(entry=('p1', None, ()))
+        assert [item['id'] for item in index.suggest(query='nike')] == ['p3']
+
+    def test__extend__same_as_apply(self) -> None:
+        entries = [
+            ('p1', 'Кроссовки Nike Air', ('AB-12', 'Nike')),
+            ('p2', 'Кеды Converse', ('CV-1', 'Converse')),
+            ('p1', None, ()),
+        ]
+        loaded = SuggestionIndex()
+        loaded.extend(entries=entries)
+        applied = SuggestionIndex()
+        for entry in entries:
+            applied.apply(entry=entry)
+        assert loaded.sorted_terms == applied.sorted_terms
+        assert loaded.suggest(query='ке') == applied.suggest(query='ке')
+
+
+class TestSuggestionIndexHolder:
+    def test__stalled_feed__reload_in_background(self, monkeypatch, suggestion_index) -> None:
+        reload_started, reload_release = threading.Event(), threading.Event()
+        fresh = SuggestionIndex(seq=5)
+        fresh.apply(entry=('p4', 'Кепка Nike', ()))
+
+        def load(*, seq: int | None = None) -> SuggestionIndex:
+            reload_started.set()
+            reload_release.wait(timeout=5)
+            return fresh
+
+        monkeypatch.setattr(suggest_index, 'suggest_index__load', load)
+        monkeypatch.setattr(suggest_index, 'suggest_feed__seq', lambda: 5)
+        monkeypatch.setattr(suggest_index, 'cache', SimpleNamespace(get_many=lambda keys: {}))
+        holder = SuggestionIndexHolder()
+        holder.index = suggestion_index
+        holder.stalled_since = time.monotonic() - SUGGEST_FEED_STALL_TIMEOUT - 1
+
+        assert [item['id'] for item in holder.suggest(query='куртка')] == ['p3']
+        assert reload_started.wait(timeout=5)
+        # Пока индекс пересобирается, запросы отвечают по старому индексу и не ждут пересборку.
+        holder.checked_at = 0.0
+        assert [item['id'] for item in holder.suggest(query='куртка')] == ['p3']
+
+        reload_release.set()
+        for thread in threading.enumerate():
+            if thread.name == 'suggestion-index-reload':
+                thread.join(timeout=5)
+        assert holder.index is fresh
+        assert [item['id'] for item in holder.suggest(query='кепка')] == ['p4']
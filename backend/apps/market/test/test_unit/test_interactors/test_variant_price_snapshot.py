@@ -0,0 +1,21 @@
+from decimal import Decimal
+
+
+class TestVariantPriceSnapshot:
+    def test__price_basket(self, variant_price_snapshot) -> None:
+        result = variant_price_snapshot.price_basket(items=[{'id': 'v2', 'quantity': 4}, {'id': 'v1', 'quantity': 1}])
+        assert [element['variant_product']['id'] for element in result['basket_elements']] == ['v2', 'v1']
+        assert result['cost_info'] == {
+            'basket_total_cost': Decimal('3000'),
+            'basket_discount': Decimal('200'),
+            'basket_with_discount': Decimal('2800'),
+        }
+        assert result['missing'] == []
+
+    def test__price_basket__clamps_and_merges_duplicates(self, variant_price_snapshot) -> None:
+        items = [{'id': 'v1', 'quantity': 2}, {'id': 'v1', 'quantity': 3}, {'id': 'unknown', 'quantity': 1}]
+        result = variant_price_snapshot.price_basket(items=items)
+        element, = result['basket_elements']
+        assert (element['requested_quantity'], element['quantity']) == (5, 3)
+        assert element['item_cost_with_discount'] == Decimal('2400')
+        assert result['missing'] == ['unknown']
@@ -0,0 +1,12 @@
+from apps.market.logic.selectors.product_selectors import search_query__prefix
+
+
+class TestSearchQueryPrefix:
+    def test__last_word_is_prefix(self) -> None:
+        assert search_query__prefix(value='Кроссовки Nik') == 'кроссовки & nik:*'
+
+    def test__special_characters_are_dropped(self) -> None:
+        assert search_query__prefix(value="a&b | c:* !'") == 'a & b & c:*'
+
+    def test__empty(self) -> None:
+        assert search_query__prefix(value=' ?! ') == ''
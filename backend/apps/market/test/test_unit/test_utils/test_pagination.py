@@ -0,0 +1,27 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from rest_framework.exceptions import ValidationError
+
+from apps.market.models import Basket, Product
+from utils.abstractions.pagination import (cursor__decode, cursor__encode,
+                                           keyset__ordering)
+
+
+def test__cursor__roundtrip_keeps_microseconds() -> None:
+    updated_at = datetime.datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc)
+    cursor = cursor__encode(values=[updated_at, Decimal('10.50'), 'id'])
+    assert cursor__decode(cursor=cursor) == ['2024-01-02T03:04:05.123456+00:00', '10.50', 'id']
+
+
+def test__cursor__decode_invalid() -> None:
+    with pytest.raises(ValidationError):
+        cursor__decode(cursor='not a cursor')
+
+
+def test__keyset__ordering_adds_pk() -> None:
+    assert keyset__ordering(queryset=Product.objects.order_by('-updated_at')) == [('updated_at', True), ('id', True)]
+    assert keyset__ordering(queryset=Basket.objects.order_by('-order_date', 'id')) == [
+        ('order_date', True), ('id', False)
+    ]
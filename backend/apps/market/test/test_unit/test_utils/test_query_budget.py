@@ -0,0 +1,15 @@
+from utils.query_budget import QueryRecorder, query__fingerprint
+
+
+def test__query__fingerprint_ignores_values() -> None:
+    first = query__fingerprint(sql='SELECT * FROM "market_variant" WHERE "id" IN (%s, %s, %s) AND "price" > 0')
+    second = query__fingerprint(sql="SELECT *  FROM \"market_variant\" WHERE \"id\" IN (%s) AND \"price\" > 'x'")
+    assert first == second == 'SELECT * FROM "market_variant" WHERE "id" IN (?) AND "price" > ?'
+
+
+def test__query_recorder__repeated() -> None:
+    recorder = QueryRecorder()
+    recorder.queries = [('SELECT 1 FROM t WHERE id = %s', 0.001)] * 3 + [('SELECT 2', 0.002)]
+    assert recorder.count == 4
+    assert recorder.duration_ms == 5.0
+    assert recorder.repeated(threshold=3) == {'SELECT ? FROM t WHERE id = ?': 3}
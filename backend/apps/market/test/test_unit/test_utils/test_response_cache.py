@@ -0,0 +1,75 @@
+import pytest
+from django.http import QueryDict
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.viewsets import GenericViewSet
+
+from apps.market.models import Brand, Favorite, Product
+from utils.abstractions.response_cache import (ConditionalGetMixin,
+                                               ResponseCacheMixin,
+                                               response_cache__invalidate,
+                                               response_cache__normalize_query,
+                                               response_cache__tag)
+
+
+class BrandTestViewSet(ConditionalGetMixin, ResponseCacheMixin, GenericViewSet):
+    # Обработчик не обращается к базе и считает вызовы, чтобы было видно, когда ответ взят из кеша.
+    queryset = Brand.objects.all()
+    response_cache_models = (Favorite,)
+    authentication_classes = ()
+    permission_classes = ()
+    calls = 0
+
+    def list(self, request: Request) -> Response:
+        type(self).calls += 1
+        return Response({'calls': type(self).calls})
+
+
+@pytest.fixture
+def brand_view(settings):
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache-default'},
+        'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache-local'},
+    }
+    BrandTestViewSet.calls = 0
+    return BrandTestViewSet.as_view({'get': 'list'})
+
+
+def test__response_cache__normalize_query_order() -> None:
+    first = response_cache__normalize_query(query_params=QueryDict('level=1&name=b&name=a'))
+    second = response_cache__normalize_query(query_params=QueryDict('name=a&name=b&level=1'))
+    assert first == second == 'level=1&name=a,b'
+
+
+def test__response_cache__tag() -> None:
+    assert response_cache__tag(model=Brand) == 'market.brand'
+    assert response_cache__tag(model=Product.category.through) == 'market.product_category'
+
+
+def test__conditional_get__not_modified_until_invalidate(brand_view) -> None:
+    factory = APIRequestFactory()
+    etag = brand_view(factory.get('/api/brands/')).headers['ETag']
+
+    response = brand_view(factory.get('/api/brands/', HTTP_IF_NONE_MATCH=etag))
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+    response_cache__invalidate(tag=response_cache__tag(model=Favorite))
+
+    response = brand_view(factory.get('/api/brands/', HTTP_IF_NONE_MATCH=etag))
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test__response_cache__served_until_invalidate(brand_view) -> None:
+    factory = APIRequestFactory()
+    first = brand_view(factory.get('/api/brands/', {'b': '2', 'a': '1'}))
+    second = brand_view(factory.get('/api/brands/', {'a': '1', 'b': '2'}))
+    assert first.content == second.content
+    assert BrandTestViewSet.calls == 1
+
+    response_cache__invalidate(tag=response_cache__tag(model=Brand))
+
+    brand_view(factory.get('/api/brands/', {'a': '1', 'b': '2'}))
+    assert BrandTestViewSet.calls == 2
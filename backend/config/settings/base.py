@@ -3,7 +3,8 @@ from datetime import timedelta
 from pathlib import Path
 
 from configurations import Configuration
-from configurations.values import BooleanValue, ListValue, Value
+from configurations.values import (BooleanValue, DictValue, IntegerValue,
+                                   ListValue, Value)
 
 
 class Base(Configuration):
@@ -25,6 +26,7 @@ class Base(Configuration):
         "django.contrib.sessions",
         "django.contrib.messages",
         "django.contrib.staticfiles",
+        "django.contrib.postgres",
         "rest_framework",
         "rest_framework.authtoken",
         "rest_framework_jwt",
@@ -68,7 +70,38 @@ class Base(Configuration):
     }
     CELERY_BROKER_URL = Value("redis://localhost:6379")
     CELERY_RESULT_BACKEND = Value("redis://localhost:6379")
-    CELERY_BEAT_SCHEDULE: dict = {}
+    CELERY_BEAT_SCHEDULE: dict = {
+        # Синхронизация с Моим складом обновляет товары в обход сигналов, карточки витрины досчитываются по расписанию
+        "rebuild-product-cards": {
+            "task": "Пересчёт карточек товаров на витрине",
+            "schedule": timedelta(hours=1),
+        },
+        # Резерв неоплаченного заказа держится BASKET_RESERVATION_MINUTES и снимается с точностью до минуты
+        "release-expired-stock-reservations": {
+            "task": "Снятие просроченных резервов неоплаченных заказов",
+            "schedule": timedelta(minutes=1),
+        },
+    }
+    CACHES = {
+        # Общий кеш процессов: версии, кешированные ответы и индексы каталога
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": Value(environ_name="CACHE_REDIS_URL", default="redis://localhost:6379/1"),
+        },
+        # Локальный кеш процесса перед Redis для кешированных ответов
+        "local": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "response-cache",
+        },
+    }
+    RESPONSE_CACHE_ENABLED = BooleanValue(True)
+    # Время жизни ответа в локальном кеше процесса, сек. Ограничивает задержку сброса между процессами.
+    RESPONSE_CACHE_LOCAL_TIMEOUT = IntegerValue(5)
+    # Время жизни ответа по имени вьюсета, сек: {"BrandViewSet": 60}
+    RESPONSE_CACHE_TIMEOUTS = DictValue({})
+    # Cache-Control для ответов с ETag: max-age и stale-while-revalidate, сек.
+    HTTP_CACHE_MAX_AGE = IntegerValue(0)
+    HTTP_CACHE_STALE_WHILE_REVALIDATE = IntegerValue(60)
     DISCORD_BOT_TOKEN = Value()
     ALLOW_ASYNC_UNSAFE = BooleanValue(True)
     SOLO_ADMIN_SKIP_OBJECT_LIST_PAGE = True
@@ -82,7 +115,17 @@ class Base(Configuration):
         "django.contrib.auth.middleware.AuthenticationMiddleware",
         "django.contrib.messages.middleware.MessageMiddleware",
         "restdoctor.django.middleware.api_selector.ApiSelectorMiddleware",
+        "utils.query_budget.QueryBudgetMiddleware",
     ]
+    # Учёт SQL-запросов в рабочем окружении выключен, включается в Development
+    QUERY_BUDGET_ENABLED = BooleanValue(False)
+    # Бюджет SQL-запросов на запрос к API: по умолчанию и по имени url ({"products-list": 5})
+    QUERY_BUDGET_DEFAULT = IntegerValue(30)
+    QUERY_BUDGETS = DictValue({})
+    # Сколько одинаковых по форме запросов считается N+1
+    QUERY_BUDGET_REPEAT_THRESHOLD = IntegerValue(5)
+    # Выбрасывать исключение при превышении бюджета вместо предупреждения в логе
+    QUERY_BUDGET_RAISE = BooleanValue(False)
 
     # restdoctor
     API_FALLBACK_VERSION = "fallback"
@@ -135,6 +178,15 @@ class Base(Configuration):
 
     DADATA_API_TOKEN = "asd"
 
+    # Как складывать количество гостевой корзины с корзиной пользователя при входе: sum, max или replace
+    BASKET_MERGE_POLICY = Value("replace")
+
+    # Базовый адрес API Tinkoff, для нагрузочных прогонов указывается заглушка run_integration_stubs
+    TINKOFF_API_URL = Value("https://securepay.tinkoff.ru/v2/")
+
+    # Сколько минут держится резерв остатков по оформленному заказу с онлайн-оплатой, пока он не оплачен
+    BASKET_RESERVATION_MINUTES = IntegerValue(30)
+
     TRACKER_CLIENTS: list = []
 
     SMS_RU = {
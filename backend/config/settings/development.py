@@ -5,6 +5,7 @@ from config.settings.base import Base
 
 class Development(Base):
     DEBUG = BooleanValue(True)
+    QUERY_BUDGET_ENABLED = BooleanValue(True)
     DOMAIN = Value('https://gksport.bulltech.ru')
     EMAIL_HOST = Value("smtp.yandex.ru")
     EMAIL_PORT = IntegerValue(587)
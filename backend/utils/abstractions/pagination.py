@@ -0,0 +1,139 @@
+import base64
+import binascii
+import datetime
+import json
+from decimal import Decimal
+from functools import reduce
+from typing import Any, Sequence
+
+from django.db.models import F, Q, QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+from restdoctor.rest_framework.pagination import PageNumberPagination
+from restdoctor.rest_framework.response import ResponseWithMeta
+
+INVALID_CURSOR_MESSAGE = "Некорректный курсор"
+
+
+def cursor__encode(*, values: Sequence[Any]) -> str:
+    def prepare(value: Any) -> Any:
+        # isoformat без потери микросекунд: иначе курсор по updated_at пропускал бы строки.
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    data = json.dumps([prepare(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+
+def cursor__decode(*, cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError({"cursor": INVALID_CURSOR_MESSAGE})
+    if not isinstance(values, list):
+        raise ValidationError({"cursor": INVALID_CURSOR_MESSAGE})
+    return values
+
+
+def keyset__ordering(*, queryset: QuerySet) -> list[tuple[str, bool]]:
+    """
+    Поля сортировки queryset вида (поле, по убыванию) с первичным ключом в конце для однозначного порядка.
+    """
+    ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+    fields = []
+    for item in ordering:
+        if not isinstance(item, str) or item == "?":
+            raise ValueError(f"Keyset pagination supports only field ordering, got {item!r}")
+        fields.append((item.lstrip("-"), item.startswith("-")))
+    pk_name = queryset.model._meta.pk.name
+    if not any(field in ("pk", pk_name) for field, _ in fields):
+        fields.append((pk_name, fields[-1][1] if fields else False))
+    return fields
+
+
+def keyset__after(*, ordering: list[tuple[str, bool]], values: Sequence[Any]) -> Q:
+    """
+    Условие "строго после курсора" для лексикографического порядка. NULL всегда идут последними.
+    """
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (field, descending), value in zip(ordering, values):
+        if value is None:
+            after = Q(pk__in=[])
+            same = Q(**{f"{field}__isnull": True})
+        else:
+            after = Q(**{f"{field}__{'lt' if descending else 'gt'}": value}) | Q(**{f"{field}__isnull": True})
+            same = Q(**{field: value})
+        condition |= equal & after
+        equal &= same
+    return condition
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """
+    Постраничная пагинация restdoctor с дополнительным режимом курсора.
+    С параметром cursor страница выбирается условием по полям сортировки queryset, а не OFFSET, и COUNT не выполняется:
+    глубокие страницы и бесконечная прокрутка стоят столько же, сколько первая. Первая страница - cursor без значения.
+    В постраничном режиме подсчёт общего количества отключается параметром count=0.
+    """
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: APIView = None) -> list | None:
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            self.use_count = request.query_params.get(self.count_query_param) not in ("0", "false")
+            return super().paginate_queryset(queryset, request, view)
+
+        serializer = self.get_request_serializer_class()(data=request.query_params, max_per_page=self.max_page_size)
+        serializer.is_valid(raise_exception=False)
+        self.per_page = serializer.validated_data.get(self.page_size_query_param, self.default_page_size)
+        self.request = request
+        self.base_url = replace_query_param(
+            remove_query_param(request.build_absolute_uri(), self.page_query_param),
+            self.page_size_query_param,
+            self.per_page,
+        )
+
+        ordering = keyset__ordering(queryset=queryset)
+        queryset = queryset.order_by(
+            *(F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+              for field, descending in ordering)
+        )
+        self.cursor = request.query_params.get(self.cursor_query_param)
+        if self.cursor:
+            values = cursor__decode(cursor=self.cursor)
+            if len(values) != len(ordering):
+                raise ValidationError({self.cursor_query_param: INVALID_CURSOR_MESSAGE})
+            queryset = queryset.filter(keyset__after(ordering=ordering, values=values))
+
+        paginated = list(queryset[:self.per_page + 1])
+        self.has_next = len(paginated) > self.per_page
+        del paginated[self.per_page:]
+        self.next_cursor = None
+        if self.has_next:
+            self.next_cursor = cursor__encode(
+                values=[reduce(getattr, field.split("__"), paginated[-1]) for field, _ in ordering]
+            )
+        return paginated
+
+    def get_paginated_response(self, data: Sequence[Any]) -> ResponseWithMeta:
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        meta = {
+            self.cursor_query_param: self.cursor or None,
+            self.page_size_query_param: self.per_page,
+            "has_next": self.has_next,
+            "url": replace_query_param(self.base_url, self.cursor_query_param, self.cursor or ""),
+            "next_url": (
+                replace_query_param(self.base_url, self.cursor_query_param, self.next_cursor)
+                if self.next_cursor else None
+            ),
+        }
+        return ResponseWithMeta(data=data, meta=meta)
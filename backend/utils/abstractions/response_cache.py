@@ -0,0 +1,214 @@
+import hashlib
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Any, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse, QueryDict
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+# Миксины подмешиваются к вьюсетам DRF, для проверки типов их базой служит GenericViewSet.
+if TYPE_CHECKING:
+    from rest_framework.viewsets import GenericViewSet as ViewSetBase
+else:
+    ViewSetBase = object
+
+RESPONSE_CACHE_DEFAULT_TIMEOUT = 60 * 5
+RESPONSE_CACHE_TAG_KEY = "response_cache:tag:{tag}"
+RESPONSE_CACHE_KEY = "response_cache:{name}:{digest}"
+
+
+def response_cache__tag(*, model: type[Model]) -> str:
+    return model._meta.label_lower
+
+
+def response_cache__versions(*, tags: Iterable[str]) -> list[int]:
+    """
+    Версии тегов одним запросом к общему кешу. Отсутствующие версии создаются.
+    """
+    cache = caches["default"]
+    keys = [RESPONSE_CACHE_TAG_KEY.format(tag=tag) for tag in tags]
+    versions = cache.get_many(keys)
+    return [
+        versions[key] if key in versions else cache.get_or_set(key, lambda: time.time_ns(), timeout=None)
+        for key in keys
+    ]
+
+
+def response_cache__invalidate(*, tag: str) -> None:
+    # Версия - время изменения в наносекундах, по ней же считается Last-Modified.
+    caches["default"].set(RESPONSE_CACHE_TAG_KEY.format(tag=tag), time.time_ns(), timeout=None)
+
+
+def response_cache__normalize_query(*, query_params: QueryDict) -> str:
+    return "&".join(
+        f"{key}={','.join(sorted(values))}" for key, values in sorted(query_params.lists())
+    )
+
+
+def response_cache__on_change(sender: type[Model], action: str | None = None, **kwargs: Any) -> None:
+    if action not in (None, "post_add", "post_remove", "post_clear"):
+        return
+    transaction.on_commit(partial(response_cache__invalidate, tag=response_cache__tag(model=sender)))
+
+
+def response_cache__connect(*, models: Iterable[type[Model]]) -> None:
+    """
+    Сбрасывает закешированные ответы, которые зависят от моделей, после коммита изменения.
+    Для промежуточных таблиц ManyToManyField передаётся модель through.
+    """
+    for model in models:
+        dispatch_uid = f"response_cache:{response_cache__tag(model=model)}"
+        post_save.connect(response_cache__on_change, sender=model, dispatch_uid=dispatch_uid)
+        post_delete.connect(response_cache__on_change, sender=model, dispatch_uid=dispatch_uid)
+        m2m_changed.connect(response_cache__on_change, sender=model, dispatch_uid=dispatch_uid)
+
+
+class ResponseCacheTagsMixin(ViewSetBase):
+    """
+    Теги ответа вьюсета: модель queryset и модели из response_cache_models.
+    Версии тегов читаются из общего кеша один раз за запрос.
+    """
+
+    response_cache_models: tuple[type[Model], ...] = ()
+    response_cache_versions: list[int] | None = None
+
+    def get_response_cache_tags(self) -> list[str]:
+        return [
+            response_cache__tag(model=model) for model in (self.queryset.model, *self.response_cache_models)
+        ]
+
+    def get_response_cache_versions(self) -> list[int]:
+        if self.response_cache_versions is None:
+            self.response_cache_versions = response_cache__versions(tags=self.get_response_cache_tags())
+        return self.response_cache_versions
+
+    def get_response_cache_digest(self, request: Request) -> str:
+        """
+        Хеш пути, нормализованных параметров запроса, формата ответа и версий тегов.
+        """
+        source = "|".join((
+            self.action,
+            request.path,
+            response_cache__normalize_query(query_params=request.query_params),
+            request.accepted_media_type or "",
+            ",".join(str(version) for version in self.get_response_cache_versions()),
+        ))
+        return hashlib.md5(source.encode("utf-8")).hexdigest()
+
+
+class ResponseCacheMixin(ResponseCacheTagsMixin):
+    """
+    Кеширует ответы анонимным пользователям: сначала локальный кеш процесса, затем общий кеш в Redis.
+    Ключ зависит от запроса и версий тегов, поэтому изменение модели из тегов делает старые ответы недоступными.
+    Время жизни задаётся response_cache_timeout и переопределяется настройкой RESPONSE_CACHE_TIMEOUTS по имени вьюсета.
+    """
+
+    response_cache_timeout: int = RESPONSE_CACHE_DEFAULT_TIMEOUT
+    response_cache_actions: tuple[str, ...] = ("list", "retrieve")
+    response_cache_key: str | None = None
+
+    def get_response_cache_timeout(self) -> int:
+        return settings.RESPONSE_CACHE_TIMEOUTS.get(type(self).__name__, self.response_cache_timeout)
+
+    def is_response_cacheable(self, request: Request) -> bool:
+        return (
+            settings.RESPONSE_CACHE_ENABLED
+            and request.method == "GET"
+            and getattr(self, "action", None) in self.response_cache_actions
+            and not request.user.is_authenticated
+        )
+
+    def initial(self, request: Request, *args: Any, **kwargs: Any) -> None:
+        super().initial(request, *args, **kwargs)
+        self.response_cache_key = None
+        if not self.is_response_cacheable(request):
+            return
+        self.response_cache_key = RESPONSE_CACHE_KEY.format(
+            name=type(self).__name__, digest=self.get_response_cache_digest(request)
+        )
+        cached = self.get_cached_response()
+        if cached is not None:
+            # Как и ViewSetMixin.as_view, подменяем обработчик метода: dispatch вызовет его после initial.
+            self.get = lambda *args, **kwargs: cached
+
+    def get_cached_response(self) -> HttpResponse | None:
+        if self.response_cache_key is None:
+            return None
+        local_cache = caches["local"]
+        cached = local_cache.get(self.response_cache_key)
+        if cached is None:
+            cached = caches["default"].get(self.response_cache_key)
+            if cached is None:
+                return None
+            local_cache.set(self.response_cache_key, cached, timeout=self.get_local_cache_timeout())
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+
+    def get_local_cache_timeout(self) -> int:
+        return min(settings.RESPONSE_CACHE_LOCAL_TIMEOUT, self.get_response_cache_timeout())
+
+    def finalize_response(self, request: Request, response: HttpResponse, *args: Any, **kwargs: Any) -> HttpResponse:
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.response_cache_key is None or not isinstance(response, Response) or response.status_code != 200:
+            return response
+        response.render()
+        cached = (response.content, response["Content-Type"])
+        caches["default"].set(self.response_cache_key, cached, timeout=self.get_response_cache_timeout())
+        caches["local"].set(self.response_cache_key, cached, timeout=self.get_local_cache_timeout())
+        return response
+
+
+class ConditionalGetMixin(ResponseCacheTagsMixin):
+    """
+    Условный GET. ETag считается по запросу и версиям тегов, Last-Modified - время последнего изменения тегов.
+    Проверка If-None-Match и If-Modified-Since выполняется до обработчика, 304 отдаётся без запросов к базе.
+    Cache-Control разрешает CDN отдавать устаревший ответ stale-while-revalidate секунд, пока он перепроверяется.
+    """
+
+    conditional_get_actions: tuple[str, ...] = ("list", "retrieve")
+    http_cache_max_age: int | None = None
+    http_cache_stale_while_revalidate: int | None = None
+    conditional_get_validators: tuple[str, int] | None = None
+
+    def initial(self, request: Request, *args: Any, **kwargs: Any) -> None:
+        super().initial(request, *args, **kwargs)
+        self.conditional_get_validators = None
+        if request.method != "GET" or getattr(self, "action", None) not in self.conditional_get_actions:
+            return
+        etag = f'"{self.get_response_cache_digest(request)}"'
+        last_modified = max(self.get_response_cache_versions()) // 10 ** 9
+        self.conditional_get_validators = (etag, last_modified)
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            self.get = lambda *args, **kwargs: not_modified
+
+    def finalize_response(self, request: Request, response: HttpResponse, *args: Any, **kwargs: Any) -> HttpResponse:
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.conditional_get_validators is None or response.status_code not in (200, 304):
+            return response
+        etag, last_modified = self.conditional_get_validators
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        max_age = settings.HTTP_CACHE_MAX_AGE if self.http_cache_max_age is None else self.http_cache_max_age
+        stale_while_revalidate = (
+            settings.HTTP_CACHE_STALE_WHILE_REVALIDATE
+            if self.http_cache_stale_while_revalidate is None
+            else self.http_cache_stale_while_revalidate
+        )
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, max_age=max_age)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=max_age, stale_while_revalidate=stale_while_revalidate
+            )
+        patch_vary_headers(response, ("Authorization",))
+        return response
@@ -0,0 +1,135 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Iterator
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from structlog import get_logger
+
+logger = get_logger(__name__)
+
+QUERY_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+QUERY_LIST_PATTERN = re.compile(r"\?(?:\s*,\s*\?)+")
+QUERY_FINGERPRINT_MAX_LENGTH = 300
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query__fingerprint(*, sql: str) -> str:
+    """
+    Форма запроса без значений: литералы и параметры заменяются на ?, списки IN (?, ?, ...) схлопываются.
+    Одинаковые отпечатки в рамках запроса к API - признак N+1.
+    """
+    sql = QUERY_LITERAL_PATTERN.sub("?", sql.replace("%s", "?"))
+    return " ".join(QUERY_LIST_PATTERN.sub("?", sql).split())
+
+
+class QueryRecorder:
+    """
+    Обёртка execute_wrapper: запоминает SQL и время каждого запроса.
+    """
+
+    def __init__(self) -> None:
+        self.queries: list[tuple[str, float]] = []
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(sum(duration for _, duration in self.queries) * 1000, 2)
+
+    def repeated(self, *, threshold: int) -> dict[str, int]:
+        fingerprints = Counter(query__fingerprint(sql=sql) for sql, _ in self.queries)
+        return {
+            fingerprint[:QUERY_FINGERPRINT_MAX_LENGTH]: count
+            for fingerprint, count in fingerprints.most_common()
+            if count >= threshold
+        }
+
+
+@contextmanager
+def queries__record() -> Iterator[QueryRecorder]:
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+@contextmanager
+def query_budget(max_queries: int, *, repeat_threshold: int | None = None) -> Iterator[QueryRecorder]:
+    """
+    Помощник для тестов: падает, если код внутри блока выполнил больше max_queries запросов
+    или повторил один отпечаток запроса repeat_threshold раз и больше.
+    """
+    with queries__record() as recorder:
+        yield recorder
+    repeated = recorder.repeated(threshold=repeat_threshold) if repeat_threshold else {}
+    assert recorder.count <= max_queries and not repeated, (
+        f"Выполнено {recorder.count} запросов при бюджете {max_queries}. Повторы: {repeated}"
+    )
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает SQL-запросы и их время для каждого запроса к API и пишет их в лог полями db_queries и db_time_ms.
+    Бюджет берётся из атрибута query_budget вьюсета, настройки QUERY_BUDGETS по имени url или QUERY_BUDGET_DEFAULT.
+    При превышении бюджета или повторе формы запроса QUERY_BUDGET_REPEAT_THRESHOLD раз пишется предупреждение,
+    а с QUERY_BUDGET_RAISE - выбрасывается QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not settings.QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+        with queries__record() as recorder:
+            response = self.get_response(request)
+        self.report(request=request, response=response, recorder=recorder)
+        return response
+
+    @staticmethod
+    def get_budget(*, request: HttpRequest) -> tuple[str | None, int]:
+        match = request.resolver_match
+        if match is None:
+            return None, settings.QUERY_BUDGET_DEFAULT
+        view_budget = getattr(getattr(match.func, "cls", None), "query_budget", None)
+        if view_budget is None:
+            view_budget = settings.QUERY_BUDGETS.get(match.view_name, settings.QUERY_BUDGET_DEFAULT)
+        return match.view_name, view_budget
+
+    def report(self, *, request: HttpRequest, response: HttpResponse, recorder: QueryRecorder) -> None:
+        view_name, budget = self.get_budget(request=request)
+        repeated = recorder.repeated(threshold=settings.QUERY_BUDGET_REPEAT_THRESHOLD)
+        log = logger.bind(
+            view=view_name,
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            db_queries=recorder.count,
+            db_time_ms=recorder.duration_ms,
+            db_query_budget=budget,
+        )
+        if recorder.count <= budget and not repeated:
+            log.info("request_db_queries")
+            return
+        log.warning("request_db_queries_over_budget", db_repeated_queries=repeated)
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(
+                f"{view_name}: {recorder.count} запросов при бюджете {budget}, повторы: {repeated}"
+            )